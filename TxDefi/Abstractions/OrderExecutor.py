@@ -3,28 +3,32 @@ import time
 from abc import abstractmethod
 from typing import TypeVar, Generic
 from TxDefi.Data.TradingDTOs import *
-from TxDefi.Utilities.RateLimiter import RateLimiter
+from TxDefi.Utilities.RateLimiter import RateLimiter, RatePriority
 
 T = TypeVar("T", bound=ExecutableOrder)  # Generic type for Order subclasses
 
 class OrderExecutor(Generic[T]):
-    def __init__(self, rate_limit: float = None):
-        self.rate_limiter: RateLimiter = None
+    #Pass a shared rate_limiter to spend from the same budget as the rpc api; rate_limit creates a private one instead
+    def __init__(self, rate_limit: float = None, rate_limiter: RateLimiter = None):
+        self.rate_limiter = rate_limiter
+        self.owns_rate_limiter = False
         self.cancel_event = threading.Event()
         self.sems_acquired = 0
 
-        if rate_limit:
+        if not rate_limiter and rate_limit:
             self.rate_limiter = RateLimiter(rate_limit)
+            self.owns_rate_limiter = True
             self.rate_limiter.start()
 
+    #A shared limiter is already charged per sendTransaction by the rpc api; only a private one is charged per order
     def execute(self, order: T, max_tries: int)->list[str]:
-        if self.rate_limiter:
-            self.rate_limiter.acquire_sem()
+        if self.rate_limiter and self.owns_rate_limiter:
+            self.rate_limiter.acquire_sem(1, RatePriority.TRADE)
 
         return self.execute_impl(order, max_tries)
 
     def stop(self):
-        if self.rate_limiter:
+        if self.rate_limiter and self.owns_rate_limiter:
             self.rate_limiter.stop()
             
         self.cancel_event.set()
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import time
+import websockets
+from TxDefi.Utilities.JsonCodec import JsonCodec, OrjsonCodec, is_orjson_available
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import logs as sample_pump_logs
+
+pump_program_address = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+
+#Record raw logsNotification frames for the Pump program, one per line
+async def record_frames(wss_uri: str, path: str, num_frames: int):
+    codec = JsonCodec()
+
+    async with websockets.connect(wss_uri) as websocket:
+        await websocket.send(codec.dumps(SolanaRpcApi.get_logs_sub_request([pump_program_address])))
+
+        with open(path, "w") as file:
+            count = 0
+
+            while count < num_frames:
+                frame = await websocket.recv()
+
+                if '"logsNotification"' in frame:
+                    file.write(frame.strip() + "\n")
+                    count += 1
+
+def load_frames(path: str)->list[str]:
+    with open(path, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+#Stand-in for recorded frames when no recording is given; same shape as a live Pump buy notification
+def build_sample_frames(num_frames: int)->list[str]:
+    codec = JsonCodec()
+    frames = []
+
+    for i in range(num_frames):
+        frame = {"jsonrpc": "2.0", "method": "logsNotification",
+                 "params": {"result": {"context": {"slot": 320000000 + i},
+                                       "value": {"signature": f"{i:088d}", "err": None, "logs": sample_pump_logs}},
+                            "subscription": 1}}
+        frames.append(codec.dumps(frame))
+
+    return frames
+
+def time_loads(codec: JsonCodec, frames: list[str], rounds: int)->float:
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for frame in frames:
+            codec.loads(frame)
+
+    return time.perf_counter()-start
+
+def run_benchmark(frames: list[str], rounds = 20):
+    codecs = [JsonCodec()]
+
+    if is_orjson_available:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson isn't installed; only timing stdlib json")
+
+    total_frames = len(frames)*rounds
+    total_bytes = sum(len(frame) for frame in frames)*rounds
+    baseline = None
+
+    for codec in codecs:
+        elapsed = time_loads(codec, frames, rounds)
+        baseline = baseline if baseline else elapsed
+        print(f"{codec.name:8} {total_frames/elapsed:12,.0f} frames/s {total_bytes/elapsed/1e6:8.1f} MB/s "
+              f"{elapsed/total_frames*1e6:8.2f} us/frame {baseline/elapsed:5.2f}x")
+
+#python -m TxDefi.Benchmarks.JsonCodecBenchmark [frames.jsonl]
+#python -m TxDefi.Benchmarks.JsonCodecBenchmark record <wss uri> frames.jsonl [count]
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "record":
+        asyncio.run(record_frames(sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else 1000))
+    else:
+        frames = load_frames(sys.argv[1]) if len(sys.argv) > 1 else build_sample_frames(1000)
+        run_benchmark(frames)
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import TxDefi.Data.Globals as globals
+from TxDefi.Benchmarks.JsonCodecBenchmark import load_frames, build_sample_frames, pump_program_address
+from TxDefi.DataAccess.Decoders.LogsDecodePool import LogsDecodePool, _init_worker, _decode_frames
+
+#Decodes every frame once with the in-process decoder and once per worker count through a LogsDecodePool
+def run_benchmark(frames: list[str], worker_counts: list[int]):
+    idl_path = globals.idl_path + "/pumpidl.json"
+    batches = [frames[start:start+LogsDecodePool.default_batch_size] for start in range(0, len(frames), LogsDecodePool.default_batch_size)]
+
+    _init_worker(pump_program_address, idl_path) #In process baseline
+    start = time.perf_counter()
+
+    for batch in batches:
+        _decode_frames(batch)
+
+    baseline = time.perf_counter()-start
+    print(f"{'inline':8} {len(frames)/baseline:12,.0f} frames/s")
+
+    for num_workers in worker_counts:
+        pool = LogsDecodePool(pump_program_address, idl_path, num_workers)
+        pool.submit(batches[0]).result() #Start the workers outside the timing
+
+        start = time.perf_counter()
+        futures = [pool.submit(batch) for batch in batches]
+
+        for future in futures: #In order, the same way LogsSubscribeSocket publishes
+            future.result()
+
+        elapsed = time.perf_counter()-start
+        pool.shutdown()
+        print(f"{num_workers:2} workers {len(frames)/elapsed:12,.0f} frames/s {baseline/elapsed:5.2f}x")
+
+#python -m TxDefi.Benchmarks.LogsDecodeBenchmark [frames.jsonl]
+#Record frames with JsonCodecBenchmark's record mode
+if __name__ == "__main__":
+    frames = load_frames(sys.argv[1]) if len(sys.argv) > 1 else build_sample_frames(20000)
+    cpu_count = os.cpu_count() or 1
+    run_benchmark(frames, sorted({1, 2, max(1, cpu_count//2), cpu_count}))
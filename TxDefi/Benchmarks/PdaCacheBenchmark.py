@@ -0,0 +1,48 @@
+import sys
+import time
+from solders.keypair import Keypair
+from TxDefi.DataAccess.Blockchains.Solana.PdaCache import PdaCache, pda_cache
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+import TxDefi.DataAccess.Blockchains.Solana.SolanaUtilities as solana_utilities
+import TxDefi.Utilities.MetaplexUtility as metaplex_util
+
+def build_addresses(count: int)->list[str]:
+    return [str(Keypair().pubkey()) for _ in range(count)]
+
+def time_calls(function, args_list: list[tuple], rounds: int)->float:
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for args in args_list:
+            function(*args)
+
+    return (time.perf_counter()-start)/(rounds*len(args_list))
+
+#The sell path derives the same few (owner, mint) ATAs over and over; compare a cold derivation to a cache hit
+def run_benchmark(num_owners = 5, num_mints = 200, rounds = 20):
+    owners = build_addresses(num_owners)
+    mints = build_addresses(num_mints)
+    ata_args = [(owner, mint, solana_utilities.TOKEN_PROGRAM_ADDRESS) for owner in owners for mint in mints]
+    metadata_args = [(mint,) for mint in mints]
+
+    pda_cache.max_entries = 0 #Every call misses and derives
+    uncached_ata = time_calls(SolanaRpcApi.get_associated_token_account_address, ata_args, 1)
+    uncached_metadata = time_calls(metaplex_util.get_metadata_pda, metadata_args, 1)
+
+    pda_cache.max_entries = PdaCache.default_max_entries
+    pda_cache.clear()
+    start = time.perf_counter()
+    SolanaRpcApi.get_associated_token_account_addresses(owners, {mint: solana_utilities.TOKEN_PROGRAM_ADDRESS for mint in mints})
+    batch_elapsed = time.perf_counter()-start
+    cached_ata = time_calls(SolanaRpcApi.get_associated_token_account_address, ata_args, rounds)
+    time_calls(metaplex_util.get_metadata_pda, metadata_args, 1)
+    cached_metadata = time_calls(metaplex_util.get_metadata_pda, metadata_args, rounds)
+
+    print(f"ATA          uncached {uncached_ata*1e6:8.2f} us  cached {cached_ata*1e6:8.2f} us  {uncached_ata/cached_ata:6.1f}x")
+    print(f"Metadata PDA uncached {uncached_metadata*1e6:8.2f} us  cached {cached_metadata*1e6:8.2f} us  {uncached_metadata/cached_metadata:6.1f}x")
+    print(f"Batch precompute of {len(ata_args)} ATAs: {batch_elapsed*1000:.1f} ms")
+    print(pda_cache.get_stats())
+
+#python -m TxDefi.Benchmarks.PdaCacheBenchmark [owners] [mints]
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5, int(sys.argv[2]) if len(sys.argv) > 2 else 200)
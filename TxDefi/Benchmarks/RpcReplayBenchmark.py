@@ -0,0 +1,125 @@
+import json
+import sys
+import time
+import concurrent.futures
+from typing import Callable
+from TxDefi.Utilities.RecordReplayTransport import RecordReplayTransport, TransportMode
+from TxDefi.Utilities.LatencyHistogram import LatencyHistogram
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.SolanaTradeExecutor import SolanaTradeExecutor
+from TxDefi.DataAccess.Blockchains.Solana.RiskAssessor import RiskAssessor
+from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.PumpDataDecoder import PumpDataDecoder
+from TxDefi.Engines.TokenInfoRetriever import TokenInfoRetriever
+from TxDefi.Managers.TradesManager import TradesManager
+import TxDefi.Utilities.HttpUtils as http_utils
+import TxDefi.Data.Globals as globals
+
+pump_program_address = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+replay_rpc_uri = "http://replay.local" #Never contacted; names the endpoint in router stats and telemetry
+
+#Just enough of TradesManager to run its get_trade_info unchanged; swaps and token infos come over rpc like they do live
+class TradeInfoHarness:
+    get_trade_info = TradesManager.get_trade_info
+    _get_exchange_type = staticmethod(TradesManager._get_exchange_type)
+
+    def __init__(self, solana_rpc_api: SolanaRpcApi, token_info_retriever: TokenInfoRetriever, payer_address: str):
+        self.solana_rpc_api = solana_rpc_api
+        self.token_info_retriever = token_info_retriever
+        self.payer_address = payer_address
+        self.market_manager = self
+        self.default_payer = self
+        self.trade_infos = {}
+        self.trade_events = {}
+
+    def get_account_address(self)->str:
+        return self.payer_address
+
+    def get_token_info(self, token_address: str):
+        return self.token_info_retriever.get_token_info(token_address)
+
+    def get_swap_info(self, tx_signature: str, target_pubkey: str, maxtries = 30):
+        transaction = self.solana_rpc_api.get_transaction(tx_signature, maxtries)
+
+        if transaction:
+            return self.solana_rpc_api.parse_swap_transactions(target_pubkey, transaction)
+
+def build_components(rpc_uri: str, transport: RecordReplayTransport, rate_limit: int, payer_address: str)->tuple[SolanaRpcApi, TokenInfoRetriever, RiskAssessor, TradeInfoHarness]:
+    solana_rpc_api = SolanaRpcApi(rpc_uri, None, rate_limit, transport=transport)
+    solana_rpc_api.rate_limiter.start()
+    pump_client = SolanaTradeExecutor.create_program_nc(globals.idl_path + "/pumpidl.json")
+    pump_decoder = PumpDataDecoder(pump_program_address, pump_client.coder, MessageDecoder.base58_encoding)
+    transactions_decoder = TransactionsDecoder()
+    transactions_decoder.add_data_decoder(pump_program_address, pump_decoder)
+    token_info_retriever = TokenInfoRetriever(solana_rpc_api, pump_decoder, transactions_decoder)
+    risk_assessor = RiskAssessor(solana_rpc_api)
+
+    return solana_rpc_api, token_info_retriever, risk_assessor, TradeInfoHarness(solana_rpc_api, token_info_retriever, payer_address)
+
+def run_stage(name: str, function: Callable, items: list, concurrency: int)->dict:
+    latencies = LatencyHistogram() #microseconds
+    failures = 0
+
+    def timed_call(item):
+        start = time.perf_counter()
+        result = function(item)
+        latencies.record((time.perf_counter()-start)*1e6)
+
+        return result
+
+    start = time.perf_counter()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for result in executor.map(timed_call, items):
+            failures += 1 if result is None else 0
+
+    elapsed = time.perf_counter()-start
+    print(f"{name:24} {len(items):6} calls {len(items)/elapsed if elapsed > 0 else 0:10,.1f} calls/s p50={latencies.get_percentile(50)/1000:8.2f}ms "
+          f"p99={latencies.get_percentile(99)/1000:8.2f}ms empty={failures}")
+
+    return {"calls": len(items), "elapsed": elapsed, "failures": failures, "latency_ms": latencies.to_dict(.001)}
+
+#workload: {"token_addresses": [...], "lp_mint_addresses": [...], "trade_signatures": [...], "payer_address": "..."}
+def run_benchmark(rpc_uri: str, transport: RecordReplayTransport, workload: dict, rate_limit: int, concurrency: int)->dict:
+    http_utils.transport = transport #Metadata uris are archived alongside the rpc calls
+    solana_rpc_api, token_info_retriever, risk_assessor, trade_info_harness = build_components(rpc_uri, transport, rate_limit,
+                                                                                               workload.get("payer_address", ""))
+    ret_results = {}
+
+    try:
+        ret_results["get_token_info"] = run_stage("TokenInfoRetriever", token_info_retriever.get_token_info, workload.get("token_addresses", []), concurrency)
+        ret_results["lp_burned_percent"] = run_stage("RiskAssessor", lambda lp_mint_address: risk_assessor.calculate_lp_burned_percent(
+            lp_mint_address, solana_rpc_api.get_token_supply_Amount(lp_mint_address, 3)), workload.get("lp_mint_addresses", []), concurrency)
+        ret_results["get_trade_info"] = run_stage("TradesManager", trade_info_harness.get_trade_info, workload.get("trade_signatures", []), concurrency)
+    finally:
+        solana_rpc_api.rate_limiter.stop()
+
+    print(transport.get_archive_stats())
+
+    return ret_results
+
+def record(rpc_uri: str, workload_path: str, archive_path: str, rate_limit = 10, concurrency = 4):
+    with open(workload_path, "r") as file:
+        workload = json.load(file)
+
+    transport = RecordReplayTransport(TransportMode.RECORD, archive_path)
+    transport.archive.metadata = {"workload": workload, "rate_limit": rate_limit}
+    run_benchmark(rpc_uri, transport, workload, rate_limit, concurrency)
+    transport.save()
+
+#latency/jitter in seconds; latency None replays the recorded latencies
+def replay(archive_path: str, latency: float = None, jitter: float = 0, rate_limit = 1000, concurrency = 4, seed = 0)->dict:
+    transport = RecordReplayTransport(TransportMode.REPLAY, archive_path, replay_latency=latency, replay_jitter=jitter, seed=seed)
+
+    return run_benchmark(replay_rpc_uri, transport, transport.archive.metadata.get("workload", {}), rate_limit, concurrency)
+
+#python -m TxDefi.Benchmarks.RpcReplayBenchmark record <rpc uri> <workload.json> <archive.jsonl.gz>
+#python -m TxDefi.Benchmarks.RpcReplayBenchmark replay <archive.jsonl.gz> [latency ms] [jitter ms]
+if __name__ == "__main__":
+    if len(sys.argv) >= 5 and sys.argv[1] == "record":
+        record(sys.argv[2], sys.argv[3], sys.argv[4])
+    elif len(sys.argv) >= 3 and sys.argv[1] == "replay":
+        replay(sys.argv[2], float(sys.argv[3])/1000 if len(sys.argv) > 3 else None, float(sys.argv[4])/1000 if len(sys.argv) > 4 else 0)
+    else:
+        print("Usage: RpcReplayBenchmark record <rpc uri> <workload.json> <archive> | replay <archive> [latency ms] [jitter ms]")
@@ -171,23 +171,58 @@ class ExecutableOrder:
             
             return ExecutableOrder(order_type, wallet_settings)
 
+#Priority fee taken from recent network fees, e.g. p75 x 1.2 capped at .005 SOL
+class PriorityFeePolicy:
+    default_compute_units = 100000 #Roughly what a Pump swap consumes
+    default_multiplier = 1.2 #Also the DEFAULT_PRIORITY_FEE_MULTIPLIER default in .env_template and the env editor
+
+    def __init__(self, percentile: float, multiplier: float, max_fee: Amount, compute_units: int = default_compute_units):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.max_fee = max_fee #SOL
+        self.compute_units = compute_units
+
+    def clone(self)->"PriorityFeePolicy":
+        return PriorityFeePolicy(self.percentile, self.multiplier, self.max_fee.clone(), self.compute_units)
+
+    #Takes a fee rate in micro lamports per compute unit
+    def get_priority_fee(self, micro_lamports_per_cu: float)->Amount:
+        lamports = micro_lamports_per_cu*self.multiplier*self.compute_units/1e6
+
+        return Amount.sol_scaled(min(lamports, self.max_fee.to_scaled()))
+
 class SwapOrderSettings:
-    def __init__(self, in_amount: Amount, slippage: Amount, priority_fee: Amount, confirm_transaction = True, jito_tip: Amount = None):
+    def __init__(self, in_amount: Amount, slippage: Amount, priority_fee: Amount, confirm_transaction = True, jito_tip: Amount = None,
+                 priority_fee_policy: PriorityFeePolicy = None):
         self.amount = in_amount
         self.slippage = slippage
-        self.priority_fee = priority_fee
+        self.priority_fee = priority_fee #Fixed fee; the fallback when a policy is set but no fee data is available yet
+        self.priority_fee_policy = priority_fee_policy
         self.jito_tip = jito_tip
         self.confirm_transaction = confirm_transaction
 
     def clone(self)->"SwapOrderSettings":
         jito_tip = self.jito_tip.clone() if self.jito_tip else None
-        return SwapOrderSettings(self.amount.clone(), self.slippage.clone(), self.priority_fee.clone(), self.confirm_transaction, jito_tip)
+        priority_fee_policy = self.priority_fee_policy.clone() if self.priority_fee_policy else None
+        return SwapOrderSettings(self.amount.clone(), self.slippage.clone(), self.priority_fee.clone(), self.confirm_transaction, jito_tip, priority_fee_policy)
+
+    #micro_lamports_per_cu comes from the fee estimator; None keeps the fixed fee
+    def resolve_priority_fee(self, micro_lamports_per_cu: float)->Amount:
+        if self.priority_fee_policy and micro_lamports_per_cu is not None:
+            return self.priority_fee_policy.get_priority_fee(micro_lamports_per_cu)
+
+        return self.priority_fee
 
     def serialize(self)->dict:
         ret_dict = {"in_amount" : self.amount.to_ui(), "slippage" : self.slippage.to_ui(), 
                     "priority_fee": self.priority_fee.to_ui(), "confirm_transaction": self.confirm_transaction}
         ret_dict["jito_tip"] = self.jito_tip.to_ui() if self.jito_tip else 0.0
 
+        if self.priority_fee_policy:
+            ret_dict["priority_fee_percentile"] = self.priority_fee_policy.percentile
+            ret_dict["priority_fee_multiplier"] = self.priority_fee_policy.multiplier
+            ret_dict["priority_fee_cap"] = self.priority_fee_policy.max_fee.to_ui()
+
         return ret_dict
        
     @staticmethod
@@ -198,8 +233,14 @@ class SwapOrderSettings:
         jito_tip = Amount.sol_ui(float(order_settings.get('jito_tip', 0)))
         temp_str = order_settings.get("confirm_transaction", "True")        
         confirm_transaction = True if temp_str == "True" else False
+        priority_fee_percentile = float(order_settings.get("priority_fee_percentile", 0)) #0 means use the fixed priority_fee
+        priority_fee_policy = None
+
+        if priority_fee_percentile > 0:
+            priority_fee_policy = PriorityFeePolicy(priority_fee_percentile, float(order_settings.get("priority_fee_multiplier", PriorityFeePolicy.default_multiplier)),
+                                                    Amount.sol_ui(float(order_settings.get("priority_fee_cap", priority_fee.to_ui()))))
     
-        return SwapOrderSettings(in_amount, slippage, priority_fee, confirm_transaction, jito_tip)
+        return SwapOrderSettings(in_amount, slippage, priority_fee, confirm_transaction, jito_tip, priority_fee_policy)
 
     @classmethod
     def schema(cls): 
@@ -207,6 +248,9 @@ class SwapOrderSettings:
         "amount_in": 0.0,
         "slippage": 0,
         "priority_fee": 0.0,
+        "priority_fee_percentile": 0,
+        "priority_fee_multiplier": 1.0,
+        "priority_fee_cap": 0.0,
         "jito_tip": 0.0,
         "confirm_transaction": True,
     }     
@@ -1,17 +1,58 @@
 import os
+import re
 import sys
-
+import time
+from pubsub import pub
 from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder
 from TxDefi.DataAccess.Blockchains.Solana.SubscribeSocket import SubscribeSocket
-from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import SubscriptionsDataDecoder
+from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import SubscriptionsDataDecoder, ResubscribeReport
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
+
+subscription_pattern = re.compile(r'"subscription"\s*:\s*(\d+)')
 
 class AccountSubscribeSocket(SubscribeSocket):    
-    def __init__(self, wss_uri: str, out_topic: str, ping = False):
-        SubscribeSocket.__init__(self, wss_uri, SubscriptionsDataDecoder(), out_topic, [], ping)
+    #Account notifications carry the whole account, so by default a queued one is replaced by a newer one for the same subscription
+    def __init__(self, wss_uri: str, out_topic: str, ping = False, dispatch_queue_size: int = DispatchQueue.default_max_size,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE, compression: str = SubscribeSocket.deflate_compression):
+        SubscribeSocket.__init__(self, wss_uri, SubscriptionsDataDecoder(), out_topic, [], ping, dispatch_queue_size, overflow_policy, compression)
         self.wallet_tracker_decoder : SubscriptionsDataDecoder = self.event_decoder
+        self.is_recovering = False
     
-    def add_decoder(self, subscription_id: int, account_info_decoder: AccountNotificationDecoder):
-        self.wallet_tracker_decoder.add_decoder(subscription_id, account_info_decoder)
+    def add_decoder(self, subscription_id: int, account_info_decoder: AccountNotificationDecoder, request_id: int = None):
+        self.wallet_tracker_decoder.add_decoder(subscription_id, account_info_decoder, request_id)
     
-    def remove_decoder(self, subscription_id: int):
-        self.wallet_tracker_decoder.remove_decoder(subscription_id) 
\ No newline at end of file
+    def remove_decoder(self, subscription_id: int, account_info_decoder: AccountNotificationDecoder = None):
+        self.wallet_tracker_decoder.remove_decoder(subscription_id, account_info_decoder)
+
+    def forget_request(self, request_id: int):
+        self.wallet_tracker_decoder.forget_request(request_id)
+
+    #Keyed by subscription id; the id sits at the end of the frame so only the tail is searched
+    def get_frame_key(self, frame: str)->tuple:
+        key, droppable = SubscribeSocket.get_frame_key(self, frame)
+
+        if droppable:
+            index = frame.rfind('"subscription"')
+            match = subscription_pattern.match(frame, index) if index >= 0 else None
+
+            if match:
+                key = int(match.group(1))
+
+        return key, droppable
+
+    #Old subscription ids die with the connection; swap them out before the replay goes out
+    def _init(self):
+        self.is_recovering = self.wallet_tracker_decoder.begin_resubscribe() > 0
+        SubscribeSocket._init(self)
+
+    def process_data(self, data: str):
+        SubscribeSocket.process_data(self, data)
+
+        if self.is_recovering and not self.wallet_tracker_decoder.is_resubscribing():
+            self.is_recovering = False
+            request_ids, remapped = self.wallet_tracker_decoder.take_remaps()
+            outage_time = self.connected_at-self.disconnected_at if self.disconnected_at else 0
+            report = ResubscribeReport(self.name, request_ids, remapped, outage_time, time.perf_counter()-self.connected_at)
+            print(f"{self.name}: Resubscribed {len(remapped)}/{len(request_ids)} accounts in {report.resubscribe_time*1000:.0f} ms "
+                  f"after a {outage_time:.1f} s outage")
+            pub.sendMessage(topicName=self.out_topic, arg1=report)
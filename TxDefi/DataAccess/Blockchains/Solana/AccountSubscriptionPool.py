@@ -0,0 +1,220 @@
+import concurrent.futures
+import itertools
+import threading
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
+from TxDefi.Utilities.JsonCodec import JsonCodec, default_codec
+
+class PooledSubscription:
+    def __init__(self, request_id: int, account_address: str, request: str):
+        self.request_id = request_id
+        self.account_address = account_address
+        self.request = request #Serialized accountSubscribe request; resent as is when the subscription moves
+        self.socket : AccountSubscribeSocket = None
+        self.subscription_id : int = None #Set once the node confirms
+        self.decoder : AccountNotificationDecoder = None
+        self.previous : tuple[AccountSubscribeSocket, int, AccountNotificationDecoder] = None #(connection, subscription id, decoder) kept live until a move is confirmed
+
+#Spreads accountSubscribe calls across several connections that all publish to the same out topic
+#New subscriptions go to the least loaded connection under the soft limit (rebalance_threshold*max_subscriptions); another
+#connection is opened once they're all past it, and confirmed subscriptions move off any connection left over it
+class AccountSubscriptionPool:
+    default_max_subscriptions = 1000 #Per connection; most providers cap somewhere between 1k and 10k
+    default_max_sockets = 8
+    default_rebalance_threshold = .8
+    deflate_compression = AccountSubscribeSocket.deflate_compression
+
+    def __init__(self, wss_uri: str, out_topic: str, max_subscriptions: int = default_max_subscriptions, max_sockets: int = default_max_sockets,
+                 rebalance_threshold: float = default_rebalance_threshold, ping = False, json_codec: JsonCodec = default_codec,
+                 dispatch_queue_size: int = DispatchQueue.default_max_size, overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+                 compression: str = deflate_compression, account_encoding: str = None):
+        self.wss_uri = wss_uri
+        self.out_topic = out_topic
+        self.max_subscriptions = max_subscriptions
+        self.max_sockets = max(1, max_sockets)
+        self.rebalance_threshold = rebalance_threshold
+        self.ping = ping
+        self.json_codec = json_codec
+        self.dispatch_queue_size = dispatch_queue_size
+        self.overflow_policy = overflow_policy
+        self.compression = compression
+        self.account_encoding = account_encoding #Encoding subscribers should request (e.g. base64+zstd); None leaves it to them
+        self.sockets : list[AccountSubscribeSocket] = []
+        self.socket_subscriptions : dict[AccountSubscribeSocket, dict[int, PooledSubscription]] = {} #value key=request id
+        self.subscriptions : dict[int, PooledSubscription] = {} #key=request id
+        self.unsubscribe_ids = itertools.count(-1, -1) #Negative so they never collide with a subscriber's request ids
+        self.lock = threading.RLock()
+        self.is_started = False
+        self.num_moved = 0
+        self._add_socket()
+
+    def _add_socket(self)->AccountSubscribeSocket:
+        socket = AccountSubscribeSocket(self.wss_uri, self.out_topic, self.ping, self.dispatch_queue_size, self.overflow_policy, self.compression)
+        socket.name = f"{AccountSubscribeSocket.__name__}-{self.out_topic}-{len(self.sockets)}"
+        self.sockets.append(socket)
+        self.socket_subscriptions[socket] = {}
+
+        if self.is_started:
+            socket.start()
+
+        return socket
+
+    def _get_soft_limit(self)->int:
+        return max(1, int(self.max_subscriptions*self.rebalance_threshold))
+
+    def _get_load(self, socket: AccountSubscribeSocket)->int:
+        return len(self.socket_subscriptions[socket])
+
+    #Must hold the lock
+    def _select_socket(self, exclude: AccountSubscribeSocket = None)->AccountSubscribeSocket:
+        candidates = [socket for socket in self.sockets if socket != exclude]
+        least_loaded = min(candidates, key=self._get_load) if len(candidates) > 0 else None
+
+        if least_loaded and self._get_load(least_loaded) < self._get_soft_limit():
+            return least_loaded
+
+        if len(self.sockets) < self.max_sockets:
+            return self._add_socket()
+
+        if least_loaded and self._get_load(least_loaded) < self.max_subscriptions:
+            return least_loaded
+
+        if not exclude:
+            print(f"AccountSubscriptionPool: All {len(self.sockets)} connections for {self.out_topic} are at their limit of {self.max_subscriptions}")
+            return least_loaded
+
+    def _send(self, subscription: PooledSubscription, socket: AccountSubscribeSocket)->concurrent.futures.Future:
+        subscription.socket = socket
+        subscription.subscription_id = None
+        self.socket_subscriptions[socket][subscription.request_id] = subscription
+
+        return socket.send_request_no_wait(subscription.request, True, subscription.request_id)
+
+    #Takes the subscription off its connection's load and stops it being replayed when that connection reconnects
+    def _detach(self, subscription: PooledSubscription):
+        self.socket_subscriptions[subscription.socket].pop(subscription.request_id, None)
+        subscription.socket.remove_sub_request(subscription.request)
+        subscription.socket.cancel_request(subscription.request_id)
+        subscription.socket.forget_request(subscription.request_id)
+
+    def _cancel(self, socket: AccountSubscribeSocket, subscription_id: int, decoder: AccountNotificationDecoder):
+        socket.remove_decoder(subscription_id, decoder)
+        unsubscribe_request = SolanaRpcApi.get_account_unsubscribe_request(subscription_id, next(self.unsubscribe_ids))
+        socket.send_request_no_wait(self.json_codec.dumps(unsubscribe_request), False)
+
+    #Returns right away; the future resolves to the subscription id once the node confirms
+    def subscribe(self, request_id: int, account_address: str, request: str)->concurrent.futures.Future:
+        with self.lock:
+            subscription = PooledSubscription(request_id, account_address, request)
+            self.subscriptions[request_id] = subscription
+
+            return self._send(subscription, self._select_socket())
+
+    #Called when the node confirms request_id; the decoder is registered on whichever connection the request went out on
+    def confirm_subscription(self, request_id: int, subscription_id: int, decoder: AccountNotificationDecoder)->bool:
+        with self.lock:
+            subscription = self.subscriptions.get(request_id)
+
+            if not subscription:
+                return False
+
+            if subscription.subscription_id is not None and subscription.subscription_id != subscription_id: #Resubscribed after a reconnect
+                subscription.socket.remove_decoder(subscription.subscription_id, subscription.decoder)
+
+            subscription.subscription_id = subscription_id
+            subscription.decoder = decoder
+            subscription.socket.add_decoder(subscription_id, decoder, request_id)
+
+            if subscription.previous: #The moved subscription is live on its new connection
+                self._cancel(*subscription.previous)
+                subscription.previous = None
+
+        return True
+
+    def unsubscribe(self, request_id: int):
+        with self.lock:
+            subscription = self.subscriptions.pop(request_id, None)
+
+            if subscription:
+                self._detach(subscription)
+
+                if subscription.subscription_id is not None:
+                    self._cancel(subscription.socket, subscription.subscription_id, subscription.decoder)
+                if subscription.previous:
+                    self._cancel(*subscription.previous)
+
+                self.rebalance()
+
+    #Moves confirmed subscriptions off connections past the soft limit; the old subscription keeps delivering until the new one
+    #is confirmed, and the subscriber sees that confirmation under the same request id
+    def rebalance(self)->int:
+        num_moved = 0
+
+        with self.lock:
+            for socket in list(self.sockets):
+                overload = self._get_load(socket)-self._get_soft_limit()
+
+                if overload <= 0:
+                    continue
+
+                movable = [subscription for subscription in self.socket_subscriptions[socket].values()
+                           if subscription.subscription_id is not None and not subscription.previous]
+
+                for subscription in movable[:overload]:
+                    target = self._select_socket(socket)
+
+                    if not target or self._get_load(target) >= self._get_soft_limit():
+                        break
+
+                    self._detach(subscription)
+                    subscription.previous = (socket, subscription.subscription_id, subscription.decoder)
+                    self._send(subscription, target)
+                    num_moved += 1
+
+            self.num_moved += num_moved
+
+        return num_moved
+
+    def set_max_subscriptions(self, max_subscriptions: int):
+        with self.lock:
+            self.max_subscriptions = max_subscriptions
+            self.rebalance()
+
+    def get_socket(self, request_id: int)->AccountSubscribeSocket:
+        subscription = self.subscriptions.get(request_id)
+
+        if subscription:
+            return subscription.socket
+
+    def get_loads(self)->list[dict]:
+        with self.lock:
+            return [{"name": socket.name, "subscriptions": self._get_load(socket),
+                     "pending": sum(1 for subscription in self.socket_subscriptions[socket].values() if subscription.subscription_id is None),
+                     "utilization": self._get_load(socket)/self.max_subscriptions if self.max_subscriptions > 0 else 0,
+                     "connected": socket.websocket is not None and socket.is_alive(), "dispatch": socket.get_dispatch_stats(),
+                     "transport": socket.get_transport_stats()} for socket in self.sockets]
+
+    def get_stats(self)->dict:
+        with self.lock:
+            return {"sockets": len(self.sockets), "max_sockets": self.max_sockets, "max_subscriptions": self.max_subscriptions,
+                    "subscriptions": len(self.subscriptions), "moved": self.num_moved}
+
+    def start(self):
+        with self.lock:
+            self.is_started = True
+
+            for socket in self.sockets:
+                socket.start()
+
+    def stop(self):
+        with self.lock:
+            self.is_started = False
+
+            for socket in self.sockets:
+                socket.stop()
+
+    def toggle(self):
+        for socket in self.sockets:
+            socket.toggle()
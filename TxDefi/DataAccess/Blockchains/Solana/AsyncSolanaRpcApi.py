@@ -0,0 +1,301 @@
+import asyncio
+import base64
+import concurrent.futures
+import time
+import httpx
+from typing import Callable, Coroutine
+from jsonrpcclient import request, Ok, Error
+from solders.hash import Hash
+from solders.transaction import VersionedTransaction
+from TxDefi.Data.Amount import Amount
+from TxDefi.Data.TransactionInfo import AccountInfo
+from TxDefi.Utilities.RateLimiter import RateLimiter, RatePriority
+from TxDefi.Utilities.AsyncLoopRunner import AsyncLoopRunner
+from TxDefi.Utilities.HttpTransport import HttpTransport, is_http2_available
+from TxDefi.Utilities.SingleFlight import SingleFlight
+from TxDefi.Utilities.JsonCodec import default_codec
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.RpcEndpointRouter import RpcEndpointRouter, EndpointsUnavailableError
+from TxDefi.DataAccess.Blockchains.Solana.RpcApiBase import RpcApiBase
+from TxDefi.DataAccess.Blockchains.Solana.RpcRetryPolicy import RpcRetryPolicy
+from TxDefi.DataAccess.Blockchains.Solana.RpcTelemetry import RpcTelemetry
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import RpcResponseCache, CachePolicy
+
+#Coroutine counterpart of SolanaRpcApi; every call runs on one shared event loop instead of blocking a thread per request
+class AsyncSolanaRpcApi(RpcApiBase):
+    default_max_concurrency = 50
+
+    def __init__(self, rpc_uri: str, rate_limiter: RateLimiter, max_concurrency: int = default_max_concurrency, rpc_backup_uri: str = None,
+                 router: RpcEndpointRouter = None, response_cache: RpcResponseCache = None, retry_policy: RpcRetryPolicy = None,
+                 telemetry: RpcTelemetry = None, transport: HttpTransport = None):
+        self.rpc_uri = rpc_uri
+        self.rpc_backup_uri = rpc_backup_uri
+        self.router = router #Optional; shares endpoint scores with the sync api when given
+        self.transport = transport if transport else router.transport if router else HttpTransport()
+        self.response_cache = response_cache if response_cache else RpcResponseCache()
+        self.single_flight = SingleFlight()
+        self.retry_policy = retry_policy if retry_policy else RpcRetryPolicy()
+        self.telemetry = telemetry if telemetry else RpcTelemetry()
+        self.rate_limiter = rate_limiter #Share the sync api's limiter so both stay inside the provider's budget
+        self.max_concurrency = max_concurrency
+        self.loop_runner = AsyncLoopRunner(AsyncSolanaRpcApi.__name__)
+        self.concurrency_semaphore : asyncio.Semaphore = None
+        self.client : httpx.AsyncClient = None
+        self.json_codec = default_codec
+
+    def _init_loop_resources(self):
+        #Must be created on the loop thread
+        if not self.client:
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency,
+                                  keepalive_expiry=HttpTransport.keep_alive_expiry)
+            self.client = httpx.AsyncClient(http2=is_http2_available, limits=limits)
+            self.concurrency_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def start(self):
+        self.loop_runner.start()
+
+    def stop(self):
+        if self.client:
+            self.loop_runner.submit(self.client.aclose())
+
+        self.loop_runner.stop()
+
+    #Schedule a coroutine from any thread
+    def submit(self, coroutine: Coroutine)->concurrent.futures.Future:
+        return self.loop_runner.submit(coroutine)
+
+    #Fan out coroutines on the shared loop and block until all results are in (None for failures)
+    def run_all(self, coroutines: list[Coroutine], timeout: float = None)->list:
+        return self.loop_runner.run_all(coroutines, timeout)
+
+    async def _post(self, json_body: dict | list, request_name: str, use_backup: bool):
+        self._init_loop_resources()
+
+        async with self.concurrency_semaphore:
+            if self.router and not (use_backup and self.rpc_backup_uri):
+                return await self.router.post_async(self.client, json_body, request_name)
+
+            endpoint_uri = self.rpc_backup_uri if use_backup and self.rpc_backup_uri else self.rpc_uri
+
+            return await self.transport.post_async(self.client, endpoint_uri, json_body)
+
+    async def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False, priority: RatePriority = None,
+                             cache_policy: CachePolicy = None):
+        if request_name in self.uncoalesced_methods:
+            return await self._run_rpc_method(request_name, params, max_tries, use_backup, priority, CachePolicy.NONE, None)
+
+        policy, cache_key, cached_response = self._get_cached_call(request_name, params, cache_policy)
+
+        if cached_response:
+            return cached_response
+
+        #A TRADE call never waits behind a BACKGROUND leader, nor a multi-try call behind a single try
+        return await self.single_flight.do_async((cache_key, use_backup, priority, max_tries), self._run_rpc_method, request_name, params, max_tries, use_backup, priority,
+                                                 policy, cache_key)
+
+    async def _run_rpc_method(self, request_name: str, params: list, max_tries: int, use_backup: bool, priority: RatePriority, policy: CachePolicy,
+                              cache_key: str):
+        error_class = None
+        last_error = None
+        retry_after = None
+
+        for attempt in range(max_tries):
+            if attempt > 0:
+                await asyncio.sleep(self.retry_policy.get_delay(attempt-1, error_class, retry_after))
+
+            wait_start = time.perf_counter()
+            await self.rate_limiter.acquire_method_async(request_name, priority)
+            self.telemetry.record_rate_wait(request_name, time.perf_counter()-wait_start)
+            response = None
+            call_start = time.perf_counter()
+
+            try:
+                response = await self._post(request(request_name, params=params), request_name, use_backup)
+                retry_after = self.retry_policy.get_retry_after(response)
+                parsed, error_class, last_error = self._handle_call_response(request_name, response, call_start, policy, cache_key)
+
+                if parsed:
+                    return parsed
+            except EndpointsUnavailableError:
+                self._record_circuit_open(request_name)
+                return
+            except Exception as e:
+                error_class, last_error = self._handle_call_error(request_name, response, call_start, e)
+
+            if not self.retry_policy.should_retry(error_class):
+                break
+
+        self._log_failure(request_name, error_class, last_error)
+
+    #Same contract as SolanaRpcApi.run_rpc_batch
+    async def run_rpc_batch(self, rpc_requests: list[tuple[str, list]], max_tries = 1, use_backup = False, priority: RatePriority = None,
+                            cache_policy: CachePolicy = None)->list[Ok | Error]:
+        ret_results, policies, cache_keys = self._start_batch(rpc_requests, cache_policy)
+        pending_indexes = self._get_pending_indexes(ret_results, range(len(rpc_requests)))
+        error_class = None
+        last_error = None
+
+        for attempt in range(max_tries):
+            if len(pending_indexes) == 0:
+                break
+
+            if attempt > 0:
+                await asyncio.sleep(self.retry_policy.get_delay(attempt-1, error_class))
+
+            error_class = None
+            batch_method_name = RpcTelemetry.get_batch_method_name(rpc_requests)
+            response = None
+            call_start = time.perf_counter()
+
+            try:
+                for start in range(0, len(pending_indexes), self.max_batch_size):
+                    batch_indexes = pending_indexes[start:start+self.max_batch_size]
+
+                    for index in batch_indexes:
+                        request_name = rpc_requests[index][0]
+                        wait_start = time.perf_counter()
+                        await self.rate_limiter.acquire_method_async(request_name, priority)
+                        self.telemetry.record_rate_wait(request_name, time.perf_counter()-wait_start)
+
+                    json_requests, request_indexes, batch_method_name = self._build_batch(rpc_requests, batch_indexes)
+                    response = None
+                    call_start = time.perf_counter()
+                    response = await self._post(json_requests, None, use_backup)
+                    is_answered, error_class, last_error = self._handle_batch_response(rpc_requests, response, request_indexes, ret_results, policies,
+                                                                                       cache_keys, batch_method_name, call_start)
+
+                    if not is_answered:
+                        break
+            except EndpointsUnavailableError:
+                self._record_circuit_open(batch_method_name)
+                break
+            except Exception as e:
+                error_class, last_error = self._handle_call_error(batch_method_name, response, call_start, e)
+
+            pending_indexes = self._get_pending_indexes(ret_results, pending_indexes)
+
+        self._log_batch_failure(len(rpc_requests), error_class, pending_indexes, last_error)
+
+        return ret_results
+
+    async def run_rpc_batch_results(self, rpc_requests: list[tuple[str, list]], max_tries = 1, use_backup = False, priority: RatePriority = None,
+                                    cache_policy: CachePolicy = None)->list:
+        return self.get_batch_results(await self.run_rpc_batch(rpc_requests, max_tries, use_backup, priority, cache_policy))
+
+    async def get_transaction(self, tx_signature: str, max_tries = 1)->dict[str, any]:
+        response = await self.run_rpc_method("getTransaction", SolanaRpcApi.get_transaction_params(tx_signature), max_tries)
+
+        if response:
+            return response.result
+
+    async def get_account_balance(self, account_address: str, max_tries=1)->float:
+        response = await self.run_rpc_method("getBalance", [ account_address ], max_tries)
+
+        if response:
+            return response.result['value']
+
+    async def get_account_balance_Amount(self, contract_address: str, max_tries=1)->Amount:
+        raw_amount = await self.get_account_balance(contract_address, max_tries)
+
+        if raw_amount is not None:
+            return Amount.sol_scaled(raw_amount)
+
+    async def get_signatures_for_address(self, contract_address: str, min_slot: int, limit = 1, before: str = None, until: str = None, max_tries = 1):
+        response = await self.run_rpc_method("getSignaturesForAddress", [contract_address,
+                                                                         SolanaRpcApi.get_signatures_config(min_slot, limit, before, until)], max_tries)
+
+        if response:
+            return response.result
+
+    async def get_token_account_balance(self, associated_token_address: str, max_tries=1)->Amount:
+        response = await self.run_rpc_method("getTokenAccountBalance", [ associated_token_address ], max_tries)
+
+        if response:
+            return SolanaRpcApi.parse_token_amount(response.result)
+
+    async def get_token_account_balances(self, associated_token_addresses: list[str], max_tries=1)->list[Amount]:
+        accounts = await self.get_multiple_accounts(associated_token_addresses, max_tries=max_tries)
+
+        return [SolanaRpcApi.parse_token_account_amount(accounts.get(address)) for address in associated_token_addresses]
+
+    async def get_token_largest_accounts(self, mint_address: str, limit = 20)->list[AccountInfo]:
+        response = await self.run_rpc_method("getTokenLargestAccounts", [mint_address])
+
+        if response:
+            return SolanaRpcApi.parse_token_largest_accounts(response.result, limit)
+
+        return []
+
+    async def get_token_accounts_by_owner(self, wallet_address: str)->list[AccountInfo]:
+        response = await self.run_rpc_method("getTokenAccountsByOwner", [wallet_address, {'programId': 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'},
+                                                                           {'encoding': 'jsonParsed'}])
+
+        if response:
+            return SolanaRpcApi.parse_token_accounts_by_owner(response.result)
+
+        return []
+
+    async def get_account_info(self, address: str, max_tries=1, cache_policy: CachePolicy = None)->dict:
+        response = await self.run_rpc_method("getAccountInfo", [address, {"encoding": "jsonParsed"}], max_tries, cache_policy=cache_policy)
+
+        if response:
+            return response.result
+
+    async def get_account_infos(self, addresses: list[str], max_tries=1, cache_policy: CachePolicy = None)->list[dict]:
+        accounts = await self.get_multiple_accounts(addresses, max_tries=max_tries, cache_policy=cache_policy)
+
+        return [{'value': accounts[address]} if address in accounts else None for address in addresses]
+
+    #Same contract as SolanaRpcApi.get_multiple_accounts but every 100 account chunk is its own concurrent call
+    async def get_multiple_accounts(self, addresses: list[str], parsers: dict[str, Callable[[dict], any]] = None, max_tries=1,
+                                    encoding = "jsonParsed", cache_policy: CachePolicy = None)->dict[str, any]:
+        chunks, rpc_requests = SolanaRpcApi.get_multiple_accounts_requests(addresses, encoding)
+        responses = await asyncio.gather(*[self.run_rpc_method(request_name, params, max_tries, cache_policy=cache_policy) for request_name, params in rpc_requests])
+
+        return SolanaRpcApi.parse_multiple_accounts(chunks, [response.result if response else None for response in responses], parsers)
+
+    async def get_account_owner(self, address: str, max_tries=1)->str:
+        account_info = await self.get_account_info(address, max_tries)
+
+        if account_info:
+            return (account_info.get('value') or {}).get('owner')
+
+    async def get_spl_account_owner(self, address: str, max_tries=1)->str:
+        return SolanaRpcApi.parse_spl_account_owner(await self.get_account_info(address, max_tries))
+
+    async def get_spl_account_owners(self, addresses: list[str], max_tries=1)->list[str]:
+        account_infos = await self.get_account_infos([address for address in addresses if address], max_tries)
+        account_infos.reverse()
+
+        return [SolanaRpcApi.parse_spl_account_owner(account_infos.pop() if address else None) for address in addresses]
+
+    async def get_asset(self, address: str, max_tries=1, use_backup = False):
+        response = await self.run_rpc_method("getAsset", [address], max_tries, use_backup)
+
+        if response:
+            return response.result
+
+    async def get_token_supply_Amount(self, address: str, max_tries=1)->Amount:
+        response = await self.run_rpc_method("getTokenSupply", [address], max_tries)
+
+        if response:
+            return SolanaRpcApi.parse_token_supply(response.result)
+
+    async def get_recent_priority_fees(self, account_address: str)->float:
+        response = await self.run_rpc_method("getRecentPrioritizationFees", [ [account_address] ])
+
+        if response and len(response.result) > 0 :
+            return SolanaRpcApi.parse_recent_priority_fees(response.result)
+
+    async def get_latest_block_hash(self)->Hash:
+        response = await self.run_rpc_method("getLatestBlockhash", [ {'commitment': "confirmed"} ])
+
+        if response:
+            return Hash.from_string(response.result['value']['blockhash'])
+
+    async def send_transaction(self, transaction: VersionedTransaction, maxTries=0)->str:
+        encoded_transaction = base64.b64encode(bytes(transaction)).decode('utf-8')
+        response = await self.run_rpc_method("sendTransaction", [encoded_transaction, {'encoding': 'base64', 'skipPreflight': True, 'maxRetries': maxTries}])
+
+        if response:
+            return response.result
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from solders.hash import Hash
+from TxDefi.Utilities.RateLimiter import RatePriority
+
+class BlockhashInfo:
+    __slots__ = ("blockhash", "last_valid_block_height", "slot", "fetched_at")
+
+    def __init__(self, blockhash: Hash, last_valid_block_height: int, slot: int, fetched_at: float):
+        self.blockhash = blockhash
+        self.last_valid_block_height = last_valid_block_height
+        self.slot = slot
+        self.fetched_at = fetched_at #time.monotonic()
+
+#Keeps a fresh blockhash on hand so signing never waits on getLatestBlockhash; readers only take a reference to an immutable snapshot (no locks)
+class BlockhashPrefetcher(threading.Thread):
+    default_refresh_interval = .4 #About one slot
+    slot_time = .4
+    max_blockhash_age = 150 #Blocks a blockhash stays valid for
+    default_safety_blocks = 20 #Treat a hash as expired this many blocks early so it still lands
+    max_tracked_hashes = 512
+
+    def __init__(self, solana_rpc_api, refresh_interval: float = default_refresh_interval):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = BlockhashPrefetcher.__name__
+        self.solana_rpc_api = solana_rpc_api
+        self.refresh_interval = refresh_interval
+        self.latest : BlockhashInfo = None
+        self.recent_hashes : OrderedDict[Hash, BlockhashInfo] = OrderedDict() #Lets signed transactions be checked by their hash
+        self.cancel_token = threading.Event()
+        self.refresh_lock = threading.Lock()
+        self.num_refreshes = 0
+        self.num_failures = 0
+        self.num_blocking_refreshes = 0
+
+    def run(self):
+        while not self.cancel_token.is_set():
+            start = time.monotonic()
+            self.refresh(RatePriority.DEFAULT) #Stay behind actual trades in the rate limiter queue
+
+            self.cancel_token.wait(max(0, self.refresh_interval - (time.monotonic()-start)))
+
+    def refresh(self, priority: RatePriority = RatePriority.TRADE)->BlockhashInfo:
+        try:
+            response = self.solana_rpc_api.run_rpc_method("getLatestBlockhash", [ {'commitment': "confirmed"} ], priority=priority)
+
+            if response:
+                slot = response.result['context']['slot']
+                value = response.result['value']
+                blockhash_info = BlockhashInfo(Hash.from_string(value['blockhash']), value['lastValidBlockHeight'], slot, time.monotonic())
+
+                with self.refresh_lock:
+                    if not self.latest or blockhash_info.slot >= self.latest.slot:
+                        self.latest = blockhash_info
+
+                    self.recent_hashes[blockhash_info.blockhash] = blockhash_info
+
+                    while len(self.recent_hashes) > self.max_tracked_hashes:
+                        self.recent_hashes.popitem(last=False)
+
+                    self.num_refreshes += 1
+
+                self.solana_rpc_api.response_cache.update_slot(slot)
+
+                return blockhash_info
+        except Exception as e:
+            print("BlockhashPrefetcher: Error refreshing blockhash " + str(e))
+
+        self.num_failures += 1
+
+    def get_latest(self)->BlockhashInfo:
+        return self.latest
+
+    #The newest hash was fetched when the chain was max_blockhash_age blocks short of its expiry; blocks keep coming about once a slot
+    def get_estimated_block_height(self)->int:
+        latest = self.latest
+
+        if latest:
+            return latest.last_valid_block_height - self.max_blockhash_age + int((time.monotonic()-latest.fetched_at)/self.slot_time)
+
+    def get_blocks_remaining(self, blockhash_info: BlockhashInfo)->int:
+        block_height = self.get_estimated_block_height()
+
+        if blockhash_info and block_height is not None:
+            return blockhash_info.last_valid_block_height - block_height
+
+        return 0
+
+    def is_valid(self, blockhash_info: BlockhashInfo, safety_blocks: int = default_safety_blocks)->bool:
+        return self.get_blocks_remaining(blockhash_info) > safety_blocks
+
+    #Unknown hashes count as expired
+    def is_blockhash_valid(self, blockhash: Hash, safety_blocks: int = default_safety_blocks)->bool:
+        return self.is_valid(self.recent_hashes.get(blockhash), safety_blocks)
+
+    #Only blocks on the rpc when the prefetched hash is missing or about to expire (e.g. the refresher fell behind)
+    def get_valid_blockhash(self, safety_blocks: int = default_safety_blocks)->BlockhashInfo:
+        blockhash_info = self.latest
+
+        if not self.is_valid(blockhash_info, safety_blocks):
+            self.num_blocking_refreshes += 1
+            blockhash_info = self.refresh(RatePriority.TRADE) or blockhash_info
+
+        return blockhash_info
+
+    def get_stats(self)->dict:
+        latest = self.latest
+
+        return {"slot": latest.slot if latest else 0, "age": time.monotonic()-latest.fetched_at if latest else None,
+                "blocks_remaining": self.get_blocks_remaining(latest), "refreshes": self.num_refreshes, "failures": self.num_failures,
+                "blocking_refreshes": self.num_blocking_refreshes}
+
+    def stop(self):
+        self.cancel_token.set()
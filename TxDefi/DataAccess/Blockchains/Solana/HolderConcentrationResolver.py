@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+from TxDefi.Data.Amount import Amount
+from TxDefi.Data.TransactionInfo import AccountInfo
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import SplTokenAccount, spl_account_decoder
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.AsyncSolanaRpcApi import AsyncSolanaRpcApi
+
+class ConcentrationReport:
+    def __init__(self, mint_address: str, supply: int, top_n: int):
+        self.mint_address = mint_address
+        self.supply = supply #scaled; None if unknown
+        self.top_n = top_n
+        self.top_holding = 0 #Held by the top_n largest holders that aren't excluded or burn addresses
+        self.excluded_holding = 0 #Held by excluded owners (e.g. the pool or bonding curve)
+        self.burned_holding = 0 #Held by burn addresses
+        self.num_accounts = 0
+        self.top_owners : list[tuple[str, int]] = [] #(owner address, scaled amount) largest first
+
+    #None when the supply is unknown; callers decide what an unknown share means for them
+    def get_share(self, amount: int)->float | None:
+        return amount/self.supply if self.supply else None
+
+    def get_top_share(self)->float | None:
+        return self.get_share(self.top_holding)
+
+    def get_excluded_share(self)->float | None:
+        return self.get_share(self.excluded_holding)
+
+    def get_burned_share(self)->float | None:
+        return self.get_share(self.burned_holding)
+
+    def to_dict(self)->dict:
+        return {"mint": self.mint_address, "supply": self.supply, "top_n": self.top_n, "top_share": self.get_top_share(),
+                "excluded_share": self.get_excluded_share(), "burned_share": self.get_burned_share(), "accounts": self.num_accounts,
+                "top_owners": self.top_owners}
+
+#Holder concentration from getTokenLargestAccounts with every owner resolved in two batched getMultipleAccounts calls;
+#token account -> owner mappings are cached so repeat checks on a mint cost a single rpc call
+class HolderConcentrationResolver:
+    default_top_n = 10
+    largest_accounts_limit = 20 #getTokenLargestAccounts never returns more
+    default_max_cached_owners = 20000
+    burn_addresses = {"1nc1nerator11111111111111111111111111111111"}
+
+    def __init__(self, solana_rpc_api: SolanaRpcApi, async_rpc_api: AsyncSolanaRpcApi = None, max_cached_owners: int = default_max_cached_owners):
+        self.solana_rpc_api = solana_rpc_api
+        self.async_rpc_api = async_rpc_api
+        self.max_cached_owners = max_cached_owners
+        self.owners : OrderedDict[str, tuple[str, str]] = OrderedDict() #key=token account; value=(owner, program that owns the owner account)
+        self.lock = threading.Lock()
+
+    def get_uncached(self, token_accounts: list[AccountInfo])->list[str]:
+        with self.lock:
+            return [token_account.account_address for token_account in token_accounts if token_account.account_address not in self.owners]
+
+    def get_owners(self, token_account_addresses: list[str])->dict[str, tuple[str, str]]:
+        with self.lock:
+            return {address: self.owners[address] for address in token_account_addresses if address in self.owners}
+
+    #Returns the owner addresses that still need their program looked up
+    @staticmethod
+    def get_owner_addresses(spl_accounts: dict[str, any])->list[str]:
+        owner_addresses = {account.owner for account in spl_accounts.values() if isinstance(account, SplTokenAccount)}
+
+        return [owner_address for owner_address in owner_addresses if owner_address not in HolderConcentrationResolver.burn_addresses]
+
+    def cache_owners(self, spl_accounts: dict[str, any], owner_accounts: dict[str, dict]):
+        with self.lock:
+            for address, account in spl_accounts.items():
+                if isinstance(account, SplTokenAccount):
+                    owner_account = owner_accounts.get(account.owner)
+                    self.owners[address] = (account.owner, owner_account.get('owner') if isinstance(owner_account, dict) else None)
+                    self.owners.move_to_end(address)
+
+            while len(self.owners) > self.max_cached_owners:
+                self.owners.popitem(last=False)
+
+    #exclude_owners can name owner wallets or the programs that own them (e.g. a pool authority or the AMM program)
+    def build_report(self, mint_address: str, token_accounts: list[AccountInfo], supply: Amount, top_n: int, exclude_owners: set[str])->ConcentrationReport:
+        ret_report = ConcentrationReport(mint_address, supply.to_scaled() if supply else None, top_n)
+        owners = self.get_owners([token_account.account_address for token_account in token_accounts])
+        ret_report.num_accounts = len(token_accounts)
+
+        for token_account in token_accounts: #Largest first
+            amount = token_account.balance.to_scaled()
+            owner_address, owner_program = owners.get(token_account.account_address, (None, None))
+
+            if owner_address in self.burn_addresses:
+                ret_report.burned_holding += amount
+            elif owner_address in exclude_owners or owner_program in exclude_owners:
+                ret_report.excluded_holding += amount
+            elif len(ret_report.top_owners) < top_n:
+                ret_report.top_holding += amount
+                ret_report.top_owners.append((owner_address if owner_address else token_account.account_address, amount))
+
+        return ret_report
+
+    #Returns None if the largest accounts couldn't be read; fetch_supply=False skips getTokenSupply when only the holdings matter
+    def resolve(self, mint_address: str, top_n: int = default_top_n, exclude_owners: list[str] = None, supply: Amount = None,
+                fetch_supply = True)->ConcentrationReport | None:
+        token_accounts = self.solana_rpc_api.get_token_largest_accounts(mint_address, self.largest_accounts_limit)
+
+        if len(token_accounts) == 0: #A mint always has an account, so nothing back means the call failed
+            return None
+
+        uncached = self.get_uncached(token_accounts)
+
+        if len(uncached) > 0:
+            spl_accounts = self.solana_rpc_api.get_spl_accounts(uncached, 3)
+            owner_accounts = self.solana_rpc_api.get_multiple_accounts(self.get_owner_addresses(spl_accounts), None, 3, SolanaRpcApi.base64_encoding)
+            self.cache_owners(spl_accounts, owner_accounts)
+
+        if not supply and fetch_supply:
+            supply = self.solana_rpc_api.get_token_supply_Amount(mint_address, 3)
+
+        return self.build_report(mint_address, token_accounts, supply, top_n, set(exclude_owners or []))
+
+    async def resolve_async(self, mint_address: str, top_n: int = default_top_n, exclude_owners: list[str] = None, supply: Amount = None,
+                            fetch_supply = True)->ConcentrationReport | None:
+        token_accounts = await self.async_rpc_api.get_token_largest_accounts(mint_address, self.largest_accounts_limit)
+
+        if len(token_accounts) == 0:
+            return None
+
+        uncached = self.get_uncached(token_accounts)
+
+        if len(uncached) > 0:
+            spl_accounts = await self.async_rpc_api.get_multiple_accounts(uncached, spl_account_decoder.get_parsers(), 3, SolanaRpcApi.base64_encoding)
+            owner_accounts = await self.async_rpc_api.get_multiple_accounts(self.get_owner_addresses(spl_accounts), None, 3, SolanaRpcApi.base64_encoding)
+            self.cache_owners(spl_accounts, owner_accounts)
+
+        if not supply and fetch_supply:
+            supply = await self.async_rpc_api.get_token_supply_Amount(mint_address, 3)
+
+        return self.build_report(mint_address, token_accounts, supply, top_n, set(exclude_owners or []))
+
+    def get_stats(self)->dict:
+        return {"cached_owners": len(self.owners), "max_cached_owners": self.max_cached_owners}
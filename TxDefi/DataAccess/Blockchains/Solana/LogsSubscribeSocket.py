@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from pubsub import pub
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.LogsDecodePool import LogsDecodePool
+from TxDefi.DataAccess.Blockchains.Solana.SubscribeSocket import SubscribeSocket
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
+
+#Subscribe socket that hands logsNotification frames to a LogsDecodePool in batches and publishes the results in arrival
+#order, the same order the in-process path publishes them; event_decoder handles responses and any batch the pool fails on
+class LogsSubscribeSocket(SubscribeSocket):
+    def __init__(self, wss_uri: str, event_decoder: MessageDecoder, decode_pool: LogsDecodePool, out_topic: str, requests: list[str] = [], ping = True,
+                 dispatch_queue_size: int = DispatchQueue.default_max_size, overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 batch_size: int = LogsDecodePool.default_batch_size, compression: str = SubscribeSocket.deflate_compression):
+        SubscribeSocket.__init__(self, wss_uri, event_decoder, out_topic, requests, ping, dispatch_queue_size, overflow_policy, compression)
+        self.decode_pool = decode_pool
+        self.batch_size = batch_size
+        self.decoded_queue = queue.Queue() #(frames, future, submit time) in arrival order
+        self.num_fallbacks = 0
+        self.decode_time = 0 #Summed seconds from submit to results
+
+    def stop(self):
+        SubscribeSocket.stop(self)
+        self.decoded_queue.put(None)
+        self.decode_pool.shutdown()
+
+    def run(self):
+        threading.Thread(target=self._publish, name=self.name + "-publish", daemon=True).start()
+        SubscribeSocket.run(self)
+
+    #Replaces the per frame dispatch; whatever is queued goes out as one batch so a storm costs few round trips to the workers
+    def _dispatch(self):
+        MessageDecoder.set_decode_stats(self.transport_stats)
+
+        while True:
+            frames = self.dispatch_queue.get_batch(self.batch_size)
+
+            if len(frames) == 0: #Closed
+                break
+
+            notifications = []
+
+            for frame in frames:
+                if '"logsNotification"' in frame:
+                    notifications.append(frame)
+                else:
+                    try:
+                        self.process_data(frame) #Responses and errors
+                    except Exception as e:
+                        print(f"{self.name}: Error processing data {e}")
+
+            if len(notifications) > 0:
+                try:
+                    self.decoded_queue.put((notifications, self.decode_pool.submit(notifications), time.perf_counter()))
+                except Exception as e:
+                    print(f"{self.name}: Couldn't submit to the decode pool {e}")
+                    self.decoded_queue.put((notifications, None, time.perf_counter()))
+
+    def _decode_here(self, frames: list[str])->list:
+        ret_results = []
+        self.num_fallbacks += 1
+
+        for frame in frames:
+            try:
+                ret_results.append(self.event_decoder.decode(self.json_codec.loads(frame)))
+            except Exception as e:
+                print(f"{self.name}: Error decoding frame {e}")
+
+        return ret_results
+
+    def _publish(self):
+        while True:
+            item = self.decoded_queue.get()
+
+            if item is None:
+                break
+
+            frames, future, submitted_at = item
+
+            try:
+                results = future.result() if future else self._decode_here(frames)
+            except Exception as e: #A worker died; nothing is lost as long as this process can still decode
+                print(f"{self.name}: Decode pool failed {e}")
+                results = self._decode_here(frames)
+
+            self.decode_time += time.perf_counter()-submitted_at
+
+            for decoded_data in results:
+                if decoded_data:
+                    try:
+                        pub.sendMessage(topicName=self.out_topic, arg1=decoded_data)
+                    except Exception as e:
+                        print(f"{self.name}: Error publishing {e}")
+
+    def get_decode_stats(self)->dict:
+        stats = self.decode_pool.get_stats()
+
+        return dict(stats, pending_batches=self.decoded_queue.qsize(), fallbacks=self.num_fallbacks,
+                    avg_batch_time=self.decode_time/stats["batches"] if stats["batches"] > 0 else 0)
@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+from solders.pubkey import Pubkey
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
+
+#Bounded LRU of program derived addresses; find_program_address runs SHA-256 once per bump seed tried, and the result never changes
+class PdaCache:
+    default_max_entries = 50000
+
+    def __init__(self, max_entries: int = default_max_entries):
+        self.max_entries = max_entries
+        self.entries : OrderedDict[tuple, tuple[Pubkey, int, str]] = OrderedDict() #value=(address, bump, address string); oldest first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_or_derive(self, key: tuple, get_seeds: Callable[[], list[bytes]], program_id: Pubkey)->tuple[Pubkey, int, str]:
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry:
+                self.entries.move_to_end(key)
+                self.hits += 1
+
+                return entry
+
+        address, bump = Pubkey.find_program_address(get_seeds(), program_id) #Outside the lock; two threads may derive the same address once
+        entry = (address, bump, str(address))
+
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = entry
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+        return entry
+
+    def find_program_address(self, seeds: list[bytes], program_id: Pubkey)->tuple[Pubkey, int]:
+        address, bump, _ = self._get_or_derive((tuple(seeds), program_id), lambda: seeds, program_id)
+
+        return address, bump
+
+    def get_address(self, seeds: list[bytes], program_address: str)->str:
+        return self._get_or_derive((tuple(seeds), program_address), lambda: seeds, Pubkey.from_string(program_address))[2]
+
+    #Keyed by the address strings so a hit skips the base58 decodes as well as the hashing
+    def get_associated_token_address(self, owner_address: str, mint_address: str, token_program_id: Pubkey)->str:
+        get_seeds = lambda: [bytes(Pubkey.from_string(owner_address)), bytes(token_program_id), bytes(Pubkey.from_string(mint_address))]
+
+        return self._get_or_derive((owner_address, mint_address, token_program_id), get_seeds, ASSOCIATED_TOKEN_PROGRAM_ID)[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self)->dict:
+        with self.lock:
+            total = self.hits + self.misses
+
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits/total if total > 0 else 0, "evictions": self.evictions}
+
+pda_cache = PdaCache() #Shared by the static derivation helpers
@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+from TxDefi.Data.MarketEnums import SupportedPrograms
+from TxDefi.Utilities.RateLimiter import RatePriority
+
+class FeeWindow:
+    def __init__(self, window_size: int):
+        self.fees = deque(maxlen=window_size) #(slot, micro lamports per compute unit)
+        self.last_slot = 0
+        self.sorted_fees : tuple[float] = () #Swapped in whole after every sample so readers never see a partial update
+
+#Samples getRecentPrioritizationFees in the background and keeps a rolling window per account so fee lookups are answered from memory
+class PriorityFeeEstimator(threading.Thread):
+    default_sample_interval = 2 #seconds; the rpc returns the last 150 slots so nothing is missed at this rate
+    default_window_size = 300 #slots
+    default_percentiles = (50, 75, 90)
+
+    def __init__(self, solana_rpc_api, sample_interval: float = default_sample_interval, window_size: int = default_window_size,
+                 include_zero_fees = False):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = PriorityFeeEstimator.__name__
+        self.solana_rpc_api = solana_rpc_api
+        self.sample_interval = sample_interval
+        self.window_size = window_size
+        self.include_zero_fees = include_zero_fees #Most slots report 0 (the minimum landed fee), which drags every percentile to 0
+        self.fee_windows : dict[str, FeeWindow] = {} #key=account address
+        self.program_accounts : dict[SupportedPrograms, str] = {}
+        self.cancel_token = threading.Event()
+        self.lock = threading.Lock()
+
+    def add_account(self, account_address: str, program_type: SupportedPrograms = None):
+        with self.lock:
+            if account_address not in self.fee_windows:
+                self.fee_windows[account_address] = FeeWindow(self.window_size)
+
+            if program_type is not None:
+                self.program_accounts[program_type] = account_address
+
+    def run(self):
+        while not self.cancel_token.is_set():
+            for account_address in list(self.fee_windows.keys()):
+                self.sample(account_address)
+
+            self.cancel_token.wait(self.sample_interval)
+
+    def sample(self, account_address: str):
+        try:
+            response = self.solana_rpc_api.run_rpc_method("getRecentPrioritizationFees", [ [account_address] ], priority=RatePriority.BACKGROUND)
+
+            if response and response.result:
+                self.add_samples(account_address, response.result)
+        except Exception as e:
+            print("PriorityFeeEstimator: Error sampling fees for " + account_address + " " + str(e))
+
+    def add_samples(self, account_address: str, fees_result: list[dict]):
+        fee_window = self.fee_windows.get(account_address)
+
+        if not fee_window:
+            return
+
+        with self.lock:
+            last_slot = fee_window.last_slot
+
+            for fee_info in sorted(fees_result, key=lambda fee_info: fee_info['slot']):
+                slot = fee_info['slot']
+                fee = fee_info['prioritizationFee']
+
+                if slot > last_slot and (fee > 0 or self.include_zero_fees):
+                    fee_window.fees.append((slot, fee))
+
+                fee_window.last_slot = max(fee_window.last_slot, slot)
+
+            fee_window.sorted_fees = tuple(sorted(fee for _, fee in fee_window.fees))
+
+    #Micro lamports per compute unit; None until the account has samples
+    def get_fee(self, account_address: str, percentile: float)->float:
+        fee_window = self.fee_windows.get(account_address)
+
+        if fee_window:
+            sorted_fees = fee_window.sorted_fees
+
+            if len(sorted_fees) > 0:
+                index = min(len(sorted_fees)-1, int(len(sorted_fees)*percentile/100))
+
+                return sorted_fees[index]
+
+    def get_program_fee(self, program_type: SupportedPrograms, percentile: float)->float:
+        account_address = self.program_accounts.get(program_type)
+
+        if account_address:
+            return self.get_fee(account_address, percentile)
+
+    def get_stats(self)->dict[str, dict]:
+        ret_stats = {}
+
+        for account_address, fee_window in list(self.fee_windows.items()):
+            stats = {f"p{percentile}": self.get_fee(account_address, percentile) for percentile in self.default_percentiles}
+            stats["samples"] = len(fee_window.sorted_fees)
+            stats["last_slot"] = fee_window.last_slot
+            ret_stats[account_address] = stats
+
+        return ret_stats
+
+    def stop(self):
+        self.cancel_token.set()
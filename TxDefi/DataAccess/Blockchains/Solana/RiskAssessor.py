@@ -2,7 +2,9 @@ from enum import Enum
 from TxDefi.Data.Amount import Amount
 from TxDefi.Data.TransactionInfo import LiquidityPoolData, ParsedTransaction
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
-from TxDefi.Utilities.RateLimiter import RateLimiter
+from TxDefi.DataAccess.Blockchains.Solana.AsyncSolanaRpcApi import AsyncSolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.HolderConcentrationResolver import HolderConcentrationResolver, ConcentrationReport
+from TxDefi.Utilities.RateLimiter import RateLimiter, RatePriority
 
 class Risk(Enum):
     NONE = 0
@@ -17,28 +19,56 @@ class RugCheckerApi:
     def get_token_report(token_address):
         pass
 
-class RiskAssessor(RateLimiter):
+class RiskAssessor:
     min_sol_liquidity = Amount.sol_ui(5)
 
-    def __init__(self, solana_rpc_api: SolanaRpcApi, banned_words: set = None):
-        RateLimiter.__init__(self, 10)
+    def __init__(self, solana_rpc_api: SolanaRpcApi, banned_words: set = None, rate_limiter: RateLimiter = None, async_rpc_api: AsyncSolanaRpcApi = None):
         self.solana_rpc_api = solana_rpc_api
+        self.rate_limiter = rate_limiter if rate_limiter else solana_rpc_api.rate_limiter #Risk checks queue behind trade calls
+        self.concentration_resolver = HolderConcentrationResolver(solana_rpc_api, async_rpc_api)
         self.rug_checker = RugCheckerApi()
         self.banned_words = banned_words
 
+    #Only the LP holdings matter here, so the supply is never fetched
     def liquidity_check(self, data: LiquidityPoolData, transaction: ParsedTransaction = None)->Risk:
+        is_lp_unburned = False
+
+        if not transaction and len(data.lp_mint_address) > 0:
+            lp_report = self.concentration_resolver.resolve(data.lp_mint_address, HolderConcentrationResolver.largest_accounts_limit,
+                                                            supply=self._get_lp_supply(data), fetch_supply=False)
+            is_lp_unburned = self._is_lp_unburned(lp_report)
+
+        return self._rank_liquidity(data, is_lp_unburned)
+
+    async def liquidity_check_async(self, data: LiquidityPoolData, transaction: ParsedTransaction = None)->Risk:
+        is_lp_unburned = False
+
+        if not transaction and len(data.lp_mint_address) > 0:
+            lp_report = await self.concentration_resolver.resolve_async(data.lp_mint_address, HolderConcentrationResolver.largest_accounts_limit,
+                                                                        supply=self._get_lp_supply(data), fetch_supply=False)
+            is_lp_unburned = self._is_lp_unburned(lp_report)
+
+        return self._rank_liquidity(data, is_lp_unburned)
+
+    @staticmethod
+    def _get_lp_supply(data: LiquidityPoolData)->Amount:
+        return Amount.tokens_scaled(data.lp_supply, 0) if data.lp_supply else None #Saves a getTokenSupply when the event carries it
+
+    #LP tokens that aren't burned can pull the liquidity; an unreadable report counts as not burned
+    @staticmethod
+    def _is_lp_unburned(lp_report: ConcentrationReport | None)->bool:
+        return lp_report is None or lp_report.top_holding > 0
+
+    def _rank_liquidity(self, data: LiquidityPoolData, is_lp_unburned: bool)->Risk:
         risk_rank = 0 #Rank 1-3 Low, 4-6 Med, 7+ High
         if data.pc_amount < self.min_sol_liquidity.to_scaled():
             print(f"TokenAccountsMonitor: pc sol amount {data.pc_amount} too low. Tx: {data.tx_signature}")
             risk_rank += 1
 
-        if not transaction and len(data.lp_mint_address) > 0:
-            top_accounts_value = self.solana_rpc_api.get_top_owners_total_holding(data.lp_mint_address, 100, None, False)
-            
-            if top_accounts_value > 0:
-                risk_rank += 1
+        if is_lp_unburned:
+            risk_rank += 1
 
-                #TODO put in a more sophistacated check; could use rugcheck api
+            #TODO put in a more sophistacated check; could use rugcheck api
                 
         if risk_rank == 0:
             return Risk.NONE
@@ -50,15 +80,27 @@ class RiskAssessor(RateLimiter):
             return Risk.HIGH
 
     def get_rug_check_info(self, token_address: str):
-        if self.acquire_sem():
+        if self.rate_limiter.acquire_sem(1, RatePriority.BACKGROUND):
             return self.rug_checker.get_token_report(token_address)
     
-    def calculate_lp_burned_percent(self, lp_token_address: str, token_supply: Amount)->float:
-        top_accounts_value = self.solana_rpc_api.get_top_owners_total_holding(lp_token_address, 100, None, False)
+    #None if the supply or the largest accounts couldn't be read; treat that as unknown, not burned
+    def calculate_lp_burned_percent(self, lp_token_address: str, token_supply: Amount)->float | None:
+        lp_report = self.get_concentration_report(lp_token_address, HolderConcentrationResolver.largest_accounts_limit, supply=token_supply)
+        top_share = lp_report.get_top_share() if lp_report else None
+
+        if top_share is None:
+            return None
+
+        return (1-top_share)*100 #Burned, sent to a burn address or spread below the largest holders
 
-        ret_percent = (1-top_accounts_value/token_supply.to_scaled())*100
+    #Top holders' share of supply with the pool's own accounts (exclude_owners) and burn addresses broken out
+    def get_concentration_report(self, token_address: str, top_n: int = HolderConcentrationResolver.default_top_n, exclude_owners: list[str] = None,
+                                 supply: Amount = None)->ConcentrationReport | None:
+        return self.concentration_resolver.resolve(token_address, top_n, exclude_owners, supply)
 
-        return ret_percent
+    async def get_concentration_report_async(self, token_address: str, top_n: int = HolderConcentrationResolver.default_top_n,
+                                             exclude_owners: list[str] = None, supply: Amount = None)->ConcentrationReport | None:
+        return await self.concentration_resolver.resolve_async(token_address, top_n, exclude_owners, supply)
     
     def has_banned_words(self, symbol: str, name: str, description: str):
         ret_val = False
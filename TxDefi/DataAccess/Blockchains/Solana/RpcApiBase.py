@@ -0,0 +1,159 @@
+import time
+from jsonrpcclient import request, parse, Ok, Error
+from TxDefi.Utilities.JsonCodec import JsonCodec
+from TxDefi.DataAccess.Blockchains.Solana.RpcEndpointRouter import RpcEndpointRouter
+from TxDefi.DataAccess.Blockchains.Solana.RpcRetryPolicy import RpcRetryPolicy, RpcErrorClass
+from TxDefi.DataAccess.Blockchains.Solana.RpcTelemetry import RpcTelemetry
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import RpcResponseCache, CachePolicy
+
+#Caching, response classification, breaker reporting and batch assembly shared by SolanaRpcApi and AsyncSolanaRpcApi
+#Subclasses only own the parts that block or await (rate limiter waits, posts and retry sleeps)
+class RpcApiBase:
+    max_batch_size = 100 #Most providers cap JSON-RPC batches around this size
+    uncoalesced_methods = {"sendTransaction"} #Duplicate sends are deliberate (they improve the odds of landing)
+
+    #Subclasses set these before making calls
+    router : RpcEndpointRouter = None
+    response_cache : RpcResponseCache = None
+    retry_policy : RpcRetryPolicy = None
+    telemetry : RpcTelemetry = None
+    json_codec : JsonCodec = None
+
+    #Feeds what the response body said back to the endpoint's circuit breaker
+    def _report_outcome(self, response, error_class: RpcErrorClass):
+        if self.router:
+            self.router.record_outcome(getattr(response, 'endpoint_uri', None), error_class)
+
+    def _record_call(self, method_name: str, response, call_start: float, error_class: RpcErrorClass):
+        self.telemetry.record_call(method_name, response, time.perf_counter()-call_start, error_class.name if error_class else None)
+
+    #Returns the parsed body or the error class of the failure along with a description
+    def _parse_response(self, response)->tuple[any, RpcErrorClass, str]:
+        error_class = self.retry_policy.classify_response(response)
+
+        if error_class:
+            #The router already counted a 429/5xx against the breaker; a 4xx is the caller's fault and still proves the endpoint is up
+            if error_class == RpcErrorClass.PERMANENT:
+                self._report_outcome(response, error_class)
+
+            return None, error_class, f"HTTP {response.status_code}"
+
+        return self.json_codec.loads(response.content), None, None
+
+    #Returns the cache policy and key for a call along with the cached result (None on a miss)
+    def _get_cached_call(self, request_name: str, params: list, cache_policy: CachePolicy)->tuple[CachePolicy, str, Ok]:
+        policy = self.response_cache.get_policy(request_name, cache_policy)
+        cache_key = RpcResponseCache.get_key(request_name, params)
+        is_cached, cached_result = self.response_cache.get(cache_key, policy)
+
+        return policy, cache_key, Ok(cached_result, 0) if is_cached else None
+
+    #Returns the Ok result (None on failure), the error class and a description of the error
+    def _handle_call_response(self, request_name: str, response, call_start: float, policy: CachePolicy, cache_key: str)->tuple[Ok, RpcErrorClass, any]:
+        response_json, error_class, last_error = self._parse_response(response)
+
+        if response_json is not None:
+            parsed = parse(response_json)
+
+            if isinstance(parsed, Ok):
+                self._record_call(request_name, response, call_start, None)
+                self._report_outcome(response, None)
+                self.response_cache.put(cache_key, parsed.result, policy, request_name)
+                return parsed, None, None
+
+            error_class = self.retry_policy.classify_error(parsed)
+            last_error = parsed.message
+            self._report_outcome(response, error_class)
+
+        self._record_call(request_name, response, call_start, error_class)
+
+        return None, error_class, last_error
+
+    def _handle_call_error(self, method_name: str, response, call_start: float, error: Exception)->tuple[RpcErrorClass, Exception]:
+        self._record_call(method_name, response, call_start, RpcErrorClass.TRANSIENT)
+
+        return RpcErrorClass.TRANSIENT, error
+
+    def _record_circuit_open(self, method_name: str):
+        self.telemetry.record_call(method_name, None, 0, RpcTelemetry.circuit_open_error)
+
+    def _log_failure(self, request_name: str, error_class: RpcErrorClass, last_error):
+        if error_class and error_class != RpcErrorClass.PERMANENT:
+            print(f"{type(self).__name__}: Failure on request {request_name} ({error_class.name}). Check your RPC Node. Error: {last_error}.")
+
+    #Returns the results list with cached entries filled in as Ok, the cache policies and the cache keys
+    def _start_batch(self, rpc_requests: list[tuple[str, list]], cache_policy: CachePolicy)->tuple[list[Ok | Error], list[CachePolicy], list[str]]:
+        ret_results : list[Ok | Error] = [None]*len(rpc_requests)
+        policies = [self.response_cache.get_policy(request_name, cache_policy) for request_name, _ in rpc_requests]
+        cache_keys = [RpcResponseCache.get_key(request_name, params) if policy != CachePolicy.NONE else None
+                      for (request_name, params), policy in zip(rpc_requests, policies)]
+
+        for index in range(len(rpc_requests)): #Only send what isn't cached
+            is_cached, cached_result = self.response_cache.get(cache_keys[index], policies[index])
+
+            if is_cached:
+                ret_results[index] = Ok(cached_result, 0)
+
+        return ret_results, policies, cache_keys
+
+    #Unanswered calls and errors a retry can fix
+    def _get_pending_indexes(self, ret_results: list[Ok | Error], indexes)->list[int]:
+        return [index for index in indexes if not isinstance(ret_results[index], Ok) and
+                (ret_results[index] is None or self.retry_policy.should_retry(self.retry_policy.classify_error(ret_results[index])))]
+
+    #Returns the json requests, a map of json rpc id to index into rpc_requests and the telemetry name of the batch
+    @staticmethod
+    def _build_batch(rpc_requests: list[tuple[str, list]], batch_indexes: list[int])->tuple[list[dict], dict[int, int], str]:
+        json_requests = []
+        request_indexes : dict[int, int] = {}
+
+        for index in batch_indexes:
+            request_name, params = rpc_requests[index]
+            json_request = request(request_name, params=params)
+            request_indexes[json_request['id']] = index
+            json_requests.append(json_request)
+
+        return json_requests, request_indexes, RpcTelemetry.get_batch_method_name([rpc_requests[index] for index in batch_indexes])
+
+    #Fills ret_results from one batch response; returns whether the node answered, the error class to retry on and a description of the error
+    def _handle_batch_response(self, rpc_requests: list[tuple[str, list]], response, request_indexes: dict[int, int], ret_results: list[Ok | Error],
+                               policies: list[CachePolicy], cache_keys: list[str], batch_method_name: str, call_start: float)->tuple[bool, RpcErrorClass, any]:
+        response_json, error_class, last_error = self._parse_response(response)
+
+        if response_json is None:
+            self._record_call(batch_method_name, response, call_start, error_class)
+            return False, error_class, last_error
+
+        if isinstance(response_json, dict): #Whole batch was rejected
+            response_json = [response_json]
+
+        batch_error_class = None
+
+        for parsed in parse(response_json):
+            index = request_indexes.get(parsed.id)
+
+            if isinstance(parsed, Error):
+                item_error_class = self.retry_policy.classify_error(parsed)
+                last_error = parsed.message
+
+                if self.retry_policy.should_retry(item_error_class):
+                    batch_error_class = item_error_class
+
+            if index is not None:
+                ret_results[index] = parsed
+
+                if isinstance(parsed, Ok):
+                    self.response_cache.put(cache_keys[index], parsed.result, policies[index], rpc_requests[index][0])
+
+        self._report_outcome(response, batch_error_class)
+        self._record_call(batch_method_name, response, call_start, batch_error_class)
+
+        return True, batch_error_class, last_error
+
+    def _log_batch_failure(self, num_requests: int, error_class: RpcErrorClass, pending_indexes: list[int], last_error):
+        if error_class and len(pending_indexes) > 0:
+            print(f"{type(self).__name__}: Failure on batch request of {num_requests} calls ({error_class.name}). Check your RPC Node. Error: {last_error}.")
+
+    @staticmethod
+    def get_batch_results(batch_responses: list[Ok | Error])->list:
+        return [response.result if isinstance(response, Ok) else None for response in batch_responses]
@@ -0,0 +1,275 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.CircuitBreaker import CircuitBreaker, BreakerState
+from TxDefi.DataAccess.Blockchains.Solana.RpcRetryPolicy import RpcErrorClass
+
+class EndpointsUnavailableError(Exception):
+    pass
+
+class EndpointLatencyStats:
+    def __init__(self, endpoint_uri: str, window_size: int):
+        self.endpoint_uri = endpoint_uri
+        self.latencies = deque(maxlen=window_size) #seconds of the last successful calls
+        self.outcomes = deque(maxlen=window_size) #True for success
+        self.total_calls = 0
+        self.hedges_won = 0
+        self.sorted_latencies : list[float] = None #Cached until the next sample
+
+    def add_sample(self, latency: float, success: bool):
+        self.total_calls += 1
+        self.outcomes.append(success)
+
+        if success:
+            self.latencies.append(latency)
+            self.sorted_latencies = None
+
+    def get_percentile(self, percentile: float)->float:
+        if len(self.latencies) == 0:
+            return 0
+
+        if self.sorted_latencies is None:
+            self.sorted_latencies = sorted(self.latencies)
+
+        index = min(int(len(self.sorted_latencies)*percentile/100), len(self.sorted_latencies)-1)
+
+        return self.sorted_latencies[index]
+
+    def get_error_rate(self)->float:
+        if len(self.outcomes) == 0:
+            return 0
+
+        return self.outcomes.count(False)/len(self.outcomes)
+
+    #Lower is better; errors inflate the expected latency since a failed call has to be retried somewhere
+    def get_score(self)->float:
+        error_rate = min(self.get_error_rate(), .95)
+        expected_latency = .8*self.get_percentile(50) + .2*self.get_percentile(99)
+
+        return expected_latency/(1-error_rate)
+
+    def to_dict(self)->dict:
+        return {"endpoint": self.endpoint_uri, "p50_ms": self.get_percentile(50)*1000, "p99_ms": self.get_percentile(99)*1000,
+                "error_rate": self.get_error_rate(), "samples": len(self.outcomes), "total_calls": self.total_calls,
+                "hedges_won": self.hedges_won}
+
+#Sends each call to the endpoint with the best rolling latency/error score and hedges latency critical methods onto the runner-up
+class RpcEndpointRouter:
+    default_hedged_methods = ["getTransaction", "getAccountInfo", "sendTransaction"]
+    default_hedge_delay = .15 #seconds to wait on the primary before firing the duplicate
+    default_window_size = 200
+    min_samples = 5 #Endpoints with fewer samples are tried first so every endpoint gets scored
+    explore_interval = 100 #Every nth call goes to the least recently used endpoint to keep its stats fresh
+
+    def __init__(self, endpoint_uris: list[str], transport: HttpTransport, hedge_delay: float = default_hedge_delay,
+                 hedged_methods: list[str] = None, window_size: int = default_window_size, breaker_threshold: int = CircuitBreaker.default_failure_threshold,
+                 breaker_reset_timeout: float = CircuitBreaker.default_reset_timeout):
+        self.endpoint_uris = [uri for uri in dict.fromkeys(endpoint_uris) if uri] #Dedupe, keep order
+        self.transport = transport
+        self.hedge_delay = hedge_delay
+        self.hedged_methods = set(hedged_methods if hedged_methods is not None else self.default_hedged_methods)
+        self.endpoint_stats = {uri: EndpointLatencyStats(uri, window_size) for uri in self.endpoint_uris}
+        self.breakers = {uri: CircuitBreaker(HttpTransport.get_endpoint(uri), breaker_threshold, breaker_reset_timeout) for uri in self.endpoint_uris} #Named without the api key
+        self.last_used : dict[str, float] = {uri: 0 for uri in self.endpoint_uris}
+        self.num_calls = 0
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(transport.pool_size, 4)*2, thread_name_prefix=RpcEndpointRouter.__name__)
+
+    def is_hedged(self, method_name: str, ranked_endpoints: list[str])->bool:
+        return len(ranked_endpoints) > 1 and self.hedge_delay >= 0 and method_name in self.hedged_methods
+
+    #Returns endpoints with a closed (or probe ready) breaker ordered from best to worst
+    def get_ranked_endpoints(self)->list[str]:
+        available_uris = [uri for uri in self.endpoint_uris if self.breakers[uri].is_available()]
+
+        if len(available_uris) == 0:
+            raise EndpointsUnavailableError("Every rpc endpoint's circuit breaker is open")
+
+        with self.lock:
+            self.num_calls += 1
+
+            unscored = [uri for uri in available_uris if len(self.endpoint_stats[uri].outcomes) < self.min_samples]
+            ranked = sorted(available_uris, key=lambda uri: self.endpoint_stats[uri].get_score())
+
+            if len(unscored) > 0:
+                first = unscored[0]
+            elif len(ranked) > 1 and self.num_calls % self.explore_interval == 0:
+                first = min(ranked, key=lambda uri: self.last_used[uri])
+            else:
+                first = ranked[0]
+
+            self.last_used[first] = time.time()
+
+            return [first] + [uri for uri in ranked if uri != first]
+
+    def get_best_endpoint(self)->str:
+        return self.get_ranked_endpoints()[0]
+
+    def record(self, endpoint_uri: str, latency: float, success: bool):
+        stats = self.endpoint_stats.get(endpoint_uri)
+
+        if stats:
+            with self.lock:
+                stats.add_sample(latency, success)
+
+    #The rpc layer reports what the body said (None for success) since a 200 can still carry a node error; PERMANENT errors are the caller's fault
+    def record_outcome(self, endpoint_uri: str, error_class: RpcErrorClass):
+        breaker = self.breakers.get(endpoint_uri)
+
+        if breaker:
+            if error_class is None or error_class == RpcErrorClass.PERMANENT:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+                with self.lock:
+                    self.endpoint_stats[endpoint_uri].outcomes.append(False)
+
+    def get_breaker_states(self)->dict[str, BreakerState]:
+        return {uri: breaker.get_state() for uri, breaker in self.breakers.items()}
+
+    #True while every endpoint's breaker is open; a probing endpoint counts as recovering so callers stop shedding optional work
+    def is_degraded(self)->bool:
+        return all(breaker.is_open() for breaker in self.breakers.values())
+
+    def _claim_endpoint(self, endpoint_uri: str):
+        if not self.breakers[endpoint_uri].allow_request():
+            raise EndpointsUnavailableError(f"Circuit breaker for {endpoint_uri} is open")
+
+    def _record_transport_result(self, endpoint_uri: str, response, latency: float):
+        is_success = self.is_success(response)
+        self.record(endpoint_uri, latency, is_success)
+
+        if not is_success:
+            self.breakers[endpoint_uri].record_failure()
+
+    def _record_hedge_win(self, endpoint_uri: str):
+        with self.lock:
+            self.endpoint_stats[endpoint_uri].hedges_won += 1
+
+    @staticmethod
+    def is_success(response)->bool:
+        return response is not None and response.status_code < 500 and response.status_code != 429
+
+    def _timed_post(self, endpoint_uri: str, json_body: dict | list):
+        self._claim_endpoint(endpoint_uri)
+        start = time.perf_counter()
+        response = None
+
+        try:
+            response = self.transport.post(endpoint_uri, json_body)
+            return response
+        finally:
+            self._record_transport_result(endpoint_uri, response, time.perf_counter()-start)
+
+    #Blocking post; hedged methods race the two best endpoints and the first good response wins
+    def post(self, json_body: dict | list, method_name: str = None):
+        ranked_endpoints = self.get_ranked_endpoints()
+
+        if not self.is_hedged(method_name, ranked_endpoints):
+            return self._timed_post(ranked_endpoints[0], json_body)
+
+        primary = self.executor.submit(self._timed_post, ranked_endpoints[0], json_body)
+        futures = {primary: ranked_endpoints[0]}
+        done, _ = concurrent.futures.wait(futures, timeout=self.hedge_delay)
+
+        if len(done) > 0 and not primary.exception() and self.is_success(primary.result()):
+            return primary.result()
+
+        #The primary is slow or already failed; either way the runner-up goes out now
+        futures[self.executor.submit(self._timed_post, ranked_endpoints[1], json_body)] = ranked_endpoints[1]
+
+        return self._first_good_result(futures)
+
+    def _first_good_result(self, futures: dict[concurrent.futures.Future, str]):
+        pending = set(futures.keys())
+        last_error = None
+        response = None
+
+        while len(pending) > 0:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception():
+                    last_error = future.exception()
+                    continue
+
+                response = future.result()
+
+                if self.is_success(response):
+                    if len(futures) > 1 and future is not next(iter(futures)):
+                        self._record_hedge_win(futures[future])
+
+                    return response
+
+        if response is not None:
+            return response
+
+        raise last_error
+
+    async def _timed_post_async(self, client, endpoint_uri: str, json_body: dict | list):
+        self._claim_endpoint(endpoint_uri)
+        start = time.perf_counter()
+        response = None
+
+        try:
+            response = await self.transport.post_async(client, endpoint_uri, json_body)
+            return response
+        finally:
+            self._record_transport_result(endpoint_uri, response, time.perf_counter()-start)
+
+    #Coroutine version of post() for an httpx.AsyncClient; the losing request is cancelled
+    async def post_async(self, client, json_body: dict | list, method_name: str = None):
+        ranked_endpoints = self.get_ranked_endpoints()
+
+        if not self.is_hedged(method_name, ranked_endpoints):
+            return await self._timed_post_async(client, ranked_endpoints[0], json_body)
+
+        primary = asyncio.ensure_future(self._timed_post_async(client, ranked_endpoints[0], json_body))
+        tasks = {primary: ranked_endpoints[0]}
+        done, _ = await asyncio.wait(tasks.keys(), timeout=self.hedge_delay)
+
+        if len(done) > 0 and not primary.exception() and self.is_success(primary.result()):
+            return primary.result()
+
+        #The primary is slow or already failed; either way the runner-up goes out now
+        tasks[asyncio.ensure_future(self._timed_post_async(client, ranked_endpoints[1], json_body))] = ranked_endpoints[1]
+
+        pending = set(tasks.keys())
+        last_error = None
+        response = None
+
+        try:
+            while len(pending) > 0:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception():
+                        last_error = task.exception()
+                        continue
+
+                    response = task.result()
+
+                    if self.is_success(response):
+                        if task is not primary:
+                            self._record_hedge_win(tasks[task])
+
+                        return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if response is not None:
+            return response
+
+        raise last_error
+
+    def get_stats(self)->dict[str, dict]:
+        with self.lock:
+            return {uri: dict(stats.to_dict(), breaker=self.breakers[uri].to_dict()) for uri, stats in self.endpoint_stats.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from TxDefi.Utilities.JsonCodec import default_codec
+
+class CachePolicy(Enum):
+    NONE = 0 #Always go to the node
+    IMMUTABLE = 1 #Never changes once it exists (e.g. a confirmed transaction, a mint's decimals and program); kept until evicted
+    TTL = 2 #Changes rarely (metadata, owners); kept for a fixed time
+    SLOT = 3 #Changes every slot (balances, supply, vaults); only served while no newer slot has been seen
+
+class CacheEntry:
+    def __init__(self, result: bytes, policy: CachePolicy, slot: int, expires_at: float):
+        self.result = result #Serialized so every hit hands back its own copy
+        self.policy = policy
+        self.slot = slot
+        self.expires_at = expires_at
+
+#Bounded LRU cache of rpc results keyed by method+params
+class RpcResponseCache:
+    default_max_entries = 10000
+    default_ttl = 120 #seconds
+    slot_duration = .4 #SLOT entries never outlive a slot even if slot updates stop arriving
+    default_method_policies = {
+        "getTransaction": CachePolicy.IMMUTABLE,
+        "getBlock": CachePolicy.IMMUTABLE,
+        "getTokenSupply": CachePolicy.SLOT,
+        "getAsset": CachePolicy.TTL,
+        "getAccountInfo": CachePolicy.SLOT,
+        "getMultipleAccounts": CachePolicy.SLOT,
+        "getBalance": CachePolicy.SLOT,
+        "getTokenAccountBalance": CachePolicy.SLOT,
+        "getTokenLargestAccounts": CachePolicy.SLOT,
+        "getTokenAccountsByOwner": CachePolicy.SLOT,
+    }
+    default_method_ttls : dict[str, float] = {}
+
+    def __init__(self, max_entries: int = default_max_entries, ttl: float = default_ttl, method_policies: dict[str, CachePolicy] = None,
+                 method_ttls: dict[str, float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.method_policies = dict(self.default_method_policies, **(method_policies or {}))
+        self.method_ttls = dict(self.default_method_ttls, **(method_ttls or {}))
+        self.entries : OrderedDict[str, CacheEntry] = OrderedDict() #Oldest first
+        self.current_slot = 0
+        self.lock = threading.Lock()
+        self.hits = {policy.name: 0 for policy in CachePolicy}
+        self.misses = {policy.name: 0 for policy in CachePolicy}
+        self.evictions = 0
+
+    def get_policy(self, method_name: str, policy_override: CachePolicy = None)->CachePolicy:
+        if policy_override is not None:
+            return policy_override
+
+        return self.method_policies.get(method_name, CachePolicy.NONE)
+
+    @staticmethod
+    def get_key(method_name: str, params: list)->str:
+        return method_name + default_codec.dumps(params, sort_keys=True)
+
+    #Feed slots seen anywhere (rpc contexts, notifications) so SLOT entries go stale as soon as the chain moves
+    def update_slot(self, slot: int):
+        if slot and slot > self.current_slot:
+            self.current_slot = slot
+
+    @staticmethod
+    def get_context_slot(result)->int:
+        if isinstance(result, dict) and isinstance(result.get('context'), dict):
+            return result['context'].get('slot', 0)
+
+        return 0
+
+    def _is_valid(self, entry: CacheEntry, now: float)->bool:
+        if entry.expires_at and now > entry.expires_at:
+            return False
+
+        return entry.policy != CachePolicy.SLOT or entry.slot >= self.current_slot
+
+    #Returns (True, result) on a hit; the result is a fresh copy the caller is free to mutate
+    def get(self, key: str, policy: CachePolicy)->tuple[bool, any]:
+        if policy == CachePolicy.NONE:
+            return False, None
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if not entry or not self._is_valid(entry, time.monotonic()):
+                if entry:
+                    self.entries.pop(key)
+
+                self.misses[policy.name] += 1
+
+                return False, None
+
+            self.entries.move_to_end(key)
+            self.hits[policy.name] += 1
+
+        return True, default_codec.loads(entry.result) #Off the lock
+
+    def put(self, key: str, result, policy: CachePolicy, method_name: str = None):
+        if policy == CachePolicy.NONE or result is None: #None usually means "not there yet" (e.g. an unconfirmed transaction)
+            return
+
+        now = time.monotonic()
+        slot = self.get_context_slot(result)
+        self.update_slot(slot)
+
+        if policy == CachePolicy.TTL:
+            expires_at = now + self.method_ttls.get(method_name, self.ttl)
+        elif policy == CachePolicy.SLOT:
+            expires_at = now + self.slot_duration
+            slot = slot if slot else self.current_slot
+        else:
+            expires_at = None
+
+        serialized = default_codec.dumps_bytes(result)
+
+        with self.lock:
+            self.entries[key] = CacheEntry(serialized, policy, slot, expires_at)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self)->dict:
+        with self.lock:
+            total_hits = sum(self.hits.values())
+            total_lookups = total_hits + sum(self.misses.values())
+
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "current_slot": self.current_slot, "hits": dict(self.hits),
+                    "misses": dict(self.misses), "hit_rate": total_hits/total_lookups if total_lookups > 0 else 0, "evictions": self.evictions}
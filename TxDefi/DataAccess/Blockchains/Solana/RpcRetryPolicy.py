@@ -0,0 +1,89 @@
+import random
+from enum import Enum
+from jsonrpcclient import Error
+
+class RpcErrorClass(Enum):
+    RATE_LIMITED = 0 #Back off hard; retrying right away just burns credits
+    TRANSIENT = 1 #Timeouts, 5xx, internal errors; retry with backoff
+    PERMANENT = 2 #Bad params, missing data, failed preflight; retrying can't help
+    NODE_BEHIND = 3 #Node hasn't caught up to the requested slot; another endpoint (or a moment) usually fixes it
+
+#Classifies rpc failures and decides whether and how long to wait before the next try
+class RpcRetryPolicy:
+    default_base_delay = .1 #seconds
+    default_max_delay = 2
+    rate_limited_base_delay = .5
+    node_error_classes = { #Solana JSON-RPC server error codes
+        -32001: RpcErrorClass.PERMANENT, #Block cleaned up
+        -32002: RpcErrorClass.PERMANENT, #Preflight failure
+        -32003: RpcErrorClass.PERMANENT, #Signature verification failure
+        -32004: RpcErrorClass.NODE_BEHIND, #Block not available
+        -32005: RpcErrorClass.NODE_BEHIND, #Node unhealthy/behind
+        -32006: RpcErrorClass.PERMANENT, #Precompile verification failure
+        -32007: RpcErrorClass.PERMANENT, #Slot skipped
+        -32008: RpcErrorClass.TRANSIENT, #No snapshot
+        -32009: RpcErrorClass.PERMANENT, #Long term storage slot skipped
+        -32010: RpcErrorClass.PERMANENT, #Key excluded from secondary index
+        -32011: RpcErrorClass.PERMANENT, #Transaction history not available
+        -32013: RpcErrorClass.PERMANENT, #Signature length mismatch
+        -32014: RpcErrorClass.NODE_BEHIND, #Block status not available yet
+        -32015: RpcErrorClass.PERMANENT, #Unsupported transaction version
+        -32016: RpcErrorClass.NODE_BEHIND, #Min context slot not reached
+        -32429: RpcErrorClass.RATE_LIMITED,
+        429: RpcErrorClass.RATE_LIMITED,
+        -32600: RpcErrorClass.PERMANENT, #Invalid request
+        -32601: RpcErrorClass.PERMANENT, #Method not found
+        -32602: RpcErrorClass.PERMANENT, #Invalid params
+        -32603: RpcErrorClass.TRANSIENT, #Internal error
+    }
+    rate_limited_messages = ("rate limit", "too many requests")
+
+    def __init__(self, base_delay: float = default_base_delay, max_delay: float = default_max_delay):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    #None when the HTTP layer succeeded and the body needs to be parsed
+    @staticmethod
+    def classify_response(response)->RpcErrorClass:
+        if response.status_code == 429:
+            return RpcErrorClass.RATE_LIMITED
+        elif response.status_code >= 500:
+            return RpcErrorClass.TRANSIENT
+        elif response.status_code >= 400:
+            return RpcErrorClass.PERMANENT
+
+    @staticmethod
+    def classify_error(error: Error)->RpcErrorClass:
+        message = str(error.message).lower()
+
+        if any(rate_limited_message in message for rate_limited_message in RpcRetryPolicy.rate_limited_messages):
+            return RpcErrorClass.RATE_LIMITED
+
+        return RpcRetryPolicy.node_error_classes.get(error.code, RpcErrorClass.TRANSIENT)
+
+    @staticmethod
+    def should_retry(error_class: RpcErrorClass)->bool:
+        return error_class != RpcErrorClass.PERMANENT
+
+    #Exponential backoff with full jitter so callers that failed together don't retry together
+    def get_delay(self, attempt: int, error_class: RpcErrorClass, retry_after: float = None)->float:
+        if error_class == RpcErrorClass.RATE_LIMITED:
+            if retry_after:
+                return min(retry_after, self.max_delay)
+
+            base_delay = self.rate_limited_base_delay
+        elif error_class == RpcErrorClass.NODE_BEHIND:
+            base_delay = self.base_delay/2 #The router moves the next try to a healthier endpoint
+        else:
+            base_delay = self.base_delay
+
+        return random.uniform(0, min(self.max_delay, base_delay*2**attempt))
+
+    @staticmethod
+    def get_retry_after(response)->float:
+        try:
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+
+            return float(retry_after) if retry_after else None
+        except ValueError:
+            return None
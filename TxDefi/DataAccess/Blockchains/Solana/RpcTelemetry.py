@@ -0,0 +1,131 @@
+import threading
+import time
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.LatencyHistogram import LatencyHistogram
+
+class RpcCallStats:
+    def __init__(self):
+        self.count = 0
+        self.errors : dict[str, int] = {} #key=error class name
+        self.latency = LatencyHistogram() #microseconds
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def to_dict(self)->dict:
+        return {"count": self.count, "errors": dict(self.errors), "latency_ms": self.latency.to_dict(.001), "bytes_out": self.bytes_out,
+                "bytes_in": self.bytes_in}
+
+#Per method and endpoint accounting of rpc calls: counts, errors by class, latency histograms, payload sizes and rate limiter waits
+class RpcTelemetry(threading.Thread):
+    default_log_interval = 60 #seconds; 0 disables the log line
+    unknown_endpoint = "unknown"
+    circuit_open_error = "CIRCUIT_OPEN" #Every endpoint's breaker refused the call
+    top_methods_logged = 5
+
+    def __init__(self, log_interval: float = default_log_interval):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = RpcTelemetry.__name__
+        self.log_interval = log_interval
+        self.call_stats : dict[tuple[str, str], RpcCallStats] = {} #key=(method, endpoint)
+        self.rate_waits : dict[str, LatencyHistogram] = {} #key=method; microseconds
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.cancel_token = threading.Event()
+
+    #Only scheme://host is kept; rpc uris usually carry an api key
+    @staticmethod
+    def get_endpoint_label(endpoint_uri: str)->str:
+        return HttpTransport.get_endpoint(endpoint_uri) if endpoint_uri else RpcTelemetry.unknown_endpoint
+
+    #response is the raw HTTP response (or None if the call never got one)
+    def record_call(self, method_name: str, response, latency: float, error_class_name: str = None):
+        endpoint = self.get_endpoint_label(getattr(response, 'endpoint_uri', None))
+        bytes_in = len(response.content) if response is not None else 0
+        bytes_out = getattr(response, 'bytes_out', 0)
+
+        with self.lock:
+            stats = self.call_stats.get((method_name, endpoint))
+
+            if not stats:
+                stats = RpcCallStats()
+                self.call_stats[(method_name, endpoint)] = stats
+
+            stats.count += 1
+            stats.latency.record(latency*1e6)
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+
+            if error_class_name:
+                stats.errors[error_class_name] = stats.errors.get(error_class_name, 0) + 1
+
+    def record_rate_wait(self, method_name: str, wait_time: float):
+        with self.lock:
+            histogram = self.rate_waits.get(method_name)
+
+            if not histogram:
+                histogram = LatencyHistogram()
+                self.rate_waits[method_name] = histogram
+
+            histogram.record(wait_time*1e6)
+
+    @staticmethod
+    def get_batch_method_name(rpc_requests: list[tuple[str, list]])->str:
+        method_names = {request_name for request_name, _ in rpc_requests}
+
+        return "batch:" + (method_names.pop() if len(method_names) == 1 else "mixed")
+
+    #{method: {"endpoints": {endpoint: stats}, "rate_wait_ms": histogram}}
+    def get_snapshot(self)->dict[str, dict]:
+        ret_snapshot = {}
+
+        with self.lock:
+            for (method_name, endpoint), stats in self.call_stats.items():
+                method_snapshot = ret_snapshot.setdefault(method_name, {"endpoints": {}})
+                method_snapshot["endpoints"][endpoint] = stats.to_dict()
+
+            for method_name, histogram in self.rate_waits.items():
+                method_snapshot = ret_snapshot.setdefault(method_name, {"endpoints": {}})
+                method_snapshot["rate_wait_ms"] = histogram.to_dict(.001)
+
+        return ret_snapshot
+
+    def get_summary_line(self)->str:
+        with self.lock:
+            method_totals : dict[str, RpcCallStats] = {}
+
+            for (method_name, _), stats in self.call_stats.items():
+                totals = method_totals.setdefault(method_name, RpcCallStats())
+                totals.count += stats.count
+                totals.latency.merge(stats.latency)
+                totals.bytes_in += stats.bytes_in
+                totals.bytes_out += stats.bytes_out
+
+                for error_class_name, count in stats.errors.items():
+                    totals.errors[error_class_name] = totals.errors.get(error_class_name, 0) + count
+
+            total_calls = sum(totals.count for totals in method_totals.values())
+            top_methods = sorted(method_totals.items(), key=lambda item: item[1].latency.total_value, reverse=True)[:self.top_methods_logged]
+            method_parts = []
+
+            for method_name, totals in top_methods: #Ordered by total time spent
+                rate_wait = self.rate_waits.get(method_name)
+                rate_wait_seconds = rate_wait.total_value/1e6 if rate_wait else 0
+                method_parts.append(f"{method_name} n={totals.count} p50={totals.latency.get_percentile(50)/1000:.0f}ms "
+                                    f"p99={totals.latency.get_percentile(99)/1000:.0f}ms err={sum(totals.errors.values())} "
+                                    f"wait={rate_wait_seconds:.1f}s in={totals.bytes_in/1e6:.2f}MB")
+
+        return f"RpcTelemetry: {total_calls} calls in {time.time()-self.started_at:.0f}s | " + " | ".join(method_parts)
+
+    def reset(self):
+        with self.lock:
+            self.call_stats.clear()
+            self.rate_waits.clear()
+            self.started_at = time.time()
+
+    def run(self):
+        while self.log_interval > 0 and not self.cancel_token.wait(self.log_interval):
+            if len(self.call_stats) > 0:
+                print(self.get_summary_line())
+
+    def stop(self):
+        self.cancel_token.set()
@@ -1,9 +1,8 @@
-import requests
 import base58
+import base64
 import time
-from jsonrpcclient import request, parse, Ok, Error
-from solana.rpc.api import Client
-from solana.rpc.types import TxOpts
+from typing import Callable
+from jsonrpcclient import request, Ok, Error
 from solana.rpc.commitment import Confirmed, Processed, Finalized
 from solders.pubkey import Pubkey
 from solders.hash import Hash
@@ -11,60 +10,210 @@ from solders.instruction import Instruction, AccountMeta
 from solders.transaction import VersionedTransaction
 from solders.system_program import TransferParams, transfer
 from solana.rpc.async_api import AsyncClient
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
 from TxDefi.Data.Amount import Amount
 from TxDefi.Data.MarketDTOs import TokenInfo
 from TxDefi.Data.TransactionInfo import SwapTransactionInfo, AccountInfo
-from TxDefi.Utilities.RateLimiter import RateLimiter
+from TxDefi.Utilities.RateLimiter import RateLimiter, RatePriority
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.SingleFlight import SingleFlight
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import SplTokenAccount, SplMint, spl_account_decoder
+from TxDefi.DataAccess.Blockchains.Solana.RpcEndpointRouter import RpcEndpointRouter, EndpointsUnavailableError
+from TxDefi.DataAccess.Blockchains.Solana.RpcApiBase import RpcApiBase
+from TxDefi.DataAccess.Blockchains.Solana.RpcRetryPolicy import RpcRetryPolicy
+from TxDefi.DataAccess.Blockchains.Solana.RpcTelemetry import RpcTelemetry
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import RpcResponseCache, CachePolicy
+from TxDefi.DataAccess.Blockchains.Solana.BlockhashPrefetcher import BlockhashPrefetcher, BlockhashInfo
+from TxDefi.DataAccess.Blockchains.Solana.PriorityFeeEstimator import PriorityFeeEstimator
+from TxDefi.DataAccess.Blockchains.Solana.PdaCache import pda_cache
 import SolanaUtilities as solana_utilites
 
-class SolanaRpcApi(RateLimiter):
-    retry = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["POST"]
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-
-    def __init__(self, rpc_uri: str, wss_uri: str, rate_limit: int, rpc_backup_uri: str = None):
-        RateLimiter.__init__(self, rate_limit)
+class SolanaRpcApi(RpcApiBase):
+    max_multiple_accounts = 100 #getMultipleAccounts limit per call
+    json_parsed_encoding = "jsonParsed"
+    base64_encoding = "base64" #Several times smaller; SPL accounts are decoded locally with SplAccountDecoder
+    base64_zstd_encoding = "base64+zstd" #Smaller again for mostly zero account data; needs zstandard installed
+
+    def __init__(self, rpc_uri: str, wss_uri: str, rate_limit: int, rpc_backup_uri: str = None, transport: HttpTransport = None,
+                 router: RpcEndpointRouter = None, rate_limiter: RateLimiter = None, response_cache: RpcResponseCache = None,
+                 account_encoding: str = json_parsed_encoding, retry_policy: RpcRetryPolicy = None,
+                 telemetry: RpcTelemetry = None):
+        self.rate_limiter = rate_limiter if rate_limiter else RateLimiter(rate_limit) #Shared with every component that spends rpc credits
         self.rpc_uri = rpc_uri
         self.rpc_backup_uri = rpc_backup_uri #Needed for getAsset (Quicknode and Helius provides this)
         self.wss_uri = wss_uri
         self.async_client = AsyncClient(self.rpc_uri)
-        self.client = Client(self.rpc_uri)   
-        self.last_block_hash = None           
-        self.session = requests.Session()
-        self.session.mount(self.rpc_uri, self.adapter)
-
-    def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False):
-        try:            
-            for i in range(max_tries):
-                if self.acquire_sem():
-                    #print("Request: " + request_name)
-                    json_request = request(request_name, params=params)
-
-                    if use_backup and self.rpc_backup_uri:
-                        response = requests.post(self.rpc_backup_uri, json=json_request)
-                    else:
-                        response = requests.post(self.rpc_uri, json=json_request)
+        self.transport = transport if transport else HttpTransport(max(rate_limit, HttpTransport.default_pool_size)) #Keep-alive pools for every rpc endpoint
+        self.router = router if router else RpcEndpointRouter([rpc_uri], self.transport) #Picks the fastest healthy endpoint for each call
+        self.json_codec = self.transport.json_codec
+        self.response_cache = response_cache if response_cache else RpcResponseCache()
+        self.single_flight = SingleFlight() #Identical concurrent calls share one request
+        self.retry_policy = retry_policy if retry_policy else RpcRetryPolicy()
+        self.telemetry = telemetry if telemetry else RpcTelemetry()
+        self.account_encoding = account_encoding #Used for token account lookups and account subscriptions
+        self.mint_decimals : dict[str, int] = {} #Decimals never change once a mint exists
+        self.blockhash_prefetcher = BlockhashPrefetcher(self)
+        self.priority_fee_estimator = PriorityFeeEstimator(self) #Samples whichever accounts are added to it
+
+    def start(self):
+        self.rate_limiter.start()
+        self.blockhash_prefetcher.start()
+        self.priority_fee_estimator.start()
+        self.telemetry.start()
+
+    def stop(self):
+        self.blockhash_prefetcher.stop()
+        self.priority_fee_estimator.stop()
+        self.telemetry.stop()
+        self.rate_limiter.stop()
+
+    def get_transport_stats(self)->dict[str, dict]:
+        return self.transport.get_stats()
+
+    def get_endpoint_stats(self)->dict[str, dict]:
+        return self.router.get_stats()
+
+    #Circuit breaker state per endpoint
+    def get_breaker_states(self)->dict[str, str]:
+        return {uri: state.name for uri, state in self.router.get_breaker_states().items()}
+
+    #True while every endpoint's breaker is open (not probing); non-critical work should wait
+    def is_degraded(self)->bool:
+        return self.router.is_degraded()
+
+    #Per method and endpoint counts, error classes, latency percentiles, payload sizes and rate limiter waits
+    def get_telemetry_snapshot(self)->dict[str, dict]:
+        return self.telemetry.get_snapshot()
+
+    def get_cache_stats(self)->dict:
+        return self.response_cache.get_stats()
+
+    def get_single_flight_stats(self)->dict:
+        return self.single_flight.get_stats()
+
+    def get_blockhash_stats(self)->dict:
+        return self.blockhash_prefetcher.get_stats()
+
+    def get_priority_fee_stats(self)->dict[str, dict]:
+        return self.priority_fee_estimator.get_stats()
+
+    def get_pda_cache_stats(self)->dict:
+        return pda_cache.get_stats()
+
+    #The backup uri serves provider specific methods (e.g. getAsset) so it bypasses the router
+    def _post(self, json_body: dict | list, request_name: str, use_backup: bool):
+        if use_backup and self.rpc_backup_uri:
+            return self.transport.post(self.rpc_backup_uri, json_body)
+        else:
+            return self.router.post(json_body, request_name)
 
-                    parsed = parse(response.json())
+    def run_rpc_method(self, request_name: str, params: list, max_tries = 1, use_backup = False, priority: RatePriority = None,
+                       cache_policy: CachePolicy = None):
+        if request_name in self.uncoalesced_methods:
+            return self._run_rpc_method(request_name, params, max_tries, use_backup, priority, CachePolicy.NONE, None)
 
-                    if isinstance(parsed, Error):
-                        pass
-                    else:
-                        return parsed
-        
-                    time.sleep(.2) #Limit to 5 calls per second
-        except Exception as e:
-            print(f"SolanaRpcApi: Failure on request {request_name}. Check your RPC Node. Error: {e}.")
+        policy, cache_key, cached_response = self._get_cached_call(request_name, params, cache_policy)
+
+        if cached_response:
+            return cached_response
+
+        #A TRADE call never waits behind a BACKGROUND leader, nor a multi-try call behind a single try
+        return self.single_flight.do((cache_key, use_backup, priority, max_tries), self._run_rpc_method, request_name, params, max_tries, use_backup, priority, policy, cache_key)
+
+    def _run_rpc_method(self, request_name: str, params: list, max_tries: int, use_backup: bool, priority: RatePriority, policy: CachePolicy, cache_key: str):
+        error_class = None
+        last_error = None
+        retry_after = None
+
+        for attempt in range(max_tries):
+            if attempt > 0:
+                time.sleep(self.retry_policy.get_delay(attempt-1, error_class, retry_after))
+
+            wait_start = time.perf_counter()
+
+            if not self.rate_limiter.acquire_method(request_name, priority):
+                continue
+
+            self.telemetry.record_rate_wait(request_name, time.perf_counter()-wait_start)
+            response = None
+            call_start = time.perf_counter()
+
+            try:
+                #print("Request: " + request_name)
+                response = self._post(request(request_name, params=params), request_name, use_backup)
+                retry_after = self.retry_policy.get_retry_after(response)
+                parsed, error_class, last_error = self._handle_call_response(request_name, response, call_start, policy, cache_key)
+
+                if parsed:
+                    return parsed
+            except EndpointsUnavailableError:
+                self._record_circuit_open(request_name)
+                return #Fail fast; the breaker already reported the outage
+            except Exception as e:
+                error_class, last_error = self._handle_call_error(request_name, response, call_start, e)
+
+            if not self.retry_policy.should_retry(error_class):
+                break
+
+        self._log_failure(request_name, error_class, last_error)
+
+    #Send a list of (method, params) pairs as JSON-RPC batches; results come back in request order as Ok or Error (None if never answered)
+    def run_rpc_batch(self, rpc_requests: list[tuple[str, list]], max_tries = 1, use_backup = False, priority: RatePriority = None,
+                      cache_policy: CachePolicy = None)->list[Ok | Error]:
+        ret_results, policies, cache_keys = self._start_batch(rpc_requests, cache_policy)
+        pending_indexes = self._get_pending_indexes(ret_results, range(len(rpc_requests)))
+        error_class = None
+        last_error = None
+
+        for attempt in range(max_tries):
+            if len(pending_indexes) == 0:
+                break
+
+            if attempt > 0:
+                time.sleep(self.retry_policy.get_delay(attempt-1, error_class))
+
+            error_class = None
+            batch_method_name = RpcTelemetry.get_batch_method_name(rpc_requests)
+            response = None
+            call_start = time.perf_counter()
+
+            try:
+                for start in range(0, len(pending_indexes), self.max_batch_size):
+                    batch_indexes = pending_indexes[start:start+self.max_batch_size]
+
+                    for index in batch_indexes:
+                        request_name = rpc_requests[index][0]
+                        wait_start = time.perf_counter()
+                        self.rate_limiter.acquire_method(request_name, priority) #Providers bill each item in a batch as a separate call
+                        self.telemetry.record_rate_wait(request_name, time.perf_counter()-wait_start)
+
+                    json_requests, request_indexes, batch_method_name = self._build_batch(rpc_requests, batch_indexes)
+                    response = None
+                    call_start = time.perf_counter()
+                    response = self._post(json_requests, None, use_backup) #Batches aren't hedged
+                    is_answered, error_class, last_error = self._handle_batch_response(rpc_requests, response, request_indexes, ret_results, policies,
+                                                                                       cache_keys, batch_method_name, call_start)
+
+                    if not is_answered:
+                        break
+            except EndpointsUnavailableError:
+                self._record_circuit_open(batch_method_name)
+                break
+            except Exception as e:
+                error_class, last_error = self._handle_call_error(batch_method_name, response, call_start, e)
+
+            pending_indexes = self._get_pending_indexes(ret_results, pending_indexes)
+
+        self._log_batch_failure(len(rpc_requests), error_class, pending_indexes, last_error)
+
+        return ret_results
+
+    #Returns the result of each batched call or None where that call failed
+    def run_rpc_batch_results(self, rpc_requests: list[tuple[str, list]], max_tries = 1, use_backup = False, priority: RatePriority = None,
+                              cache_policy: CachePolicy = None)->list:
+        return self.get_batch_results(self.run_rpc_batch(rpc_requests, max_tries, use_backup, priority, cache_policy))
 
     def get_transaction(self, tx_signature: str, max_tries = 1)->dict[str, any]:
-        response = self.run_rpc_method("getTransaction", [tx_signature,
-                                        {'encoding': 'jsonParsed', 'commitment': 'confirmed', 'maxSupportedTransactionVersion':0 }], max_tries)
+        response = self.run_rpc_method("getTransaction", self.get_transaction_params(tx_signature), max_tries)
         
         if response:
             return response.result
@@ -89,9 +238,10 @@ class SolanaRpcApi(RateLimiter):
         else:
             return None
 
-    def get_signatures_for_address(self, contract_address: str, min_slot: int, limit = 1):
+    #Newest first; page backwards through history by passing the last signature of the previous page as before
+    def get_signatures_for_address(self, contract_address: str, min_slot: int, limit = 1, before: str = None, until: str = None, max_tries = 1):
         response = self.run_rpc_method("getSignaturesForAddress", [contract_address,
-                                                                   {'commitment': 'confirmed', 'minContextSlot': min_slot, 'limit': limit}])
+                                                                   self.get_signatures_config(min_slot, limit, before, until)], max_tries)
                                                                     
         if response:
             return response.result
@@ -99,16 +249,18 @@ class SolanaRpcApi(RateLimiter):
             return None
         
     def get_token_account_balance(self, associated_token_address: str, max_tries=1)->Amount:
-        response = self.run_rpc_method("getTokenAccountBalance", [ associated_token_address ], max_tries),
+        response = self.run_rpc_method("getTokenAccountBalance", [ associated_token_address ], max_tries)
         
-        if response and len(response) > 0 and response[0]: #make sure it's not none
-            ui_amount = response[0].result['value']['uiAmount']
-            decimals = response[0].result['value']['decimals']
-            
-            return Amount.tokens_ui(ui_amount, decimals)
+        if response: #make sure it's not none
+            return self.parse_token_amount(response.result)
         else:
             return None
         
+    def get_token_account_balances(self, associated_token_addresses: list[str], max_tries=1)->list[Amount]:
+        accounts = self.get_multiple_accounts(associated_token_addresses, max_tries=max_tries)
+
+        return [self.parse_token_account_amount(accounts.get(address)) for address in associated_token_addresses]
+
     def get_token_account_balance2(self, contract_address: str, owner_address: str, token_program_address: str, max_tries=1)->Amount:
         token_account_address = self.get_associated_token_account_address(owner_address, contract_address, token_program_address)
         token_balance = self.get_token_account_balance(token_account_address, max_tries)
@@ -127,43 +279,75 @@ class SolanaRpcApi(RateLimiter):
     #Get largest holders of a token; returns (token account address, token balance)
     def get_token_largest_accounts(self, mint_address: str, limit = 20)->list[AccountInfo]:
         response = self.run_rpc_method("getTokenLargestAccounts", [mint_address])
-        holders = []
               
         if response:          
-            count = 0
-            token_accounts = response.result['value']
-            for count in range(min(limit, len(token_accounts))):
-                address = str(token_accounts[count]['address'])
-                balance = token_accounts[count]['amount']
-                decimals = token_accounts[count]['decimals']
-                holders.append(AccountInfo(address, Amount.tokens_scaled(int(balance), decimals)))
+            return self.parse_token_largest_accounts(response.result, limit)
 
-        return holders
+        return []
 
     def get_token_accounts_by_owner(self, wallet_address: str)->list[AccountInfo]:
-        response = self.run_rpc_method("getTokenAccountsByOwner", [wallet_address, {'programId': 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'},
-                                                                     {'encoding': 'jsonParsed'}])
-        ret_accounts = []
+        response = self._get_token_accounts_by_owner(wallet_address, self.account_encoding)
               
-        if response:          
-            token_accounts = response.result['value']
+        if response:
+            if self.account_encoding == self.base64_encoding:
+                ret_accounts = []
+                unresolved_addresses = set()
+                token_accounts = self.parse_spl_token_accounts_by_owner(response.result)
+                mint_decimals = self.get_mint_decimals([token_account.mint for _, token_account in token_accounts], 3)
+
+                for address, token_account in token_accounts:
+                    if token_account.mint in mint_decimals:
+                        ret_accounts.append(AccountInfo(address, token_account.get_amount(mint_decimals[token_account.mint]), token_account.mint, token_account))
+                    else:
+                        unresolved_addresses.add(address)
 
-            for account in token_accounts:
-                token_address = str(account['pubkey'])
-                mint_Address = account['account']['data']['parsed']['info']['mint']
-                balance = account['account']['data']['parsed']['info']['tokenAmount']['uiAmount']
-                decimals = account['account']['data']['parsed']['info']['tokenAmount']['decimals']
-          
-                ret_accounts.append(AccountInfo(token_address, Amount.tokens_ui(balance, decimals), mint_Address))
+                if len(unresolved_addresses) > 0: #The parsed encoding carries decimals with every account so a failed mint lookup doesn't hide holdings
+                    ret_accounts.extend(self._get_parsed_token_accounts_by_owner(wallet_address, unresolved_addresses))
 
-        return ret_accounts
+                return ret_accounts
+            else:
+                return self.parse_token_accounts_by_owner(response.result)
+
+        return []
+
+    def _get_token_accounts_by_owner(self, wallet_address: str, encoding: str):
+        return self.run_rpc_method("getTokenAccountsByOwner", [wallet_address, {'programId': 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'},
+                                                               {'encoding': encoding}])
+
+    def _get_parsed_token_accounts_by_owner(self, wallet_address: str, token_addresses: set[str])->list[AccountInfo]:
+        response = self._get_token_accounts_by_owner(wallet_address, self.json_parsed_encoding)
+
+        if not response:
+            print(f"SolanaRpcApi: Couldn't resolve {len(token_addresses)} token accounts of {wallet_address}. Check your RPC Node.")
+            return []
+
+        return [account for account in self.parse_token_accounts_by_owner(response.result) if account.account_address in token_addresses]
+
+    #Looks up unknown mints in one getMultipleAccounts pass and remembers them
+    def get_mint_decimals(self, mint_addresses: list[str], max_tries=1)->dict[str, int]:
+        unknown_mints = [mint_address for mint_address in mint_addresses if mint_address not in self.mint_decimals]
+
+        if len(unknown_mints) > 0:
+            for mint_address, mint in self.get_spl_accounts(unknown_mints, max_tries).items():
+                if isinstance(mint, SplMint):
+                    self.mint_decimals[mint_address] = mint.decimals
+
+        return {mint_address: self.mint_decimals[mint_address] for mint_address in mint_addresses if mint_address in self.mint_decimals}
+
+    #Binary fetch of SPL token accounts and mints decoded locally; non SPL or missing accounts map to None
+    def get_spl_accounts(self, addresses: list[str], max_tries=1, cache_policy: CachePolicy = None)->dict[str, SplTokenAccount | SplMint]:
+        accounts = self.get_multiple_accounts(addresses, spl_account_decoder.get_parsers(), max_tries, self.base64_encoding, cache_policy)
+
+        return {address: account if isinstance(account, (SplTokenAccount, SplMint)) else None for address, account in accounts.items()}
+
+    def get_spl_account(self, address: str, max_tries=1, cache_policy: CachePolicy = None)->SplTokenAccount | SplMint:
+        return self.get_spl_accounts([address], max_tries, cache_policy).get(address)
     
     def get_token_account_by_owner(self, mint_address: str, owner_address: str)->AccountInfo:
         token_accounts = self.get_token_largest_accounts(mint_address)
+        token_owner_addresses = self.get_spl_account_owners([token_account.account_address for token_account in token_accounts])
         
-        for token_account in token_accounts:
-            token_owner_address = self.get_spl_account_owner(token_account.account_address)
-
+        for token_account, token_owner_address in zip(token_accounts, token_owner_addresses):
             if token_owner_address == owner_address:
                 return token_account
             
@@ -173,19 +357,18 @@ class SolanaRpcApi(RateLimiter):
         token_accounts = self.get_token_largest_accounts(mint_address, number_accounts+num_exclusions)
         num_accounts_processed = 0
         total_tokens_held = 0
+
+        if num_exclusions > 0 and is_spl_token: #Resolve every owner up front in two batched round trips
+            token_owner_addresses = self.get_spl_account_owners([token_account.account_address for token_account in token_accounts])
+            account_owner_addresses = self.get_spl_account_owners(token_owner_addresses)
+        else:
+            account_owner_addresses = [solana_utilites.SYSVAR_SYSTEM_PROGRAM_ID]*len(token_accounts)
       
-        for token_account in token_accounts:
+        for token_account, account_owner_address in zip(token_accounts, account_owner_addresses):
             should_exclude = False
             #Don't include the pool owner tokens account into the calculation
             if num_accounts_processed < number_accounts:
                 if num_exclusions > 0:
-                    if is_spl_token:
-                        token_owner_address = self.get_spl_account_owner(token_account.account_address)
-                        account_owner_address = self.get_spl_account_owner(token_owner_address)
-                    else:
-                        token_owner_address = self.get_account_owner(token_account.account_address)
-                        account_owner_address = solana_utilites.SYSVAR_SYSTEM_PROGRAM_ID
-                    
                     should_exclude = account_owner_address in exclude_owners
             
             if not should_exclude:
@@ -228,20 +411,46 @@ class SolanaRpcApi(RateLimiter):
         if account_info:
             return account_info.get('mint')
         
+    #Batched get_spl_account_owner; None addresses are passed through as None owners
+    def get_spl_account_owners(self, addresses: list[str], max_tries=1, cache_policy: CachePolicy = None)->list[str]:
+        ret_owners : list[str] = []
+        account_infos = self.get_account_infos([address for address in addresses if address], max_tries, cache_policy)
+        account_infos.reverse()
+
+        for address in addresses:
+            account_info = account_infos.pop() if address else None
+            ret_owners.append(self.parse_spl_account_owner(account_info))
+
+        return ret_owners
+
     def get_account_info_parsed(self, address: str, max_tries=1)->dict:
         account_info = self.get_account_info(address, max_tries)
 
         if account_info:
             return account_info.get('value', {}).get('data', {}).get('parsed', {}).get('info')
     
-    def get_account_info(self, address: str, max_tries=1)->dict:
-        response = self.run_rpc_method("getAccountInfo", [address, {"encoding": "jsonParsed"}],  max_tries) #FIXME doesn't work with all rpcs
+    def get_account_info(self, address: str, max_tries=1, cache_policy: CachePolicy = None, encoding = json_parsed_encoding)->dict:
+        response = self.run_rpc_method("getAccountInfo", [address, {"encoding": encoding}],  max_tries, cache_policy=cache_policy) #FIXME doesn't work with all rpcs
 
         if response:
             return response.result
 
         print("get_account_info: Couldn't get asset")
          
+    #Bulk get_account_info (same {'value': ...} shape); entries are None where the lookup failed
+    def get_account_infos(self, addresses: list[str], max_tries=1, cache_policy: CachePolicy = None)->list[dict]:
+        accounts = self.get_multiple_accounts(addresses, max_tries=max_tries, cache_policy=cache_policy)
+
+        return [{'value': accounts[address]} if address in accounts else None for address in addresses]
+
+    #Fetches accounts 100 at a time with all chunks sent in one JSON-RPC batch. Returns address->account value, where the value is None if
+    #the account doesn't exist and the address is missing if its chunk failed. Values owned by a program in parsers are replaced by its output
+    def get_multiple_accounts(self, addresses: list[str], parsers: dict[str, Callable[[dict], any]] = None, max_tries=1,
+                              encoding = "jsonParsed", cache_policy: CachePolicy = None)->dict[str, any]:
+        chunks, rpc_requests = self.get_multiple_accounts_requests(addresses, encoding)
+
+        return self.parse_multiple_accounts(chunks, self.run_rpc_batch_results(rpc_requests, max_tries, cache_policy=cache_policy), parsers)
+    
     def get_asset(self, address: str, max_tries=1, use_backup = False):
         response = self.run_rpc_method("getAsset", [address], max_tries, use_backup)
 
@@ -258,10 +467,7 @@ class SolanaRpcApi(RateLimiter):
         supply_dict = self.get_token_supply(address, max_tries)
 
         if supply_dict:
-            supply = supply_dict.get('value', {}).get('uiAmount', 0)                    
-            decimals = supply_dict.get('value', {}).get('decimals', 1)
-               
-            return Amount.tokens_ui(supply, decimals)
+            return self.parse_token_supply(supply_dict)
 
     def get_priority_fee_estimate(self, program_address: str):
         response = self.run_rpc_method("getPriorityFeeEstimate", [ {'accountKeys': [program_address]},
@@ -271,21 +477,15 @@ class SolanaRpcApi(RateLimiter):
         else:
             return 1e5 #default of 100K
     
+    #From the rolling window kept by priority_fee_estimator; no rpc call
+    def get_priority_fee_percentile(self, account_address: str, percentile: float)->float:
+        return self.priority_fee_estimator.get_fee(account_address, percentile)
+
     def get_recent_priority_fees(self, account_address: str):
         response = self.run_rpc_method("getRecentPrioritizationFees", [ [account_address] ])
 
         if response and len(response.result) > 0 :
-            sum = 0
-            fees_count = 0
-
-            for index in range(len(response.result)):
-                fee = response.result[index]['prioritizationFee']
-
-                if fee > 0: # Return most recent fee found
-                    sum += fee
-                    fees_count += 1
-
-            return 0 if fees_count == 0 else sum/fees_count
+            return self.parse_recent_priority_fees(response.result)
         
         print("get_recent_priority_fees: No recent fee was found")
 
@@ -298,27 +498,34 @@ class SolanaRpcApi(RateLimiter):
         print("get_latest_block_hash: Couldn't do it")
 
     def update_latest_block_hash(self)->Hash:
-        block_hash_str = self.get_latest_block_hash()
+        blockhash_info = self.blockhash_prefetcher.refresh()
 
-        if block_hash_str:
-            self.last_block_hash = Hash.from_string(block_hash_str)
-            return self.last_block_hash
+        if blockhash_info:
+            return blockhash_info.blockhash
     
+    #Prefetched in the background; only goes to the rpc if the prefetched hash is missing or close to expiring
     def get_last_recorded_block_hash(self)->Hash:
-        if not self.last_block_hash:
-            self.update_latest_block_hash()
-            
-        return self.last_block_hash
+        blockhash_info = self.get_valid_block_hash_info()
+
+        if blockhash_info:
+            return blockhash_info.blockhash
+
+    def get_valid_block_hash_info(self)->BlockhashInfo:
+        return self.blockhash_prefetcher.get_valid_blockhash()
+
+    def is_block_hash_valid(self, blockhash: Hash)->bool:
+        return self.blockhash_prefetcher.is_blockhash_valid(blockhash)
     
-    def send_transaction(self, transaction: VersionedTransaction, maxTries=0):
-        transaction_bytes = bytes(transaction)
-
-        import time
-        #print("Sending tx: " + str(time.time_ns())) #DELETE THIS
-        return self.client.send_raw_transaction(transaction_bytes, opts=TxOpts(skip_confirmation=True,
-                                                                               skip_preflight = True,
-                                                                            #preflight_commitment=Processed,
-                                                                            max_retries=maxTries))
+    #Returns the transaction signature; sent over the pooled transport like every other call
+    def send_transaction(self, transaction: VersionedTransaction, maxTries=0)->str:
+        encoded_transaction = base64.b64encode(bytes(transaction)).decode('utf-8')
+        response = self.run_rpc_method("sendTransaction", [encoded_transaction, {'encoding': 'base64',
+                                                                                 'skipPreflight': True,
+                                                                                 #'preflightCommitment': 'processed',
+                                                                                 'maxRetries': maxTries}])
+        
+        if response:
+            return response.result
     
     @staticmethod  
     def create_transfer_instruction(sender: Pubkey, receiver: Pubkey, lamports: int):
@@ -338,6 +545,140 @@ class SolanaRpcApi(RateLimiter):
 
         return bundle
 
+    @staticmethod
+    def parse_token_amount(token_amount_result: dict)->Amount:
+        value = token_amount_result['value']
+
+        return Amount.tokens_ui(value['uiAmount'], value['decimals'])
+
+    #Balance of a jsonParsed token account value
+    @staticmethod
+    def parse_token_account_amount(account_value: dict)->Amount:
+        if account_value and isinstance(account_value.get('data'), dict):
+            token_amount = account_value['data'].get('parsed', {}).get('info', {}).get('tokenAmount')
+
+            if token_amount:
+                return Amount.tokens_ui(token_amount['uiAmount'], token_amount['decimals'])
+
+    @staticmethod
+    def get_transaction_params(tx_signature: str)->list:
+        return [tx_signature, {'encoding': 'jsonParsed', 'commitment': 'confirmed', 'maxSupportedTransactionVersion': 0}]
+
+    @staticmethod
+    def get_signatures_config(min_slot: int, limit: int, before: str, until: str)->dict:
+        ret_config = {'commitment': 'confirmed', 'limit': limit}
+
+        if min_slot:
+            ret_config['minContextSlot'] = min_slot
+        if before:
+            ret_config['before'] = before
+        if until:
+            ret_config['until'] = until
+
+        return ret_config
+
+    @staticmethod
+    def chunk_addresses(addresses: list[str])->list[list[str]]:
+        unique_addresses = list(dict.fromkeys([address for address in addresses if address]))
+        chunk_size = SolanaRpcApi.max_multiple_accounts
+
+        return [unique_addresses[start:start+chunk_size] for start in range(0, len(unique_addresses), chunk_size)]
+
+    #One getMultipleAccounts call per chunk; returns the chunks alongside their (method, params) pairs
+    @staticmethod
+    def get_multiple_accounts_requests(addresses: list[str], encoding: str)->tuple[list[list[str]], list[tuple[str, list]]]:
+        chunks = SolanaRpcApi.chunk_addresses(addresses)
+
+        return chunks, [("getMultipleAccounts", [chunk, {"encoding": encoding}]) for chunk in chunks]
+
+    @staticmethod
+    def parse_multiple_accounts(chunks: list[list[str]], results: list[dict], parsers: dict[str, Callable[[dict], any]] = None)->dict[str, any]:
+        ret_accounts = {}
+
+        for chunk, result in zip(chunks, results):
+            if result:
+                for address, account_value in zip(chunk, result['value']):
+                    owner = account_value.get('owner') if account_value else None
+
+                    if parsers and owner in parsers:
+                        ret_accounts[address] = parsers[owner](account_value)
+                    else:
+                        ret_accounts[address] = account_value
+
+        return ret_accounts
+
+    @staticmethod
+    def parse_token_supply(supply_result: dict)->Amount:
+        supply = supply_result.get('value', {}).get('uiAmount', 0)                    
+        decimals = supply_result.get('value', {}).get('decimals', 1)
+            
+        return Amount.tokens_ui(supply, decimals)
+
+    @staticmethod
+    def parse_token_largest_accounts(largest_accounts_result: dict, limit: int)->list[AccountInfo]:
+        holders = []
+        token_accounts = largest_accounts_result['value']
+
+        for count in range(min(limit, len(token_accounts))):
+            address = str(token_accounts[count]['address'])
+            balance = token_accounts[count]['amount']
+            decimals = token_accounts[count]['decimals']
+            holders.append(AccountInfo(address, Amount.tokens_scaled(int(balance), decimals)))
+
+        return holders
+
+    @staticmethod
+    def parse_token_accounts_by_owner(token_accounts_result: dict)->list[AccountInfo]:
+        ret_accounts = []
+
+        for account in token_accounts_result['value']:
+            token_address = str(account['pubkey'])
+            mint_Address = account['account']['data']['parsed']['info']['mint']
+            balance = account['account']['data']['parsed']['info']['tokenAmount']['uiAmount']
+            decimals = account['account']['data']['parsed']['info']['tokenAmount']['decimals']
+        
+            ret_accounts.append(AccountInfo(token_address, Amount.tokens_ui(balance, decimals), mint_Address))
+
+        return ret_accounts
+
+    #Returns (token account address, decoded account) for a base64 getTokenAccountsByOwner result
+    @staticmethod
+    def parse_spl_token_accounts_by_owner(token_accounts_result: dict)->list[tuple[str, SplTokenAccount]]:
+        ret_accounts = []
+
+        for account in token_accounts_result['value']:
+            token_account = spl_account_decoder.decode(account['account'])
+
+            if isinstance(token_account, SplTokenAccount):
+                ret_accounts.append((str(account['pubkey']), token_account))
+
+        return ret_accounts
+
+    @staticmethod
+    def parse_recent_priority_fees(fees_result: list[dict])->float:
+        sum = 0
+        fees_count = 0
+
+        for index in range(len(fees_result)):
+            fee = fees_result[index]['prioritizationFee']
+
+            if fee > 0: # Return most recent fee found
+                sum += fee
+                fees_count += 1
+
+        return 0 if fees_count == 0 else sum/fees_count
+
+    @staticmethod
+    def parse_spl_account_owner(account_info: dict)->str:
+        if account_info and account_info.get('value'):
+            parsed_info = account_info['value'].get('data', {})
+
+            if isinstance(parsed_info, dict):
+                parsed_info = parsed_info.get('parsed', {}).get('info')
+
+                if parsed_info:
+                    return parsed_info.get('owner')
+
     @staticmethod 
     def parse_token_info(account_info: dict)->TokenInfo: 
         token_info_dict = account_info.get("value", {}).get('data', {}).get('parsed', {}).get('info', {})
@@ -447,20 +788,28 @@ class SolanaRpcApi(RateLimiter):
 
     @staticmethod
     def get_account_address_with_seeds(seeds: list[bytes], program_address: str)->str:
-        return str(Pubkey.find_program_address(seeds, Pubkey.from_string(program_address))[0])
+        return pda_cache.get_address(seeds, program_address)
     
     @staticmethod
     def get_associated_token_account_address(owner_address: str, mintAddress: str, token_program_address: str)->str:
-        mint_address_pk = Pubkey.from_string(mintAddress)        
-        owner_address_pk = Pubkey.from_string(owner_address)
         token_program_pk = solana_utilites.solana_pubkeys.get(token_program_address) 
 
         if token_program_pk:
-            # Calculate the associated token address
-            #seeds = [bytes(owner_address_pk), bytes(TOKEN_PROGRAM_ID), bytes(mint_address_pk)] #DELETE
-            seeds = [bytes(owner_address_pk), bytes(token_program_pk), bytes(mint_address_pk)]
+            return pda_cache.get_associated_token_address(owner_address, mintAddress, token_program_pk)
+
+    #Derives (and caches) the ATA of every owner for every mint; mints maps mint address to its token program address
+    @staticmethod
+    def get_associated_token_account_addresses(owner_addresses: list[str], mints: dict[str, str])->dict[tuple[str, str], str]:
+        ret_addresses : dict[tuple[str, str], str] = {} #key=(owner address, mint address)
 
-            return str(Pubkey.find_program_address(seeds, solana_utilites.ASSOCIATED_TOKEN_PROGRAM_ID)[0])
+        for mint_address, token_program_address in mints.items():
+            for owner_address in owner_addresses:
+                address = SolanaRpcApi.get_associated_token_account_address(owner_address, mint_address, token_program_address)
+
+                if address:
+                    ret_addresses[(owner_address, mint_address)] = address
+
+        return ret_addresses
           
     @staticmethod
     def extract_mint_decimals(mint_address: str, token_balance_dict: dict)->int:
@@ -480,7 +829,7 @@ class SolanaRpcApi(RateLimiter):
         return ret_list
 
     @staticmethod
-    def get_account_subscribe_request(account_address: str, id = 420):
+    def get_account_subscribe_request(account_address: str, id = 420, encoding = json_parsed_encoding):
          return {
                 "jsonrpc": "2.0",
                 "id": id,
@@ -488,12 +837,21 @@ class SolanaRpcApi(RateLimiter):
                 "params": [
                 account_address, # pubkey of account we want to subscribe to
                 {
-                    "encoding": "jsonParsed", # base58, base64, base65+zstd, jsonParsed
+                    "encoding": encoding, # base58, base64, base64+zstd, jsonParsed
                     "commitment": "confirmed", # defaults to finalized if unset
                 }
             ]
         }           
     
+    @staticmethod
+    def get_account_unsubscribe_request(subscription_id: int, id = 420):
+         return {
+                "jsonrpc": "2.0",
+                "id": id,
+                "method": "accountUnsubscribe",
+                "params": [subscription_id]
+        }
+
     @staticmethod
     def get_block_request(slot: int):
          return {
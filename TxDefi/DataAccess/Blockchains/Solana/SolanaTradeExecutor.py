@@ -21,7 +21,7 @@ class SolanaTradeExecutor(OrderExecutor[SwapOrder]):
     bundle_limit = 5
     def __init__(self, market_manager: AbstractMarketManager, solana_rpc_api: SolanaRpcApi,
                   supported_builders: dict[SupportedPrograms, SolanaTxBuilder], rate_limit: float = None ):
-        OrderExecutor.__init__(self, rate_limit)
+        OrderExecutor.__init__(self, rate_limit, None if rate_limit else solana_rpc_api.rate_limiter)
         self.market_manager = market_manager
         self.solana_rpc_api = solana_rpc_api
         self.builders = supported_builders
@@ -37,6 +37,7 @@ class SolanaTradeExecutor(OrderExecutor[SwapOrder]):
         if token_info:
             signed_transactions : list[VersionedTransaction] = [] 
             tx_builder = self.builders.get(token_info.metadata.program_type)
+            self.resolve_priority_fee(order, token_info.metadata.program_type)
             wallets = order.wallet_settings.signer_wallets
 
             for i in range(len(wallets)):
@@ -47,6 +48,25 @@ class SolanaTradeExecutor(OrderExecutor[SwapOrder]):
 
             return signed_transactions
 
+    #Swaps a fee policy (e.g. p75 x 1.2 capped) for a concrete fee from the estimator's in-memory window
+    def resolve_priority_fee(self, order: SwapOrder, program_type: SupportedPrograms):
+        fee_policy = order.swap_settings.priority_fee_policy
+
+        if fee_policy:
+            fee_rate = self.solana_rpc_api.priority_fee_estimator.get_program_fee(program_type, fee_policy.percentile)
+            order.swap_settings = order.swap_settings.clone() #Settings are often shared across orders
+            order.swap_settings.priority_fee = order.swap_settings.resolve_priority_fee(fee_rate)
+
+    #A transaction signed with an expiring blockhash would just get dropped, so rebuild the order instead of sending it
+    def refresh_stale_transactions(self, order: SwapOrder, signed_transactions: list[VersionedTransaction])->list[VersionedTransaction]:
+        for transaction in signed_transactions:
+            if not self.solana_rpc_api.is_block_hash_valid(transaction.message.recent_blockhash):
+                logger_util.logger.info("Blockhash expired before sending; rebuilding the order")
+
+                return self.build_transactions(order)
+
+        return signed_transactions
+
     def execute_list(self, transactions: list[VersionedTransaction], executor: ThreadPoolExecutor, max_tries: int)->list[str]:
         futures = []
         
@@ -57,6 +77,10 @@ class SolanaTradeExecutor(OrderExecutor[SwapOrder]):
         
     def execute_impl(self, order: SwapOrder, max_tries = 3)->list[str]:
         signed_transactions = self.build_transactions(order)
+
+        if signed_transactions:
+            signed_transactions = self.refresh_stale_transactions(order, signed_transactions)
+
         ret_signatures : list[str] = []
         did_succeed = True
 
@@ -14,11 +14,16 @@ class SolanaTxBuilder(TransactionBuilder[VersionedTransaction]):
 
     def build_v0_transaction(self, instructions: list[Instruction], signer: SolPubKey)->VersionedTransaction:        
         signer_pubkey = signer.get_key_pair().pubkey()
-        blockhash = self.solana_rpc_api.get_last_recorded_block_hash()
+        blockhash_info = self.solana_rpc_api.get_valid_block_hash_info() #Prefetched; no round trip unless it's about to expire
+
+        if not blockhash_info:
+            print("SolanaTxBuilder: No valid blockhash available")
+            return
+        
         message = Message(instructions, signer_pubkey)
         
-        return Transaction([signer.get_key_pair()], message, blockhash)
-        #messageV0 = MessageV0.try_compile(signer_pubkey, instructions, [], self.solana_rpc_api.get_last_recorded_block_hash())
+        return Transaction([signer.get_key_pair()], message, blockhash_info.blockhash)
+        #messageV0 = MessageV0.try_compile(signer_pubkey, instructions, [], blockhash_info.blockhash)
         #return VersionedTransaction(messageV0, [signer.get_key_pair()])
        
     @abstractmethod
@@ -1,37 +1,58 @@
-import json
 from flask.debughelpers import explain_template_loading_attempts
+import concurrent.futures
 from pubsub import pub
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.DataAccess.Decoders import MessageDecoder
 from TxDefi.DataAccess.MarketDataSocket import MarketDataSocket
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
 
 class SubscribeSocket(MarketDataSocket):    
-    def __init__(self, wss_uri: str, event_decoder: MessageDecoder, out_topic: str, requests: list[str] = [], ping = True):
-        MarketDataSocket.__init__(self, wss_uri, ping)
+    def __init__(self, wss_uri: str, event_decoder: MessageDecoder, out_topic: str, requests: list[str] = [], ping = True,
+                 dispatch_queue_size: int = DispatchQueue.default_max_size, overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 compression: str = MarketDataSocket.deflate_compression):
+        MarketDataSocket.__init__(self, wss_uri, ping, dispatch_queue_size=dispatch_queue_size, overflow_policy=overflow_policy, compression=compression)
    
         self.event_decoder = event_decoder
         self.out_topic = out_topic
         self.count = 1
         self.sub_requests = requests
 
+    #Runs on the socket's loop once connected; every sub request goes out in one pipelined burst without waiting on replies
     def _init(self):
-        for sub_request in self.sub_requests:
-            print(f"Sending sub_request: {sub_request}")
-            self.send_request_no_wait(sub_request)
+        while not self.write_queue.empty(): #Anything queued for the old connection is either replayed below or moot
+            self.write_queue.get_nowait()
+
+        if len(self.sub_requests) > 0:
+            print(f"{self.name}: Sending {len(self.sub_requests)} sub requests to {self.wss_uri}")
+
+        for sub_request in list(self.sub_requests):
+            self.write_queue.put_nowait(sub_request)
 
     def add_sub_request(self, request: str):   
         if request not in self.sub_requests:
             self.sub_requests.append(request)
 
-    def send_request_no_wait(self, request: str):
-        super().send_request_no_wait(request)
+    def remove_sub_request(self, request: str):
+        if request in self.sub_requests:
+            self.sub_requests.remove(request)
+
+    #replay=False for one-off requests (e.g. unsubscribes) that mustn't be resent when the socket reconnects
+    def send_request_no_wait(self, request: str, replay = True, request_id: int = None)->concurrent.futures.Future:
+        if replay:
+            self.add_sub_request(request)
 
-        self.add_sub_request(request)
+            if not self.websocket: #Goes out with the other sub requests once connected
+                return self.track_request(request_id)
+
+        return super().send_request_no_wait(request, request_id)
 
     def process_data(self, data: str):   
-        json_data = json.loads(data)
+        json_data = self.json_codec.loads(data)
 
         if json_data:
+            if isinstance(json_data, dict):
+                self.resolve_request(json_data)
+
             #print("Decoding " + data + "\n")
             decoded_data = self.event_decoder.decode(json_data)
 
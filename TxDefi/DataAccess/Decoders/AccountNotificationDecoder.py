@@ -1,8 +1,9 @@
 from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import SplTokenAccount, SplMint, spl_account_decoder
 
 class AccountNotification:
-    def __init__(self, subscription_id: int, slot: int, contract_address: str, lamports: int, account_data: list[str] | dict):
+    def __init__(self, subscription_id: int, slot: int, contract_address: str, lamports: int, account_data: list[str] | dict | SplTokenAccount | SplMint):
         self.subscription_id = subscription_id
         self.contract_address = contract_address #replaces tx_signature as getting this is expensive; can retrieve this from the rpc later
         self.slot = slot
@@ -20,7 +21,7 @@ class AccountNotificationDecoder(MessageDecoder[AccountNotification]):
             value = data['params']['result']['value']
             subscription_id = data['params']['subscription']
             lamports = value['lamports']
-            account_data = value['data']
+            account_data = spl_account_decoder.decode(value) or value['data'] #base64 SPL accounts arrive already decoded
             self.contract_address = self.contract_address 
 
             return AccountNotification(subscription_id, slot, self.contract_address, lamports, account_data)
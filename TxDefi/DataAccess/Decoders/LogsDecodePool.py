@@ -0,0 +1,69 @@
+import concurrent.futures
+import multiprocessing
+import threading
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.PumpDataDecoder import PumpDataDecoder
+from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import SolanaLogsDecoder
+from TxDefi.Utilities.JsonCodec import default_codec
+
+worker_decoder : SolanaLogsDecoder = None #One per worker process
+
+#Runs once in each worker; decoders hold anchorpy coders that don't pickle, so each worker builds its own from the IDL
+def _init_worker(program_id: str, idl_path: str):
+    global worker_decoder
+    from TxDefi.DataAccess.Blockchains.Solana.SolanaTradeExecutor import SolanaTradeExecutor
+
+    program = SolanaTradeExecutor.create_program_nc(idl_path)
+    pump_decoder = PumpDataDecoder(program_id, program.coder, MessageDecoder.base58_encoding)
+    worker_decoder = SolanaLogsDecoder(program_id, None, pump_decoder, None)
+
+#Returns one entry per frame (the decoded list or None) in the order given
+def _decode_frames(frames: list[str])->list[list]:
+    ret_decoded = []
+
+    for frame in frames:
+        try:
+            worker_decoder.logs_decoder.last_event = None #Frames from one transaction never span workers; don't let another transaction's event suppress this one
+            ret_decoded.append(worker_decoder.decode(default_codec.loads(frame)))
+        except Exception as e:
+            print(f"LogsDecodePool: Error decoding frame {e}")
+            ret_decoded.append(None)
+
+    return ret_decoded
+
+#Decodes raw logsNotification frames on worker processes so the regex grouping, base64 and anchorpy parsing
+#run outside the GIL; results come back as plain DTOs
+#spawn keeps workers clear of locks held by the parent's threads at fork time, so the entry script needs a __main__ guard
+class LogsDecodePool:
+    default_batch_size = 64 #Frames per task; amortizes the pickling round trip
+
+    def __init__(self, program_id: str, idl_path: str, num_workers: int, max_inflight_batches: int = None, start_method = "spawn"):
+        self.num_workers = max(1, num_workers)
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.num_workers, multiprocessing.get_context(start_method),
+                                                               _init_worker, (program_id, idl_path))
+        self.inflight = threading.Semaphore(max_inflight_batches if max_inflight_batches else self.num_workers*2) #Back pressure on the submitter
+        self.num_batches = 0
+        self.num_frames = 0
+
+    #Blocks while too many batches are in flight
+    def submit(self, frames: list[str])->concurrent.futures.Future:
+        self.inflight.acquire()
+
+        try:
+            ret_future = self.executor.submit(_decode_frames, frames)
+        except Exception:
+            self.inflight.release()
+            raise
+
+        ret_future.add_done_callback(lambda future: self.inflight.release())
+        self.num_batches += 1
+        self.num_frames += len(frames)
+
+        return ret_future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self)->dict:
+        return {"workers": self.num_workers, "batches": self.num_batches, "frames": self.num_frames,
+                "frames_per_batch": self.num_frames/self.num_batches if self.num_batches > 0 else 0}
@@ -1,7 +1,17 @@
 from abc import abstractmethod
 from base64 import b64decode
+import threading
+import time
 import base58
 
+try: #Needed for base64+zstd account data; without it subscriptions stay on plain base64
+    import zstandard
+    is_zstd_available = True
+except ImportError:
+    is_zstd_available = False
+
+decode_context = threading.local() #Per thread zstd decompressor and the counters decompression time is charged to
+
 from typing import TypeVar, Generic
 
 T = TypeVar("T", bound=object)  # Generic type Key Pair Type
@@ -10,6 +20,7 @@ T = TypeVar("T", bound=object)  # Generic type Key Pair Type
 class MessageDecoder(Generic[T]): #Low priority Fix; need a generic for the output of decode
     base64_encoding = 'base64'
     base58_encoding = 'base58'
+    base64_zstd_encoding = 'base64+zstd'
         
     @abstractmethod
     def decode(self, data: T)->any:
@@ -24,11 +35,38 @@ class MessageDecoder(Generic[T]): #Low priority Fix; need a generic for the outp
                 decoded_bytes = b64decode(program_data)
             elif encoding == MessageDecoder.base58_encoding:
                 decoded_bytes = base58.b58decode(program_data)
+            elif encoding == MessageDecoder.base64_zstd_encoding:
+                decoded_bytes = MessageDecoder.decompress_zstd(b64decode(program_data))
 
         except Exception as e:
             print("Problem parsing program data " + program_data)
 
         return decoded_bytes
+
+    @staticmethod
+    def decompress_zstd(data: bytes)->bytes:
+        start = time.perf_counter()
+        decompressor = getattr(decode_context, 'zstd_decompressor', None)
+
+        if not decompressor: #Decompressors can't be shared across threads
+            decompressor = zstandard.ZstdDecompressor()
+            decode_context.zstd_decompressor = decompressor
+
+        ret_bytes = decompressor.decompressobj().decompress(data) #Works whether or not the frame records its content size
+        stats = getattr(decode_context, 'stats', None)
+
+        if stats is not None:
+            stats["decompressed"] += 1
+            stats["compressed_bytes"] += len(data)
+            stats["decompressed_bytes"] += len(ret_bytes)
+            stats["decompression_time"] += time.perf_counter()-start
+
+        return ret_bytes
+
+    #Decompression on the calling thread is counted in stats from now on (e.g. a socket's dispatcher thread and that socket's counters)
+    @staticmethod
+    def set_decode_stats(stats: dict):
+        decode_context.stats = stats
     
 class LogsDecoder(MessageDecoder[T]):
     program_data_prefix = "Program data:"
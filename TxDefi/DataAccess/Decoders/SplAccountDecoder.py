@@ -0,0 +1,107 @@
+import struct
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
+from TxDefi.Data.Amount import Amount
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+
+class SplTokenAccount:
+    __slots__ = ("program_address", "mint", "owner", "amount", "delegate", "state", "is_native", "delegated_amount", "close_authority")
+
+    def __init__(self, program_address: str, mint: str, owner: str, amount: int, delegate: str, state: int, is_native: bool,
+                 delegated_amount: int, close_authority: str):
+        self.program_address = program_address
+        self.mint = mint
+        self.owner = owner
+        self.amount = amount #scaled
+        self.delegate = delegate
+        self.state = state #0 uninitialized, 1 initialized, 2 frozen
+        self.is_native = is_native
+        self.delegated_amount = delegated_amount
+        self.close_authority = close_authority
+
+    def get_amount(self, decimals: int)->Amount:
+        return Amount.tokens_scaled(self.amount, decimals)
+
+class SplMint:
+    __slots__ = ("program_address", "mint_authority", "supply", "decimals", "is_initialized", "freeze_authority")
+
+    def __init__(self, program_address: str, mint_authority: str, supply: int, decimals: int, is_initialized: bool, freeze_authority: str):
+        self.program_address = program_address
+        self.mint_authority = mint_authority
+        self.supply = supply #scaled
+        self.decimals = decimals
+        self.is_initialized = is_initialized
+        self.freeze_authority = freeze_authority
+
+    def get_supply(self)->Amount:
+        return Amount.tokens_scaled(self.supply, self.decimals)
+
+#Decodes SPL Token and Token-2022 account/mint layouts straight from the account bytes (base64 or base64+zstd encoding) instead of jsonParsed
+class SplAccountDecoder(MessageDecoder[SplTokenAccount | SplMint]):
+    token_program_address = str(TOKEN_PROGRAM_ID)
+    token_2022_program_address = str(TOKEN_2022_PROGRAM_ID)
+    spl_program_addresses = {token_program_address, token_2022_program_address}
+    account_layout = struct.Struct("<32s32sQI32sBIQQI32s") #165 bytes
+    mint_layout = struct.Struct("<I32sQBBI32s") #82 bytes
+    account_type_offset = account_layout.size #Token-2022 accounts with extensions store their type after the base account size
+    account_type_mint = 1
+    account_type_account = 2
+    binary_encodings = {MessageDecoder.base64_encoding, MessageDecoder.base64_zstd_encoding}
+
+    @staticmethod
+    def _option_key(tag: int, key_bytes: bytes)->str:
+        return str(Pubkey.from_bytes(key_bytes)) if tag else None
+
+    @staticmethod
+    def decode_account_bytes(data: bytes, program_address: str)->SplTokenAccount:
+        mint, owner, amount, delegate_tag, delegate, state, native_tag, _, delegated_amount, close_tag, close_authority = \
+            SplAccountDecoder.account_layout.unpack_from(data)
+
+        return SplTokenAccount(program_address, str(Pubkey.from_bytes(mint)), str(Pubkey.from_bytes(owner)), amount,
+                               SplAccountDecoder._option_key(delegate_tag, delegate), state, native_tag == 1, delegated_amount,
+                               SplAccountDecoder._option_key(close_tag, close_authority))
+
+    @staticmethod
+    def decode_mint_bytes(data: bytes, program_address: str)->SplMint:
+        mint_authority_tag, mint_authority, supply, decimals, is_initialized, freeze_tag, freeze_authority = SplAccountDecoder.mint_layout.unpack_from(data)
+
+        return SplMint(program_address, SplAccountDecoder._option_key(mint_authority_tag, mint_authority), supply, decimals, is_initialized == 1,
+                       SplAccountDecoder._option_key(freeze_tag, freeze_authority))
+
+    @staticmethod
+    def decode_bytes(data: bytes, program_address: str)->SplTokenAccount | SplMint:
+        data_length = len(data)
+
+        if data_length == SplAccountDecoder.mint_layout.size:
+            return SplAccountDecoder.decode_mint_bytes(data, program_address)
+        elif data_length == SplAccountDecoder.account_layout.size:
+            return SplAccountDecoder.decode_account_bytes(data, program_address)
+        elif data_length > SplAccountDecoder.account_type_offset and program_address == SplAccountDecoder.token_2022_program_address:
+            account_type = data[SplAccountDecoder.account_type_offset]
+
+            if account_type == SplAccountDecoder.account_type_mint:
+                return SplAccountDecoder.decode_mint_bytes(data, program_address)
+            elif account_type == SplAccountDecoder.account_type_account:
+                return SplAccountDecoder.decode_account_bytes(data, program_address)
+
+    @staticmethod
+    def is_binary_data(account_data)->bool:
+        return isinstance(account_data, list) and len(account_data) == 2 and account_data[1] in SplAccountDecoder.binary_encodings
+
+    #Takes an rpc account value ({'owner': ..., 'data': [<base64>, 'base64'], ...}); returns None if it isn't a binary SPL account
+    def decode(self, account_value: dict)->SplTokenAccount | SplMint:
+        try:
+            if account_value:
+                owner = account_value.get('owner')
+                account_data = account_value.get('data')
+
+                if owner in self.spl_program_addresses and self.is_binary_data(account_data):
+                    return self.decode_bytes(self.get_bytes(account_data[0], account_data[1]), owner)
+        except Exception as e:
+            print("SplAccountDecoder: Error decoding account " + str(e))
+
+    #Parsers for SolanaRpcApi.get_multiple_accounts
+    def get_parsers(self)->dict[str, callable]:
+        return {program_address: self.decode for program_address in self.spl_program_addresses}
+
+spl_account_decoder = SplAccountDecoder()
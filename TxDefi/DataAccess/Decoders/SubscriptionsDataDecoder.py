@@ -1,21 +1,85 @@
+import threading
 from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
 from TxDefi.Data.MarketDTOs import *
 
 class Subscription:
-    def __init__(self, id: int, subscription: int):
+    def __init__(self, id: int, subscription: int, previous_subscription: int = None):
         self.id = id
         self.subscription = subscription
+        self.previous_subscription = previous_subscription #Id this request had before a reconnect
+
+#Published once every subscription replayed after a reconnect is confirmed (or rejected)
+class ResubscribeReport:
+    def __init__(self, socket_name: str, request_ids: list[int], remapped: dict[int, int], outage_time: float, resubscribe_time: float):
+        self.socket_name = socket_name
+        self.request_ids = request_ids
+        self.remapped = remapped #key=old subscription id; value=new subscription id
+        self.outage_time = outage_time #seconds from the disconnect to the new connection
+        self.resubscribe_time = resubscribe_time #seconds from the new connection to the last confirmation
 
 class SubscriptionsDataDecoder(MessageDecoder[Subscription]):
     def __init__(self):
         self.message_decoders : dict[int, MessageDecoder] = {}
+        self.request_subscriptions : dict[int, int] = {} #key=request id; value=subscription id
+        self.pending_remaps : dict[int, tuple[int, MessageDecoder]] = {} #key=request id; value=(old subscription id, decoder)
+        self.remapped : dict[int, int] = {}
+        self.remap_request_ids : list[int] = []
+        self.lock = threading.Lock()
+
+    def add_decoder(self, subscription_id: int, decoder: MessageDecoder, request_id: int = None):
+        with self.lock:
+            self.message_decoders[subscription_id] = decoder
+
+            if request_id is not None:
+                self.request_subscriptions[request_id] = subscription_id
+
+    #With a decoder given only removes it if it's still the one registered (the id may since belong to another account)
+    def remove_decoder(self, subscription_id: int, decoder: MessageDecoder = None):
+        with self.lock:
+            if decoder is None or self.message_decoders.get(subscription_id) is decoder:
+                self.message_decoders.pop(subscription_id, None)
+
+    #The request won't be replayed on this connection any more (unsubscribed or moved to another connection)
+    def forget_request(self, request_id: int):
+        with self.lock:
+            self.request_subscriptions.pop(request_id, None)
+
+    #Call before replaying subscriptions on a new connection; old ids are dropped in one step so none of them can
+    #route a new connection's notifications to the wrong decoder, and each decoder moves to its new id as confirmations arrive
+    def begin_resubscribe(self)->int:
+        with self.lock:
+            self.pending_remaps = {request_id: (subscription_id, self.message_decoders[subscription_id])
+                                   for request_id, subscription_id in self.request_subscriptions.items() if subscription_id in self.message_decoders}
+            self.remap_request_ids = list(self.pending_remaps.keys())
+            self.remapped = {}
+            self.message_decoders.clear()
+            self.request_subscriptions.clear()
+
+            return len(self.pending_remaps)
+
+    def is_resubscribing(self)->bool:
+        return len(self.pending_remaps) > 0
+
+    #Returns (request ids, old->new ids) once the last pending remap is settled
+    def take_remaps(self)->tuple[list[int], dict[int, int]]:
+        with self.lock:
+            ret_remaps = (self.remap_request_ids, self.remapped)
+            self.remap_request_ids = []
+            self.remapped = {}
+
+            return ret_remaps
+
+    def _remap(self, request_id: int, subscription: int)->int:
+        with self.lock:
+            old_subscription, decoder = self.pending_remaps.pop(request_id)
+
+            if subscription is not None:
+                self.message_decoders[subscription] = decoder
+                self.request_subscriptions[request_id] = subscription
+                self.remapped[old_subscription] = subscription
+
+            return old_subscription
 
-    def add_decoder(self, subscription_id: int, decoder: MessageDecoder):
-        self.message_decoders[subscription_id] = decoder
-    
-    def remove_decoder(self, subscription_id: int):
-        self.message_decoders.pop(subscription_id)
-        
     def decode(self, data: dict)->Subscription:
         try:
             decoded_data = None
@@ -24,14 +88,22 @@ class SubscriptionsDataDecoder(MessageDecoder[Subscription]):
             if id:
                 subscription = data.get("result", None)
 
-                if subscription:
+                if id in self.pending_remaps:
+                    if not subscription:
+                        print(f"SubscriptionsDataDecoder: Resubscribe of request {id} failed {data.get('error')}")
+
+                    previous_subscription = self._remap(id, subscription if subscription else None)
+
+                    if subscription:
+                        decoded_data = Subscription(id, subscription, previous_subscription)
+                elif subscription:
                     decoded_data = Subscription(id, subscription)
             else:
                 subscription = data['params']['subscription']
 
                 if subscription in self.message_decoders:
                     decoded_data = self.message_decoders[subscription].decode(data)
-            
+
             return decoded_data
         except Exception as e:
-            print("Error decoding " + str(e))
\ No newline at end of file
+            print("Error decoding " + str(e))
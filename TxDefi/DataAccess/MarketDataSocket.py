@@ -1,30 +1,60 @@
 import threading
+import time
 import asyncio
 import websockets
 import logging
-import json
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosedError
 from abc import abstractmethod
 import asyncio
 import concurrent.futures
 import TxDefi.Utilities.LoggerUtil as logger_util
+from TxDefi.Utilities.JsonCodec import JsonCodec, default_codec
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+
+class SocketRequestError(Exception):
+    pass
 
 class MarketDataSocket(threading.Thread):    
-    def __init__(self, wss_uri: str, custom_ping = True):
+    max_burst_size = 100 #Queued frames written back to back before yielding to the reader
+    deflate_compression = "deflate" #permessage-deflate; None turns it off
+
+    #The reader only queues raw frames; a dispatcher thread behind dispatch_queue decodes and publishes them so a slow
+    #subscriber never holds up recv, pings or writes. overflow_policy decides what gives once the queue is full
+    def __init__(self, wss_uri: str, custom_ping = True, json_codec: JsonCodec = default_codec, dispatch_queue_size: int = DispatchQueue.default_max_size,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK, compression: str = deflate_compression):
         threading.Thread.__init__(self, daemon=True)
         self.name = MarketDataSocket.__name__
         self.wss_uri = wss_uri
         self.cancel_token = threading.Event()
-        self.receive_queue = asyncio.Queue()  # Queue for incoming messages 
+        self.dispatch_queue = DispatchQueue(dispatch_queue_size, overflow_policy) # Queue for incoming messages
         self.write_queue = asyncio.Queue()  # Queue for outgoing messages
         self.custom_ping = custom_ping
         self.lock = threading.Lock()
         self.paused_event = threading.Event()
         self.paused_event.set()
         self.websocket = None
+        self.json_codec = json_codec
+        self.loop : asyncio.AbstractEventLoop = None #The socket thread's loop; every write_queue access happens on it
+        self.pending_requests : dict[int, concurrent.futures.Future] = {} #key=json rpc id; resolved with the result (e.g. a subscription id)
+        self.connected_at = 0 #perf_counter times of the last connect and disconnect
+        self.disconnected_at = 0
+        self.num_reconnects = 0
+        self.num_frames_sent = 0
+        self.num_bursts = 0
+        self.max_burst = 0
+        self.compression = compression
+        self.transport_stats = {"frames": 0, "payload_chars": 0, "decompressed": 0, "compressed_bytes": 0, "decompressed_bytes": 0, "decompression_time": 0} #payload_chars are counted after permessage-deflate inflates the frame, not wire bytes
        
     def stop(self):
         self.cancel_token.set()
+        self.dispatch_queue.close()
+
+        with self.lock:
+            for future in self.pending_requests.values():
+                future.cancel()
+
+            self.pending_requests.clear()
   
     def toggle(self):
         if self.paused_event.is_set():
@@ -32,34 +62,103 @@ class MarketDataSocket(threading.Thread):
         else:
             self.paused_event.set()
 
-    def send_request_no_wait(self, request: str):
-        if self.is_alive():
-            #print("Sending request: " + request) #DELETE
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                loop = asyncio.new_event_loop()  # Create a new event loop
-                asyncio.set_event_loop(loop)  # Set it as the current loop
-                future = executor.submit(loop.run_until_complete, self.send_request(request))  # Run async_task() inside the executor
-                result = future.result()  # Get the result from the future
+    #Safe from any thread; hands the frame to the socket's own loop without waiting for it to go out
+    #With a request_id the returned future resolves to the node's result for it (e.g. the subscription id) or raises SocketRequestError
+    def send_request_no_wait(self, request: str, request_id: int = None)->concurrent.futures.Future:
+        ret_future = self.track_request(request_id)
+        loop = self.loop
+
+        if loop and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.send_request(request), loop)
+        #else sent once connected if the subclass replays it from _init
+
+        return ret_future
+
+    #Returns a future for the response to request_id (already resolved if there's no id to wait on)
+    def track_request(self, request_id: int = None)->concurrent.futures.Future:
+        ret_future = concurrent.futures.Future()
+
+        if request_id is None:
+            ret_future.set_result(None)
+        else:
+            with self.lock:
+                self.pending_requests[request_id] = ret_future
+
+        return ret_future
     
     async def send_request(self, request: str):
         await self.write_queue.put(request)
 
+    def cancel_request(self, request_id: int):
+        with self.lock:
+            future = self.pending_requests.pop(request_id, None)
+
+        if future:
+            future.cancel()
+
+    #Resolves the future waiting on this response; returns False if nobody was waiting
+    def resolve_request(self, json_data: dict)->bool:
+        request_id = json_data.get('id')
+
+        if request_id is None or len(self.pending_requests) == 0:
+            return False
+
+        with self.lock:
+            future = self.pending_requests.pop(request_id, None)
+
+        if not future or future.done():
+            return False
+
+        if 'error' in json_data:
+            future.set_exception(SocketRequestError(json_data['error'].get('message', str(json_data['error']))))
+        else:
+            future.set_result(json_data.get('result'))
+
+        return True
+
+    def get_dispatch_stats(self)->dict:
+        return self.dispatch_queue.get_stats()
+
+    def get_transport_stats(self)->dict:
+        stats = dict(self.transport_stats, compression=self.compression)
+        stats["zstd_ratio"] = stats["decompressed_bytes"]/stats["compressed_bytes"] if stats["compressed_bytes"] > 0 else 0
+
+        return stats
+
+    def get_send_stats(self)->dict:
+        return {"frames": self.num_frames_sent, "bursts": self.num_bursts, "max_burst": self.max_burst,
+                "queued": self.write_queue.qsize(), "pending_responses": len(self.pending_requests)}
+
     async def _ping(self):
         if self.websocket:
             while not self.cancel_token.is_set():
                 try:
                     #print(f"Pinging {self.wss_uri}")
-                    await self.websocket.send(json.dumps(self.get_ping_request()))                
+                    await self.websocket.send(self.json_codec.dumps(self.get_ping_request()))                
                     await asyncio.sleep(30)   
                 except Exception as e:
                     print(f"Error sending ping: {e}")
           
+    #Drains whatever queued up behind the first frame and writes it as one burst
     async def _send_requests(self):
         try:
             while not self.cancel_token.is_set():
-                request = await self.write_queue.get()
-                if request:
+                burst = [await self.write_queue.get()]
+
+                while len(burst) < self.max_burst_size and not self.write_queue.empty():
+                    burst.append(self.write_queue.get_nowait())
+
+                burst = [request for request in burst if request]
+
+                for request in burst:
                     await self.websocket.send(request)
+
+                if len(burst) > 0:
+                    self.num_frames_sent += len(burst)
+                    self.num_bursts += 1
+                    self.max_burst = max(self.max_burst, len(burst))
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             print("Error in _send_requests " + str(e))
 
@@ -72,9 +171,10 @@ class MarketDataSocket(threading.Thread):
         while not self.cancel_token.is_set():
             tasks = []
             try:
-                async with websockets.connect(self.wss_uri, ping_interval = ping_interval) as websocket:
+                async with websockets.connect(self.wss_uri, ping_interval = ping_interval, compression = self.compression) as websocket:
                     #print("Socket initialized " + self.wss_uri) #DELETE
                     self.websocket = websocket
+                    self.connected_at = time.perf_counter()
             
                     logging.getLogger('websockets.client').setLevel(logging.ERROR)
         
@@ -91,11 +191,16 @@ class MarketDataSocket(threading.Thread):
             except Exception as e:
                 print("Error with websocket " + str(e))
             finally:
-                if self.cancel_token.is_set():
-                    await self.write_queue.put(None) #Make _send_requests kick out of blocking state
-                    for task in tasks:
-                        task.cancel() #TODO this doesn't work
-                        tasks.clear()
+                if self.websocket:
+                    self.disconnected_at = time.perf_counter()
+                    self.num_reconnects += 1
+
+                self.websocket = None
+
+                for task in tasks: #A reconnect starts its own writer; a stale one would eat frames meant for the new connection
+                    task.cancel()
+
+                tasks.clear()
           
     async def _read_socket(self):        
         while not self.cancel_token.is_set():
@@ -103,10 +208,38 @@ class MarketDataSocket(threading.Thread):
                 received = await self.websocket.recv()
 
                 if received:
-                    self.process_data(received)
+                    self.transport_stats["frames"] += 1
+                    self.transport_stats["payload_chars"] += len(received)
+                    key, droppable = self.get_frame_key(received)
+
+                    if not self.dispatch_queue.offer(received, key, droppable): #Full under BLOCK; wait off the loop so pings and writes keep going
+                        await asyncio.to_thread(self.dispatch_queue.put, received, key, droppable)
+
+    #Returns (coalesce key, droppable) without parsing the frame; responses to our own requests have no method and are never dropped
+    def get_frame_key(self, frame: str)->tuple:
+        return None, isinstance(frame, str) and '"method"' in frame
+
+    def _dispatch(self):
+        MessageDecoder.set_decode_stats(self.transport_stats)
+
+        while True:
+            frame = self.dispatch_queue.get()
+
+            if frame is None: #Closed
+                break
+
+            try:
+                self.process_data(frame)
+            except Exception as e:
+                print(f"{self.name}: Error processing data {e}")
+
+    async def _run(self):
+        self.loop = asyncio.get_running_loop()
+        await self.connect()
 
     def run(self):
-        asyncio.run(self.connect())
+        threading.Thread(target=self._dispatch, name=self.name + "-dispatch", daemon=True).start()
+        asyncio.run(self._run())
 
     @abstractmethod
     def _init(self):
@@ -5,12 +5,14 @@ from TokenInfoRetriever import TokenInfoRetriever
 from TxDefi.Data.TransactionInfo import *
 from TxDefi.Data.TokenPoolStates import TokenPoolStates
 from TxDefi.Data.MarketDTOs import *
-from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscriptionPool import AccountSubscriptionPool
 from TxDefi.DataAccess.Blockchains.Solana.RiskAssessor import Risk, RiskAssessor
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
 from TxDefi.Managers.WalletTracker import WalletTracker
 from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
+from TxDefi.Utilities.LatestValueCoalescer import LatestValueCoalescer
 from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import SolanaLogsDecoder
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import SplTokenAccount
 import TxDefi.Utilities.LoggerUtil as logger_util
 import TxDefi.Data.Globals as globals
 
@@ -29,7 +31,10 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
     acceptable_lp_risk = Risk.NONE #Won't pass added liquidity new mints through unless risk is acceptable
 
     def __init__(self, solana_rpc_api: SolanaRpcApi, info_retriever: TokenInfoRetriever, 
-                 pump_logs_decoder: SolanaLogsDecoder, risk_assessor: RiskAssessor):
+                 pump_logs_decoder: SolanaLogsDecoder, risk_assessor: RiskAssessor,
+                 max_subscriptions_per_socket: int = AccountSubscriptionPool.default_max_subscriptions,
+                 max_sockets: int = AccountSubscriptionPool.default_max_sockets, account_flush_interval: float = LatestValueCoalescer.default_interval,
+                 compression: str = AccountSubscriptionPool.deflate_compression, account_encoding: str = None):
         AbstractSubscriber. __init__(self)
         self.token_pools: dict[str, TokenPoolStates] = {}
         self.monitored_tokens: dict[str, TokenInfo] = {}
@@ -41,14 +46,20 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
         self.solana_rpc_api = solana_rpc_api    
 
         self.risk_assessor = risk_assessor
-        self.token_balance_change_socket = AccountSubscribeSocket(solana_rpc_api.wss_uri, "tam_token_balance", False)
-        self.sol_balance_change_socket = AccountSubscribeSocket(solana_rpc_api.wss_uri, "tam_sol_balance", False)
-        self.token_balance_tracker = WalletTracker(self.token_balance_change_socket, solana_rpc_api)
-        self.sol_balance_tracker = WalletTracker(self.sol_balance_change_socket, solana_rpc_api)
+        #Two vault subscriptions per bonded token; each pool opens more connections as the ones it has fill up
+        self.token_balance_change_socket = AccountSubscriptionPool(solana_rpc_api.wss_uri, "tam_token_balance", max_subscriptions_per_socket, max_sockets,
+                                                                   compression=compression, account_encoding=account_encoding)
+        self.sol_balance_change_socket = AccountSubscriptionPool(solana_rpc_api.wss_uri, "tam_sol_balance", max_subscriptions_per_socket, max_sockets,
+                                                                 compression=compression, account_encoding=account_encoding)
+        #Vault updates are coalesced per account, so a hot token publishes topic_token_update_event once per flush rather than once per trade
+        self.token_balance_tracker = WalletTracker(self.token_balance_change_socket, solana_rpc_api, account_flush_interval)
+        self.sol_balance_tracker = WalletTracker(self.sol_balance_change_socket, solana_rpc_api, account_flush_interval)
         self.new_mints_paused = False
         self.pump_logs_decoder = pump_logs_decoder
         self.subbed_topics : list[str] = []
         self.saved_transactions : dict[str, ParsedTransaction] = {} #TODO keep the list size small so reduce memory footprint
+        self.is_shedding = False #True while the rpc breakers are open; discovery work is dropped so tracked tokens keep their budget
+        self.num_shed_events = 0
 
     def _update_new_token_task(self, token_address: str, max_tries = 10, interval = 10):
         success = False
@@ -215,11 +226,9 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
             if token_balance:
                 token_info.token_vault_amount = token_balance
 
+    #Re-prime every monitored vault in one fan out (e.g. after the balance sockets reconnect)
     def _init(self):
-        token_addresses = list(self.monitored_tokens.keys())
-
-        for token_address in token_addresses:
-            self.monitor_token(token_address)
+        self.token_info_retriever.update_all_token_vaults(list(self.monitored_tokens.values()))
     
     def find_instruction(self, transaction: ParsedTransaction, event_type: TradeEventType)->InstructionData | MarketAlert: #FIXME shouldn't be returning 2 different types
         for instruction in transaction.instructions:
@@ -265,10 +274,32 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
         pub.sendMessage(topicName=globals.topic_parsed_tx_data, arg1=data)
 
     def process_incoming_data(self, data_list: list[MarketAlert | InstructionData]):
+        self._update_shedding()
+
         for data in data_list:
-            if not self.new_mints_paused or data.get_type() != TradeEventType.NEW_MINT:    
+            if self.is_shedding and self._is_sheddable(data):
+                self.num_shed_events += 1
+            elif not self.new_mints_paused or data.get_type() != TradeEventType.NEW_MINT:    
                 self._process_mint_data(data)
 
+    def _update_shedding(self):
+        is_degraded = self.solana_rpc_api.is_degraded()
+
+        if is_degraded != self.is_shedding:
+            self.is_shedding = is_degraded
+            message = "RPC degraded; pausing new token discovery" if is_degraded else f"RPC recovered; resuming new token discovery ({self.num_shed_events} events shed)"
+            print("TokenAccountsMonitor: " + message)
+            logger_util.logger.info(message)
+
+    #Discovery of tokens we aren't tracking yet costs rpc calls; updates to tracked tokens don't
+    def _is_sheddable(self, data: MarketAlert | InstructionData)->bool:
+        if data.get_type() == TradeEventType.NEW_MINT:
+            return True
+        elif data.get_type() == TradeEventType.ADD_LIQUIDITY:
+            return data.token_address not in self.token_pools
+
+        return False
+
     def add_new_pool(self, token_info: TokenInfo):
         token_pool_states = self.token_pools.get(token_info.token_address)
 
@@ -409,7 +440,9 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
         if vault_balances:
             token_info = self.get_token_info(vault_balances.token_address)
 
-            if isinstance(account_info.account_data, dict): #Check if there's token amounts
+            if isinstance(account_info.account_data, SplTokenAccount): #Binary encoded vault; amounts are already scaled
+                self._update_vault_balance(vault_balances, token_info, account_info.account_data.mint, account_info.account_data.amount, Value_Type.SCALED)
+            elif isinstance(account_info.account_data, dict): #Check if there's token amounts
                 info = account_info.account_data.get('parsed', {}).get('info')
 
                 if info:
@@ -417,19 +450,27 @@ class TokenAccountsMonitor(AbstractSubscriber[AccountInfo]):
                     token_amount = info.get('tokenAmount')
                 
                     if mint_address and token_amount:
-                        ui_amount = token_amount.get('uiAmount') 
-                        if mint_address == solana_utilites.WRAPPED_SOL_MINT_ADDRESS:
-                            vault_balances.sol_balance.set_amount2(ui_amount, Value_Type.UI)
-                            token_info.sol_vault_amount = vault_balances.sol_balance
-                        else:
-                            vault_balances.token_balance.set_amount2(ui_amount, Value_Type.UI)
-                            token_info.token_vault_amount = vault_balances.token_balance
-                            #print("Token vault balance changed for " + vault_balances.token_address) #Only need one notification per pair
-                            pub.sendMessage(topicName=globals.topic_token_update_event, arg1=vault_balances.token_address)
+                        self._update_vault_balance(vault_balances, token_info, mint_address, token_amount.get('uiAmount'), Value_Type.UI)
             else: #Must be just a sol account
                 vault_balances.sol_balance.set_amount(account_info.balance)
                 token_info.sol_vault_amount = vault_balances.sol_balance
+
+    def _update_vault_balance(self, vault_balances: VaultBalances, token_info: TokenInfo, mint_address: str, amount: float, value_type: Value_Type):
+        if mint_address == solana_utilites.WRAPPED_SOL_MINT_ADDRESS:
+            vault_balances.sol_balance.set_amount2(amount, value_type)
+            token_info.sol_vault_amount = vault_balances.sol_balance
+        else:
+            vault_balances.token_balance.set_amount2(amount, value_type)
+            token_info.token_vault_amount = vault_balances.token_balance
+            #print("Token vault balance changed for " + vault_balances.token_address) #Only need one notification per pair
+            pub.sendMessage(topicName=globals.topic_token_update_event, arg1=vault_balances.token_address)
                             
+    def get_coalescing_stats(self)->dict[str, dict]:
+        return {"token_vaults": self.token_balance_tracker.get_coalescing_stats(), "sol_vaults": self.sol_balance_tracker.get_coalescing_stats()}
+
+    def get_subscription_loads(self)->dict[str, list[dict]]:
+        return {"token_vaults": self.token_balance_change_socket.get_loads(), "sol_vaults": self.sol_balance_change_socket.get_loads()}
+
     #This is called by our Wallet Tracker
     def update(self, data: AccountInfo):
         self._process_account_info(data)
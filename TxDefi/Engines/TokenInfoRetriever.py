@@ -1,6 +1,10 @@
 from typing import TypeVar, Generic
 import base64
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.AsyncSolanaRpcApi import AsyncSolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import RpcResponseCache, CachePolicy
+from TxDefi.Utilities.SingleFlight import SingleFlight
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import SplTokenAccount, spl_account_decoder
 from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
 from TxDefi.DataAccess.Decoders.PumpDataDecoder import PumpDataDecoder, BondingCurveData
 from TxDefi.Data.MarketDTOs import *
@@ -14,11 +18,16 @@ import TxDefi.Data.Globals as globals
 T = TypeVar("T", bound=InstructionData)  # Generic type Key Pair Type
 
 class TokenInfoRetriever:
-    def __init__(self, solana_rpc_api: SolanaRpcApi, pump_decoder: PumpDataDecoder, transaction_decoder: TransactionsDecoder, use_backup_rpc = False):
+    mint_info_key = "mintInfo" #Response cache prefix for decoded mint fields; not an rpc method
+
+    def __init__(self, solana_rpc_api: SolanaRpcApi, pump_decoder: PumpDataDecoder, transaction_decoder: TransactionsDecoder, use_backup_rpc = False,
+                 async_rpc_api: AsyncSolanaRpcApi = None):
         self.solana_rpc_api = solana_rpc_api
+        self.async_rpc_api = async_rpc_api
         self.pump_decoder = pump_decoder
         self.transaction_decoder = transaction_decoder
         self.use_backup_rpc = use_backup_rpc
+        self.single_flight = SingleFlight() #Callers asking for the same mint at once share one lookup
     
     @staticmethod
     def fetch_and_fill_inner_metadata(metadata: ExtendedMetadata, inner_uri: str)->bool:
@@ -58,6 +67,28 @@ class TokenInfoRetriever:
 
         return inner_asset_data is not None
 
+    #Decimals, program and authorities cached as IMMUTABLE along with the current supply, which only ever comes from a slot fresh call
+    def get_mint_info(self, token_address: str)->tuple[dict, Amount]:
+        response_cache = self.solana_rpc_api.response_cache
+        cache_key = RpcResponseCache.get_key(self.mint_info_key, [token_address])
+        is_cached, mint_info = response_cache.get(cache_key, CachePolicy.IMMUTABLE)
+
+        if is_cached:
+            return mint_info, self.solana_rpc_api.get_token_supply_Amount(token_address, 3)
+
+        asset_data = self.solana_rpc_api.get_account_info(token_address, 3)
+        value = asset_data.get('value') if asset_data else None
+        token_info_dict = value.get('data', {}).get('parsed', {}).get('info') if value else None
+
+        if not token_info_dict:
+            return None, None
+
+        mint_info = {'decimals': token_info_dict.get('decimals'), 'program': value.get('owner'),
+                     'mintAuthority': token_info_dict.get('mintAuthority'), 'freezeAuthority': token_info_dict.get('freezeAuthority')}
+        response_cache.put(cache_key, mint_info, CachePolicy.IMMUTABLE)
+
+        return mint_info, Amount.tokens_scaled(int(token_info_dict.get('supply', 0)), mint_info['decimals'])
+
     #Most complete metadata; some metadata won't get filled out from the transactions themselves; use this to get everything possible
     #just can't get vault information
     def get_complete_metadata_from_account_info(self, token_address: str)->ExtendedMetadata:
@@ -65,68 +96,55 @@ class TokenInfoRetriever:
         #    return self.tokens_metadata[token_address]
  
         try:
-            asset_data = self.solana_rpc_api.get_account_info(token_address, 3)
-
-            if asset_data:
-                has_token_supply_info = False                
-                value = asset_data.get('value')       
-
-                if value:   
-                    token_info_dict = value.get('data', {}).get('parsed', {}).get('info')
-
-                    if token_info_dict:
-                        has_token_supply_info = True
-                        supply = int(token_info_dict.get('supply', 0))
-                        decimals = token_info_dict.get('decimals')    
-                        supply_amount = Amount.tokens_scaled(supply, decimals)  
-                    else: #Have to query it (this should be rare)
-                        supply_amount = self.solana_rpc_api.get_token_supply_Amount(token_address, 3)
-
-                    token_program_address = value.get('owner')  
-                    if has_token_supply_info:
-                        #Just reuse what's in our records if available
-                        ext_metadata = ExtendedMetadata(token_address)
-                        ext_metadata.freeze_authority = token_info_dict.get('freezeAuthority')
-                        ext_metadata.mint_authority = token_info_dict.get('mintAuthority')
-                        ext_metadata.token_program_address = token_program_address 
-                        ext_metadata.token_decimals = decimals  
-                        ext_metadata.supply = supply_amount
-                        #ext_metadata.is_mutable = asset_data.get('mutable') #unavailable; helius has these with getAsset
-                        #ext_metadata.is_burnt = asset_data.get('burnt')
-                        #ownership = ext_metadata.is_frozen = asset_data.get('ownership', {})
-                        #ext_metadata.is_frozen = ownership.get('frozen')
-                        #ext_metadata.is_delegated = ownership.get('delegated', False)
-                        #ext_metadata.royalty = asset_data.get('royalty', {}).get('percent')    
-                                    
-                        #metadata = asset_data.get('content', {}).get('metadata', {})
-                        #ext_metadata.name = metadata.get('name', '')
-                        #ext_metadata.symbol = metadata.get('symbol', '')
+            mint_info, supply_amount = self.get_mint_info(token_address)
+
+            if mint_info:
+                #Just reuse what's in our records if available
+                ext_metadata = ExtendedMetadata(token_address)
+                ext_metadata.freeze_authority = mint_info.get('freezeAuthority')
+                ext_metadata.mint_authority = mint_info.get('mintAuthority')
+                ext_metadata.token_program_address = mint_info.get('program')
+                ext_metadata.token_decimals = mint_info.get('decimals')
+                ext_metadata.supply = supply_amount
+                #ext_metadata.is_mutable = asset_data.get('mutable') #unavailable; helius has these with getAsset
+                #ext_metadata.is_burnt = asset_data.get('burnt')
+                #ownership = ext_metadata.is_frozen = asset_data.get('ownership', {})
+                #ext_metadata.is_frozen = ownership.get('frozen')
+                #ext_metadata.is_delegated = ownership.get('delegated', False)
+                #ext_metadata.royalty = asset_data.get('royalty', {}).get('percent')    
+                            
+                #metadata = asset_data.get('content', {}).get('metadata', {})
+                #ext_metadata.name = metadata.get('name', '')
+                #ext_metadata.symbol = metadata.get('symbol', '')
         
-                        #inner_uri = asset_data.get('content', {}).get('json_uri', '')  
-                        #ext_metadata.inner_metadata_uri = inner_uri
+                #inner_uri = asset_data.get('content', {}).get('json_uri', '')  
+                #ext_metadata.inner_metadata_uri = inner_uri
 
-                        #if len(inner_uri) > 0:
-                        #    self.fill_inner_metadata(ext_metadata, inner_uri)
-                        
-                        #getLargestAccounts issue: Retrieval fails if we do it too soon
-                        #token_info = self.get_token_info(token_address)
+                #if len(inner_uri) > 0:
+                #    self.fill_inner_metadata(ext_metadata, inner_uri)
+                
+                #getLargestAccounts issue: Retrieval fails if we do it too soon
+                #token_info = self.get_token_info(token_address)
 
-                        token_info = self.get_token_info(token_address)
+                token_info = self.get_token_info(token_address)
         
-                        if token_info: #Keep our vault addresses populated if possible
-                            ext_metadata.sol_vault_address = token_info.metadata.sol_vault_address
-                            ext_metadata.token_vault_address = token_info.metadata.token_vault_address
-                        
-                        return ext_metadata
-                    else:
-                        print("TokenInfoRetriever: Can't process " + token_address + ". Check your RPC Node.")
+                if token_info: #Keep our vault addresses populated if possible
+                    ext_metadata.sol_vault_address = token_info.metadata.sol_vault_address
+                    ext_metadata.token_vault_address = token_info.metadata.token_vault_address
+                
+                return ext_metadata
+            else:
+                print("TokenInfoRetriever: Can't process " + token_address + ". Check your RPC Node.")
         except Exception as e:
             print("TokenInfoRetriever: Error retrieving token metadata " + str(e))
 
     def get_complete_metadata(self, token_address: str)->ExtendedMetadata: 
+        return self.single_flight.do(("get_complete_metadata", token_address), self._get_complete_metadata, token_address)
+
+    def _get_complete_metadata(self, token_address: str)->ExtendedMetadata: 
         try:            
             token_pda_address = metaplex_util.get_metadata_pda(token_address)
-            account_info = self.solana_rpc_api.get_account_info(token_pda_address) #FYI getAsset by Helius seems to be faster than this; may revert back if this causes issues; Should only effect the display
+            account_info = self.solana_rpc_api.get_account_info(token_pda_address, cache_policy=CachePolicy.TTL) #FYI getAsset by Helius seems to be faster than this; may revert back if this causes issues; Should only effect the display
 
             if account_info and account_info.get('value') is not None:
                 decoded_data = base64.b64decode(account_info['value']['data'][0])
@@ -192,42 +210,110 @@ class TokenInfoRetriever:
             return self.supported_programs[owner].decode(value)
         
     def update_token_vaults(self, token_info: TokenInfo):
-        if len(token_info.metadata.sol_vault_address) > 0 and len(token_info.metadata.token_vault_address) > 0: 
-            account_info = self.solana_rpc_api.get_account_info(token_info.metadata.sol_vault_address, 3)
-  
-            if account_info and account_info.get("value") is not None:
-                value = account_info.get("value")
-                owner = value.get("owner")
-
-                if owner and owner == self.pump_decoder.program_address:  #Pump        
-                    instruction_data = self.pump_decoder.decode(value)
-                
-                    if isinstance(instruction_data, BondingCurveData):
-                        token_info.metadata.program_type = SupportedPrograms.PUMPFUN
-                        sol_vault_scaled_amount = instruction_data.virtual_sol_reserves
-                        token_vault_scaled_amount = instruction_data.virtual_token_reserves
+        self.update_all_token_vaults([token_info])
+
+    async def update_token_vaults_async(self, token_info: TokenInfo):
+        accounts = await self.async_rpc_api.get_multiple_accounts(self._get_vault_addresses([token_info]), *self._get_vault_fetch_options(), max_tries=3)
+        self._apply_vault_accounts(token_info, accounts)
+
+    #Refresh many tokens with getMultipleAccounts (both vaults of 50 tokens per call) sent as one batch; blocking, so never call it from the async api's loop
+    def update_all_token_vaults(self, token_infos: list[TokenInfo]):
+        vault_addresses = self._get_vault_addresses(token_infos)
+
+        if len(vault_addresses) == 0:
+            return
+        
+        parsers, encoding = self._get_vault_fetch_options()
+        accounts = self.solana_rpc_api.get_multiple_accounts(vault_addresses, parsers, 3, encoding) #Try a few times as these tokens may be new
+
+        for token_info in token_infos:
+            self._apply_vault_accounts(token_info, accounts)
 
-                        token_info.metadata.supply.set_amount2(instruction_data.token_total_supply , Value_Type.SCALED) 
-                else: #Ray
-                    sol_vault_scaled_amount = self.solana_rpc_api.get_account_balance(token_info.metadata.sol_vault_address, 3)
-                    token_vault_scaled_amount = self.solana_rpc_api.get_token_account_balance(token_info.metadata.token_vault_address, 3).to_scaled() #Try a few times as this token may be new
+    #Vault token accounts come back as SplTokenAccount when the api is set to binary encoding
+    def _get_vault_fetch_options(self)->tuple[dict, str]:
+        if self.solana_rpc_api.account_encoding == SolanaRpcApi.base64_encoding:
+            return spl_account_decoder.get_parsers(), SolanaRpcApi.base64_encoding
+        else:
+            return None, SolanaRpcApi.json_parsed_encoding
+
+    @staticmethod
+    def _get_vault_addresses(token_infos: list[TokenInfo])->list[str]:
+        ret_addresses = []
+
+        for token_info in token_infos:
+            if TokenInfoRetriever._has_vault_addresses(token_info):
+                ret_addresses.extend([token_info.metadata.sol_vault_address, token_info.metadata.token_vault_address])
+
+        return ret_addresses
+
+    def _apply_vault_accounts(self, token_info: TokenInfo, accounts: dict[str, dict]):
+        if self._has_vault_addresses(token_info):
+            sol_vault_value = accounts.get(token_info.metadata.sol_vault_address)
+
+            if isinstance(sol_vault_value, SplTokenAccount): #Wrapped SOL vault
+                self._set_vault_amounts(token_info, sol_vault_value.amount, self._get_token_vault_scaled_amount(accounts.get(token_info.metadata.token_vault_address)))
+            elif sol_vault_value is not None:
+                if not self._update_from_bonding_curve(token_info, sol_vault_value): #Ray
+                    self._set_vault_amounts(token_info, sol_vault_value.get('lamports'), self._get_token_vault_scaled_amount(accounts.get(token_info.metadata.token_vault_address)))
+
+    @staticmethod
+    def _get_token_vault_scaled_amount(token_vault_value: dict | SplTokenAccount)->int:
+        if isinstance(token_vault_value, SplTokenAccount):
+            return token_vault_value.amount
+        
+        token_vault_amount = SolanaRpcApi.parse_token_account_amount(token_vault_value)
 
-                if sol_vault_scaled_amount and token_vault_scaled_amount:
-                    token_info.sol_vault_amount.set_amount2(sol_vault_scaled_amount, Value_Type.SCALED)
-                    token_info.token_vault_amount.set_amount2(token_vault_scaled_amount, Value_Type.SCALED)
+        return token_vault_amount.to_scaled() if token_vault_amount else None
+
+    @staticmethod
+    def _has_vault_addresses(token_info: TokenInfo)->bool:
+        return len(token_info.metadata.sol_vault_address) > 0 and len(token_info.metadata.token_vault_address) > 0
+
+    #Returns True if the sol vault is a Pump bonding curve and the reserves were taken from it
+    def _update_from_bonding_curve(self, token_info: TokenInfo, value: dict)->bool:
+        owner = value.get("owner")
+
+        if owner and owner == self.pump_decoder.program_address:  #Pump        
+            instruction_data = self.pump_decoder.decode(value)
+        
+            if isinstance(instruction_data, BondingCurveData):
+                token_info.metadata.program_type = SupportedPrograms.PUMPFUN
+                token_info.metadata.supply.set_amount2(instruction_data.token_total_supply , Value_Type.SCALED) 
+                self._set_vault_amounts(token_info, instruction_data.virtual_sol_reserves, instruction_data.virtual_token_reserves)
+
+            return True
+        
+        return False
+
+    @staticmethod
+    def _set_vault_amounts(token_info: TokenInfo, sol_vault_scaled_amount: int, token_vault_scaled_amount: int):
+        if sol_vault_scaled_amount and token_vault_scaled_amount:
+            token_info.sol_vault_amount.set_amount2(sol_vault_scaled_amount, Value_Type.SCALED)
+            token_info.token_vault_amount.set_amount2(token_vault_scaled_amount, Value_Type.SCALED)
 
     def get_token_info(self, token_address: str, is_token_bonding = False)->TokenInfo:
+        return self.single_flight.do(("get_token_info", token_address, is_token_bonding), self._get_token_info, token_address, is_token_bonding)
+
+    def _get_token_info(self, token_address: str, is_token_bonding: bool)->TokenInfo:
         try:
             #Check if it's a Pumpfun Address (Add in other AMM support as needed)
             #TODO Revisit, getting data from market address may be more efficient
             top_accounts = self.solana_rpc_api.get_token_largest_accounts(token_address, 5)
+            token_vault_owners = self.solana_rpc_api.get_spl_account_owners([token_account.account_address for token_account in top_accounts], cache_policy=CachePolicy.TTL) #e.g. bonding curves
+            owner_account_infos : dict[str, dict] = {}
 
-            for token_account in top_accounts:                    
-                token_vault_owner = self.solana_rpc_api.get_spl_account_owner(token_account.account_address)
-                
-                if not is_token_bonding: #Last resort, expensive so caller should thread this (Pump)
-                    account_info = self.solana_rpc_api.get_account_info(token_vault_owner)
-                    value = account_info.get('value', {})
+            if not is_token_bonding: #Last resort, expensive so caller should thread this (Pump); fetch every owner in one batch
+                unique_owners = list(dict.fromkeys([owner for owner in token_vault_owners if owner]))
+                owner_account_infos = dict(zip(unique_owners, self.solana_rpc_api.get_account_infos(unique_owners)))
+
+            for token_account, token_vault_owner in zip(top_accounts, token_vault_owners):                    
+                if not is_token_bonding:
+                    account_info = owner_account_infos.get(token_vault_owner)
+
+                    if not account_info:
+                        continue
+
+                    value = account_info.get('value') or {}
                     owner = value.get('owner', "")
                     data_decoder = self.transaction_decoder.get_instructions_decoder(owner)
             
@@ -247,8 +333,7 @@ class TokenInfoRetriever:
                                 creator_address = decoded_data.creator_address
                                 program = SupportedPrograms.PUMPFUN                                
                             elif isinstance(decoded_data, LiquidityPoolData):
-                                sol_reserves = self.solana_rpc_api.get_token_account_balance(decoded_data.pool_quote_address, 3)
-                                token_reserves = self.solana_rpc_api.get_token_account_balance(decoded_data.pool_base_address, 3)
+                                sol_reserves, token_reserves = self.solana_rpc_api.get_token_account_balances([decoded_data.pool_quote_address, decoded_data.pool_base_address], 3)
                                 supply = decoded_data.total_supply  #TODO may need to pull this later
                                 sol_vault_account = decoded_data.pool_quote_address
                                 creator_address = decoded_data.coin_creator_address
@@ -0,0 +1,193 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from typing import Generator
+from jsonrpcclient import Ok
+from TxDefi.Data.TransactionInfo import ParsedTransaction
+from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import CachePolicy
+from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
+from TxDefi.Utilities.RateLimiter import RatePriority
+
+#Where a backfill of an address left off; everything newer than before has already been streamed out
+class BackfillCheckpoint:
+    def __init__(self, address: str, until: str = None):
+        self.address = address
+        self.before : str = None #Oldest signature streamed so far; the next page starts below it
+        self.until = until #Stop once this signature is reached (e.g. the newest_signature of an earlier complete backfill)
+        self.newest_signature : str = None #First signature seen; pass as until to pick up only what's new next time
+        self.failed_signatures : list[str] = [] #Never answered; retried first when resuming
+        self.num_signatures = 0
+        self.num_transactions = 0
+        self.completed = False
+
+    def to_dict(self)->dict:
+        return {"address": self.address, "before": self.before, "until": self.until, "newest_signature": self.newest_signature,
+                "failed_signatures": self.failed_signatures, "num_signatures": self.num_signatures, "num_transactions": self.num_transactions,
+                "completed": self.completed}
+
+    @staticmethod
+    def from_dict(values: dict)->"BackfillCheckpoint":
+        ret_checkpoint = BackfillCheckpoint(values['address'], values.get('until'))
+        ret_checkpoint.before = values.get('before')
+        ret_checkpoint.newest_signature = values.get('newest_signature')
+        ret_checkpoint.failed_signatures = values.get('failed_signatures', [])
+        ret_checkpoint.num_signatures = values.get('num_signatures', 0)
+        ret_checkpoint.num_transactions = values.get('num_transactions', 0)
+        ret_checkpoint.completed = values.get('completed', False)
+
+        return ret_checkpoint
+
+    def save(self, path: str):
+        temp_path = path + ".tmp"
+
+        with open(temp_path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+        os.replace(temp_path, path) #A crash mid-write never leaves a torn checkpoint
+
+    @staticmethod
+    def load(path: str)->"BackfillCheckpoint":
+        try:
+            with open(path, "r") as file:
+                return BackfillCheckpoint.from_dict(json.load(file))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"BackfillCheckpoint: Couldn't load {path}. Error: {e}")
+
+#Streams an address's history as ParsedTransactions, newest first
+#Signature pages are walked with before cursors while getTransaction batches for the current page run on a worker pool;
+#every call waits its turn at the shared rate limiter at background priority so trading traffic is never starved
+class TransactionBackfiller:
+    default_max_workers = 8
+    signatures_page_size = 1000 #getSignaturesForAddress limit per call
+    default_transactions_per_batch = 25 #getTransaction responses are large; keep batches small
+
+    def __init__(self, solana_rpc_api: SolanaRpcApi, transactions_decoder: TransactionsDecoder, max_workers: int = default_max_workers,
+                 transactions_per_batch: int = default_transactions_per_batch):
+        self.solana_rpc_api = solana_rpc_api
+        self.transactions_decoder = transactions_decoder
+        self.max_workers = max_workers
+        self.transactions_per_batch = transactions_per_batch
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def get_signatures_page(self, address: str, before: str, until: str)->list[dict]:
+        return self.solana_rpc_api.get_signatures_for_address(address, None, self.signatures_page_size, before, until, 3)
+
+    #Returns the decoded transactions in the order requested and the signatures that never got an answer
+    def fetch_transactions(self, signatures: list[str])->tuple[list[ParsedTransaction], list[str]]:
+        ret_transactions : list[ParsedTransaction] = []
+        failed_signatures = []
+        rpc_requests = [("getTransaction", SolanaRpcApi.get_transaction_params(signature)) for signature in signatures]
+        #Bypass the response cache so a large backfill doesn't evict what the live paths rely on
+        results = self.solana_rpc_api.run_rpc_batch(rpc_requests, 3, priority=RatePriority.BACKGROUND, cache_policy=CachePolicy.NONE)
+
+        for signature, result in zip(signatures, results):
+            if not isinstance(result, Ok):
+                failed_signatures.append(signature)
+            elif result.result: #None if the node has pruned it
+                try:
+                    parsed_transaction = self.transactions_decoder.decode(result.result)
+
+                    if parsed_transaction:
+                        ret_transactions.append(parsed_transaction)
+                except Exception as e:
+                    print(f"TransactionBackfiller: Couldn't decode {signature}. Error: {e}")
+
+        return ret_transactions, failed_signatures
+
+    def _record(self, checkpoint: BackfillCheckpoint, num_signatures: int, num_transactions: int, failed_signatures: list[str]):
+        checkpoint.num_signatures += num_signatures
+        checkpoint.num_transactions += num_transactions
+        checkpoint.failed_signatures.extend(failed_signatures)
+
+        with self.lock:
+            stats = self.stats.setdefault(checkpoint.address, {"signatures": 0, "transactions": 0, "failed": 0, "elapsed": 0})
+            stats["signatures"] += num_signatures
+            stats["transactions"] += num_transactions
+            stats["failed"] += len(failed_signatures)
+
+    #Resumes from checkpoint_path when it holds a checkpoint for this address and saves progress there after every page
+    #At least once: stopping partway through a batch replays that batch on resume
+    def backfill(self, address: str, until: str = None, max_signatures: int = None, checkpoint: BackfillCheckpoint = None,
+                 checkpoint_path: str = None)->Generator[ParsedTransaction, None, BackfillCheckpoint]:
+        if not checkpoint and checkpoint_path:
+            checkpoint = BackfillCheckpoint.load(checkpoint_path)
+
+        if not checkpoint or checkpoint.address != address:
+            checkpoint = BackfillCheckpoint(address, until)
+
+        if checkpoint.completed:
+            return checkpoint
+
+        executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        start_time = time.perf_counter()
+        num_signatures = 0
+
+        try:
+            retry_signatures = checkpoint.failed_signatures
+            checkpoint.failed_signatures = []
+            page_future = executor.submit(self.get_signatures_page, address, checkpoint.before, checkpoint.until)
+
+            for start in range(0, len(retry_signatures), self.transactions_per_batch):
+                chunk = retry_signatures[start:start+self.transactions_per_batch]
+                transactions, failed_signatures = self.fetch_transactions(chunk)
+                self._record(checkpoint, 0, len(transactions), failed_signatures)
+                yield from transactions
+
+            while page_future:
+                page = page_future.result()
+
+                if page is None:
+                    print(f"TransactionBackfiller: Couldn't get signatures for {address}; resume from the checkpoint to continue")
+                    break
+
+                is_history_end = len(page) < self.signatures_page_size
+
+                if max_signatures is not None and num_signatures+len(page) > max_signatures:
+                    page = page[:max_signatures-num_signatures]
+                    is_history_end = False
+
+                num_signatures += len(page)
+                is_last_page = is_history_end or (max_signatures is not None and num_signatures >= max_signatures)
+                #Fetch the next page while this one's transactions download
+                page_future = None if is_last_page else executor.submit(self.get_signatures_page, address, page[-1]['signature'], checkpoint.until)
+
+                if len(page) > 0 and not checkpoint.newest_signature:
+                    checkpoint.newest_signature = page[0]['signature']
+
+                chunks = [page[start:start+self.transactions_per_batch] for start in range(0, len(page), self.transactions_per_batch)]
+                chunk_futures = [executor.submit(self.fetch_transactions, [info['signature'] for info in chunk if not info.get('err')])
+                                 for chunk in chunks] #Failed transactions carry nothing to decode
+
+                for chunk, future in zip(chunks, chunk_futures): #In page order so the cursor only moves past what was streamed
+                    transactions, failed_signatures = future.result()
+                    self._record(checkpoint, len(chunk), len(transactions), failed_signatures)
+                    yield from transactions
+                    checkpoint.before = chunk[-1]['signature']
+
+                if checkpoint_path:
+                    checkpoint.save(checkpoint_path)
+
+                if is_history_end:
+                    checkpoint.completed = len(checkpoint.failed_signatures) == 0
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True) #The consumer may stop early
+
+            with self.lock:
+                if checkpoint.address in self.stats:
+                    self.stats[checkpoint.address]["elapsed"] += time.perf_counter()-start_time
+
+            if checkpoint_path:
+                checkpoint.save(checkpoint_path)
+
+        return checkpoint
+
+    def get_stats(self)->dict[str, dict]:
+        with self.lock:
+            return {address: dict(stats, transactions_per_second=stats["transactions"]/stats["elapsed"] if stats["elapsed"] > 0 else 0)
+                    for address, stats in self.stats.items()}
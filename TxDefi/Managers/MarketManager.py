@@ -25,6 +25,7 @@ class MarketManager(AbstractMarketManager):
         self.lp_monitor = accounts_monitor
         self.tx_event_queue = queue.Queue()
         self.tokens_locks : dict[str, threading.Lock] = {}
+        self.ata_owner_addresses : list[str] = [] #Wallets whose token accounts get derived as soon as a token is monitored
               
         self.auto_monitor_launches = False
         self.solana_price = Amount.sol_ui(0)
@@ -95,7 +96,26 @@ class MarketManager(AbstractMarketManager):
         if track_candles and token_address not in self.candlesticks:
             self.candlesticks[token_address] = Candlesticks(intervals=self.default_chart_intervals)
 
-        return self.lp_monitor.monitor_token(token_address)
+        token_info = self.lp_monitor.monitor_token(token_address)
+
+        if token_info and len(self.ata_owner_addresses) > 0:
+            self.precompute_associated_token_accounts(self.ata_owner_addresses, [token_info])
+
+        return token_info
+
+    #Register wallets (e.g. a wallet set's signers) and warm the derivation cache for every monitored token so the sell path never hashes
+    def add_ata_owners(self, owner_addresses: list[str])->int:
+        for owner_address in owner_addresses:
+            if owner_address not in self.ata_owner_addresses:
+                self.ata_owner_addresses.append(owner_address)
+
+        return self.precompute_associated_token_accounts(owner_addresses, list(self.lp_monitor.monitored_tokens.values()))
+
+    def precompute_associated_token_accounts(self, owner_addresses: list[str], token_infos: list[TokenInfo])->int:
+        mints = {token_info.token_address: token_info.metadata.token_program_address for token_info in token_infos
+                 if len(token_info.metadata.token_program_address) > 0}
+
+        return len(self.solana_rpc_api.get_associated_token_account_addresses(owner_addresses, mints))
 
     def stop_monitoring_token(self, token_address: str):
         if token_address in self.candlesticks:
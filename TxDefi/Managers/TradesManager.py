@@ -29,6 +29,7 @@ class TradesManager(AbstractTradesManager[ExecutableOrder], AbstractSubscriber[A
         self.trade_mode = trade_mode_settings.trade_mode
         self.default_wallet_settings = default_wallet_settings
         self.default_payer = self.default_wallet_settings.get_default_signer()
+        market_manager.add_ata_owners([wallet.get_account_address() for wallet in default_wallet_settings.signer_wallets])
 
         if self.trade_mode  == TradeMode.SIM:
             self.order_facet = SimOrderFacet(market_manager, self, default_wallet_settings, trade_mode_settings.default_amount)
@@ -340,7 +341,6 @@ class TradesManager(AbstractTradesManager[ExecutableOrder], AbstractSubscriber[A
     def _update_stats_task(self):
         while not self.cancel_token.is_set():
             total_unrealized_pnl = 0
-            self.solana_rpc_api.update_latest_block_hash() #Updates recent block hash every ten seconds
 
             trades = list(self.active_trades.values())
 
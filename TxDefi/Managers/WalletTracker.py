@@ -1,13 +1,18 @@
 from pubsub import pub
 import threading
 import json
+import concurrent.futures
+import time
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import *
 from TxDefi.Data.TransactionInfo import AccountInfo
 from TxDefi.Data.MarketEnums import *
 from TxDefi.DataAccess.Decoders.AccountNotificationDecoder import AccountNotificationDecoder, AccountNotification
-from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import Subscription
-from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Decoders.SubscriptionsDataDecoder import Subscription, ResubscribeReport
+from TxDefi.DataAccess.Decoders.SplAccountDecoder import spl_account_decoder
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import CachePolicy
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscriptionPool import AccountSubscriptionPool
 from TxDefi.Abstractions.AbstractSubscriber import AbstractSubscriber
+from TxDefi.Utilities.LatestValueCoalescer import LatestValueCoalescer
 
 class AccountUpdateInfoAdvanced(AccountInfo):
     def __init__(self, id: int, account_address: str, balance: Amount, account_data: list[str] | dict = None):
@@ -23,7 +28,9 @@ class AccountUpdateInfoAdvanced(AccountInfo):
 class WalletTracker(threading.Thread):
     current_rpc_id = 1
 
-    def __init__(self, sub_socket: AccountSubscribeSocket, solana_rpc_api: SolanaRpcApi):
+    #Notifications are coalesced per account and applied once every flush_interval seconds so subscribers see one update per
+    #account per tick however many arrive; 0 applies each one as it arrives
+    def __init__(self, sub_socket: AccountSubscriptionPool, solana_rpc_api: SolanaRpcApi, flush_interval: float = LatestValueCoalescer.default_interval):
         threading.Thread.__init__(self, daemon=True)
         self.name = WalletTracker.__name__
         self.subscription_accounts_map : dict[int, AccountUpdateInfoAdvanced] = {} #key=rpc sub id
@@ -31,13 +38,16 @@ class WalletTracker(threading.Thread):
         self.reverse_subscribers : dict[str, dict[int, AbstractSubscriber[AccountInfo]]] = {} #key=ca
         self.accounts_map : dict[str, AccountUpdateInfoAdvanced] = {} #key=ca
         self.rpc_id_accounts_map : dict[int, AccountUpdateInfoAdvanced] = {} #key=id
-        self.sub_socket = sub_socket
+        self.sub_socket = sub_socket #Subscriptions land on whichever of the pool's connections has room
         self.solana_rpc_api = solana_rpc_api
 
         self.updates_lock = threading.Lock()
+        self.last_recovery : dict = None #Stats for the most recent reconnect
+        self.account_updates = LatestValueCoalescer(self._flush_account_update, flush_interval)
 
     def run(self):
         pub.subscribe(topicName=self.sub_socket.out_topic, listener=self._handle_token_update)
+        self.account_updates.start()
 
     def _remove_client_subscription(self, subscriber_id: int, contract_address: str):
         if subscriber_id in self.subscribers:
@@ -54,10 +64,19 @@ class WalletTracker(threading.Thread):
                     contract_subs.pop(subscriber.get_id())
 
     def subscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
-        if contract_address not in self.accounts_map:
-            sol_balance = self.get_account_balance(contract_address)
-            
-            if sol_balance:
+        return self.subscribe_to_wallets([contract_address], subscriber).get(contract_address)
+
+    #Starting balances for every new address come from one getMultipleAccounts pass
+    #Returns a future per newly subscribed address that resolves to its subscription id
+    def subscribe_to_wallets(self, contract_addresses: list[str], subscriber: AbstractSubscriber)->dict[str, concurrent.futures.Future]:
+        ret_futures : dict[str, concurrent.futures.Future] = {}
+        new_addresses = [contract_address for contract_address in dict.fromkeys(contract_addresses) if contract_address not in self.accounts_map]
+        accounts = self.solana_rpc_api.get_multiple_accounts(new_addresses) if len(new_addresses) > 0 else {}
+
+        for contract_address in new_addresses:
+            if contract_address in accounts:
+                account_value = accounts.get(contract_address)
+                sol_balance = Amount.sol_scaled(account_value.get('lamports', 0) if account_value else 0) #Unfunded accounts start at 0 like getBalance
                 new_account = AccountUpdateInfoAdvanced(self.current_rpc_id, contract_address, sol_balance)
                 account_info_decoder = AccountNotificationDecoder(contract_address, self.solana_rpc_api)            
 
@@ -68,48 +87,49 @@ class WalletTracker(threading.Thread):
                 self.rpc_id_accounts_map[self.current_rpc_id] = new_account
             
                 #Make Sub Request
-                account_sub_request = SolanaRpcApi.get_account_subscribe_request(contract_address, self.current_rpc_id)
+                account_sub_request = SolanaRpcApi.get_account_subscribe_request(contract_address, self.current_rpc_id,
+                                                                                 self.sub_socket.account_encoding or self.solana_rpc_api.account_encoding)
                 
                 self.current_rpc_id += 1
 
                 #Make socket sub request
-                json_request = json.dumps(account_sub_request)  
+                json_request = self.sub_socket.json_codec.dumps(account_sub_request)  
         
-                self.sub_socket.send_request_no_wait(json_request)
+                ret_futures[contract_address] = self.sub_socket.subscribe(new_account.id, contract_address, json_request)
             else:
                 print("WalletTracker: Issue Retrieving SOL Balance. Did you use the right Solana RPC key?")
     
         #Add subs
-        contract_subs = self.reverse_subscribers.get(contract_address) 
-        if not contract_subs:
-            contract_subs = {}
-            self.reverse_subscribers[contract_address] = contract_subs
-            self.subscribers[subscriber.get_id()] = subscriber
-        contract_subs[subscriber.get_id()] = subscriber
-
-    #TODO
+        for contract_address in contract_addresses:
+            contract_subs = self.reverse_subscribers.get(contract_address) 
+            if not contract_subs:
+                contract_subs = {}
+                self.reverse_subscribers[contract_address] = contract_subs
+                self.subscribers[subscriber.get_id()] = subscriber
+            contract_subs[subscriber.get_id()] = subscriber
+
+        return ret_futures
+
+    #The rpc subscription is dropped once the account has no subscribers left
     def unsubscribe_to_wallet(self, contract_address: str, subscriber: AbstractSubscriber):
          with self.updates_lock:
-            if contract_address in self.accounts_map.keys():
-                id = self.accounts_map[contract_address]
-                account = self.accounts_map.pop(contract_address)
+            contract_subs = self.reverse_subscribers.get(contract_address, {})
+            contract_subs.pop(subscriber.get_id(), None)
+            subscriber.remove_key(contract_address)
 
-                self.rpc_id_accounts_map.pop(id)
+            if len(contract_subs) == 0 and contract_address in self.accounts_map:
+                account = self.accounts_map.pop(contract_address)
+                self.reverse_subscribers.pop(contract_address, None)
+                self.rpc_id_accounts_map.pop(account.id, None)
+                self.subscription_accounts_map.pop(account.rpc_subscription_id, None)
+                self.account_updates.discard(contract_address)
+                self.sub_socket.unsubscribe(account.id)
 
-                contract_subs = self.reverse_subscribers.get(contract_address) 
-
-                if contract_subs:
-                    for sub in contract_subs.values:
-                        self._remove_client_subscription(sub.get_id(), contract_address)
-           
-                self.reverse_subscribers[contract_address] = contract_subs
-                #TODO
-                account_unsub_request = SolanaRpcApi.get_account_unsubscribe_request(contract_address, self.current_rpc_id)
-                json_request = json.dumps(account_unsub_request)       
-                self.sub_socket.send_request_no_wait(json_request)
+    def get_subscription_loads(self)->list[dict]:
+        return self.sub_socket.get_loads()
 
     def get_account_balance(self, contract_address: str)->Amount:
-        if contract_address not in self.rpc_id_accounts_map:
+        if contract_address not in self.accounts_map:
             #Query the amount if we're not tracking it
             return self.solana_rpc_api.get_account_balance_Amount(contract_address)
 
@@ -118,26 +138,82 @@ class WalletTracker(threading.Thread):
     def _handle_token_update(self, arg1):      
         if isinstance(arg1, Subscription) and arg1.id in self.rpc_id_accounts_map: #Successful subscription, so add the decoder
             with self.updates_lock:
-                self.rpc_id_accounts_map[arg1.id].rpc_subscription_id = arg1.subscription #need to hold onto this to unsubscribe
-                self.subscription_accounts_map[arg1.subscription] = self.rpc_id_accounts_map[arg1.id]
-                decoder = self.rpc_id_accounts_map[arg1.id].account_info_decoder
-                account_address = self.rpc_id_accounts_map[arg1.id].account_address
-                self.sub_socket.wallet_tracker_decoder.add_decoder(arg1.subscription, decoder)
-                print(f"WalletTracker: subsription successful! id: {arg1.id} CA: {account_address}")
+                account = self.rpc_id_accounts_map.get(arg1.id)
+
+                if not account:
+                    return
+
+                #Changes on a reconnect or when the pool moves the subscription; the old id may already belong to another account
+                if self.subscription_accounts_map.get(account.rpc_subscription_id) is account:
+                    self.subscription_accounts_map.pop(account.rpc_subscription_id)
+
+                account.rpc_subscription_id = arg1.subscription #need to hold onto this to unsubscribe
+                self.subscription_accounts_map[arg1.subscription] = account
+                self.sub_socket.confirm_subscription(arg1.id, arg1.subscription, account.account_info_decoder)
+
+                if arg1.previous_subscription is None:
+                    print(f"WalletTracker: subsription successful! id: {arg1.id} CA: {account.account_address}")
         elif isinstance(arg1, AccountNotification): #Has transaction signature
             #print("Wallet update " + arg1.tx_signature) #DELETE
-            account_info = self.subscription_accounts_map.get(arg1.subscription_id)
-            account_info.balance.set_amount2(arg1.lamports, Value_Type.SCALED)
-            account_info.account_data = arg1.account_data
-            account_info.last_slot = arg1.slot
-            subscribers = self.reverse_subscribers.get(account_info.account_address, {})
-            
-            for subscriber in subscribers.values():
-                subscriber.update(account_info)
-            
+            if arg1.contract_address in self.accounts_map: #Otherwise unsubscribed
+                self.account_updates.put(arg1.contract_address, arg1, arg1.slot)
+        elif isinstance(arg1, ResubscribeReport): #Off the socket thread so notifications keep flowing during the fetch
+            threading.Thread(target=self._backfill_accounts, args=(arg1,), daemon=True).start()
+
+    def _flush_account_update(self, contract_address: str, notification: AccountNotification):
+        account_info = self.accounts_map.get(contract_address) #Subscription ids are only unique per connection
+
+        if account_info and not (notification.slot and notification.slot < account_info.last_slot): #e.g. both connections of a moving subscription
+            self._apply_account_update(account_info, notification.lamports, notification.account_data, notification.slot)
+
+    def _apply_account_update(self, account_info: AccountUpdateInfoAdvanced, lamports: int, account_data, slot: int):
+        account_info.balance.set_amount2(lamports, Value_Type.SCALED)
+        account_info.account_data = account_data
+
+        if slot:
+            account_info.last_slot = slot
+            self.solana_rpc_api.response_cache.update_slot(slot) #Expires slot cached balances as soon as the chain moves
+
+        subscribers = self.reverse_subscribers.get(account_info.account_address, {})
+
+        for subscriber in list(subscribers.values()):
+            subscriber.update(account_info)
+
+    #Catches up on whatever changed while the connection was down with one bulk fetch
+    def _backfill_accounts(self, report: ResubscribeReport):
+        start = time.perf_counter()
+        accounts = [self.rpc_id_accounts_map[request_id] for request_id in report.request_ids if request_id in self.rpc_id_accounts_map]
+        last_slots = {account.account_address: account.last_slot for account in accounts}
+        account_values = self.solana_rpc_api.get_multiple_accounts(list(last_slots.keys()), None, 3, self.solana_rpc_api.account_encoding, CachePolicy.NONE)
+        num_updated = 0
+
+        for account in accounts:
+            if account.account_address not in account_values or account.last_slot != last_slots[account.account_address]:
+                continue #Not fetched, or a fresher notification beat the fetch
+
+            account_value = account_values[account.account_address]
+            lamports = account_value.get('lamports', 0) if account_value else 0 #Closed while we were away
+            account_data = (spl_account_decoder.decode(account_value) or account_value.get('data')) if account_value else None
+            self._apply_account_update(account, lamports, account_data, None)
+            num_updated += 1
+
+        backfill_time = time.perf_counter()-start
+        self.last_recovery = {"socket": report.socket_name, "accounts": len(report.request_ids), "resubscribed": len(report.remapped),
+                              "backfilled": num_updated, "outage_time": report.outage_time, "resubscribe_time": report.resubscribe_time,
+                              "backfill_time": backfill_time, "recovery_time": report.resubscribe_time+backfill_time}
+        print(f"WalletTracker: Recovered {num_updated}/{len(report.request_ids)} accounts on {report.socket_name} "
+              f"{self.last_recovery['recovery_time']*1000:.0f} ms after reconnecting")
+
+    def get_recovery_stats(self)->dict:
+        return self.last_recovery
+
+    def get_coalescing_stats(self)->dict:
+        return self.account_updates.get_stats()
+
     #Get an alias name for a given wallet address if available
     def get_wallet_alias(contract_address: str):
         pass #TODO i.e. return Mr. Frog
 
     def stop(self):
-        pub.unsubscribe(topicName=self.sub_socket.out_topic, listener=self._handle_token_update)
\ No newline at end of file
+        pub.unsubscribe(topicName=self.sub_socket.out_topic, listener=self._handle_token_update)
+        self.account_updates.stop()
\ No newline at end of file
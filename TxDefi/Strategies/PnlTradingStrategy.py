@@ -127,7 +127,7 @@ class PnlTradingStrategy(AbstractTradingStrategy):
 
                     if sell_amount.value > 0:
                         new_order = SwapOrder(TradeEventType.SELL, self.initial_order.token_address, 
-                                            SwapOrderSettings(sell_amount, self.swap_settings.slippage, self.swap_settings.priority_fee),
+                                            SwapOrderSettings(sell_amount, self.swap_settings.slippage, self.swap_settings.priority_fee, priority_fee_policy=self.swap_settings.priority_fee_policy),
                                             self.initial_order.wallet_settings)
         
                         tx_signatures = self.trades_manager.execute(new_order, max_tries = 3)
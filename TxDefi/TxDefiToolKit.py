@@ -5,23 +5,38 @@ import base58
 from dotenv import load_dotenv
 from solders.keypair import Keypair
 import TxDefi.Data.Globals as globals
+import TxDefi.Utilities.HttpUtils as http_utils
 from TxDefi.Data.TradingDTOs import *
 from TxDefi.DataAccess.Blockchains.Solana.RiskAssessor import RiskAssessor
 from TxDefi.Engines.TokenInfoRetriever import TokenInfoRetriever
 from TxDefi.Engines.TokenAccountsMonitor import TokenAccountsMonitor
+from TxDefi.Engines.TransactionBackfiller import TransactionBackfiller
 from TxDefi.Managers.MarketManager import MarketManager
 from TxDefi.Managers.TradesManager import TradesManager
 from TxDefi.Managers.WalletTracker import WalletTracker
 from TxDefi.DataAccess.Blockchains.Solana.SubscribeSocket import SubscribeSocket
-from TxDefi.DataAccess.Blockchains.Solana.AccountSubscribeSocket import AccountSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.LogsSubscribeSocket import LogsSubscribeSocket
+from TxDefi.DataAccess.Blockchains.Solana.AccountSubscriptionPool import AccountSubscriptionPool
 from TxDefi.DataAccess.Blockchains.Solana.SolanaRpcApi import SolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.AsyncSolanaRpcApi import AsyncSolanaRpcApi
+from TxDefi.DataAccess.Blockchains.Solana.RpcEndpointRouter import RpcEndpointRouter
+from TxDefi.DataAccess.Blockchains.Solana.RpcResponseCache import RpcResponseCache
+from TxDefi.DataAccess.Blockchains.Solana.RpcTelemetry import RpcTelemetry
+from TxDefi.DataAccess.Blockchains.Solana.PdaCache import PdaCache, pda_cache
 from TxDefi.DataAccess.Blockchains.Solana.SolanaTradeExecutor import SolanaTradeExecutor
 from TxDefi.DataAccess.Blockchains.Solana.SolPubKey import SolPubKey
 from TxDefi.DataAccess.Decoders.TransactionsDecoder import TransactionsDecoder
-from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder
+from TxDefi.DataAccess.Decoders.MessageDecoder import MessageDecoder, is_zstd_available
 from TxDefi.DataAccess.Decoders.SolanaLogsDecoder import SolanaLogsDecoder
+from TxDefi.DataAccess.Decoders.LogsDecodePool import LogsDecodePool
 from TxDefi.DataAccess.Decoders.PumpDataDecoder import *
 from TxDefi.Strategies.StrategyFactory import StrategyFactory
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.RecordReplayTransport import RecordReplayTransport, TransportMode
+from TxDefi.Utilities.RateLimiter import RateLimiter
+from TxDefi.Utilities.CircuitBreaker import CircuitBreaker
+from TxDefi.Utilities.DispatchQueue import DispatchQueue, OverflowPolicy
+from TxDefi.Utilities.LatestValueCoalescer import LatestValueCoalescer
 from TxDefi.UI.EnvEditorUI import EnvEditorUI
 
 #Tx Defi Toolkit Free Primary Setup
@@ -55,8 +70,36 @@ class TxDefiToolKit(threading.Thread):
 
         rpc_wss_uri = os.getenv('WSS_RPC_URI')
         rpc_rate_limit = int(os.getenv('RPC_RATE_LIMIT', '10'))
+        rpc_rate_burst = float(os.getenv('RPC_RATE_BURST', str(rpc_rate_limit))) #Credits banked while idle
+        rpc_rate_limiter = RateLimiter(rpc_rate_limit, burst=rpc_rate_burst)
+        rpc_pool_size = int(os.getenv('RPC_POOL_SIZE', str(HttpTransport.default_pool_size))) #Keep-alive connections per rpc endpoint
+        rpc_transport_mode = TransportMode(os.getenv('RPC_TRANSPORT_MODE', TransportMode.LIVE.value).lower())
+
+        if rpc_transport_mode == TransportMode.LIVE:
+            rpc_transport = HttpTransport(rpc_pool_size)
+        else: #Record a session to an archive or replay one offline
+            rpc_replay_latency = os.getenv('RPC_REPLAY_LATENCY_MS', '')
+            rpc_transport = RecordReplayTransport(rpc_transport_mode, os.getenv('RPC_ARCHIVE_PATH', 'rpc_archive.jsonl.gz'), rpc_pool_size,
+                                                  float(rpc_replay_latency)/1000 if rpc_replay_latency else None,
+                                                  float(os.getenv('RPC_REPLAY_JITTER_MS', '0'))/1000)
+            http_utils.transport = rpc_transport #Token metadata lookups too
+
+        self.rpc_transport = rpc_transport
+        rpc_extra_uris = [uri.strip() for uri in os.getenv('HTTP_RPC_EXTRA_URIS', '').split(',') if uri.strip()] #Optional extra providers to route across
+        rpc_hedge_delay = float(os.getenv('RPC_HEDGE_DELAY_MS', str(RpcEndpointRouter.default_hedge_delay*1000)))/1000
+        rpc_breaker_threshold = int(os.getenv('RPC_BREAKER_THRESHOLD', str(CircuitBreaker.default_failure_threshold))) #Consecutive failures before an endpoint is skipped
+        rpc_breaker_reset = float(os.getenv('RPC_BREAKER_RESET_SECONDS', str(CircuitBreaker.default_reset_timeout)))
+        rpc_router = RpcEndpointRouter([rpc_http_uri] + rpc_extra_uris, rpc_transport, rpc_hedge_delay, breaker_threshold=rpc_breaker_threshold,
+                                       breaker_reset_timeout=rpc_breaker_reset)
         
-        self.solana_rpc_api = SolanaRpcApi(rpc_http_uri, rpc_wss_uri, rpc_rate_limit, rpc_backup_uri)
+        rpc_response_cache = RpcResponseCache(int(os.getenv('RPC_CACHE_SIZE', str(RpcResponseCache.default_max_entries))))
+        pda_cache.max_entries = int(os.getenv('PDA_CACHE_SIZE', str(PdaCache.default_max_entries))) #Derived ATAs/PDAs kept in memory
+        rpc_telemetry = RpcTelemetry(float(os.getenv('RPC_TELEMETRY_LOG_SECONDS', str(RpcTelemetry.default_log_interval)))) #0 turns off the periodic summary
+        self.solana_rpc_api = SolanaRpcApi(rpc_http_uri, rpc_wss_uri, rpc_rate_limit, rpc_backup_uri, rpc_transport, rpc_router, rpc_rate_limiter, rpc_response_cache,
+                                           os.getenv('RPC_ACCOUNT_ENCODING', SolanaRpcApi.json_parsed_encoding), telemetry=rpc_telemetry) #base64 decodes token accounts locally
+        rpc_max_concurrency = int(os.getenv('RPC_MAX_CONCURRENCY', str(AsyncSolanaRpcApi.default_max_concurrency)))
+        self.async_solana_rpc_api = AsyncSolanaRpcApi(rpc_http_uri, rpc_rate_limiter, rpc_max_concurrency, rpc_backup_uri, rpc_router, rpc_response_cache,
+                                                      telemetry=rpc_telemetry) #Shares the sync api's rate limit and telemetry
 
         #Custom Strategies Path
         custom_strategies_path = os.getenv("CUSTOM_STRATEGIES_PATH") 
@@ -65,10 +108,30 @@ class TxDefiToolKit(threading.Thread):
         pump_client = SolanaTradeExecutor.create_program(globals.idl_path + "/pumpidl.json",
                                                          default_signer_keypair, self.solana_rpc_api.async_client)
         pump_pg_address = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+        pump_amm_pg_address = "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA"
+        self.solana_rpc_api.priority_fee_estimator.add_account(pump_pg_address, SupportedPrograms.PUMPFUN)
+        self.solana_rpc_api.priority_fee_estimator.add_account(pump_amm_pg_address, SupportedPrograms.PUMPFUN_AMM)
         pump_decoder = PumpDataDecoder(pump_pg_address, pump_client.coder, MessageDecoder.base58_encoding)
         
         self.sockets : dict[SupportedPrograms, SubscribeSocket] = {}
-        self.wallet_transaction_socket = AccountSubscribeSocket(rpc_wss_uri, globals.topic_wallet_update_event, False) #Custom ping doesn't work for accountSubscribe so it's disabled here
+        wss_max_subscriptions = int(os.getenv('WSS_MAX_SUBSCRIPTIONS_PER_SOCKET', str(AccountSubscriptionPool.default_max_subscriptions))) #Provider's per connection cap
+        wss_max_sockets = int(os.getenv('WSS_MAX_SOCKETS', str(AccountSubscriptionPool.default_max_sockets))) #Per subscription pool
+        wss_dispatch_queue_size = int(os.getenv('WSS_DISPATCH_QUEUE_SIZE', str(DispatchQueue.default_max_size))) #Frames read but not yet decoded, per connection
+        wss_account_overflow_policy = OverflowPolicy(os.getenv('WSS_ACCOUNT_OVERFLOW_POLICY', OverflowPolicy.COALESCE.value).lower())
+        wss_compression = os.getenv('WSS_COMPRESSION', AccountSubscriptionPool.deflate_compression).lower() #permessage-deflate; none turns it off
+        wss_compression = None if wss_compression in ("", "none") else wss_compression
+
+        if wss_compression not in (AccountSubscriptionPool.deflate_compression, None): #websockets rejects anything else on every connect
+            raise ValueError(f"TxDefiToolKit: WSS_COMPRESSION must be {AccountSubscriptionPool.deflate_compression} or none, got {wss_compression}")
+        wss_account_encoding = os.getenv('WSS_ACCOUNT_ENCODING', '') or None #e.g. base64+zstd; blank uses RPC_ACCOUNT_ENCODING
+
+        if wss_account_encoding == SolanaRpcApi.base64_zstd_encoding and not is_zstd_available:
+            print("TxDefiToolKit: zstandard isn't installed; account subscriptions fall back to base64")
+            wss_account_encoding = SolanaRpcApi.base64_encoding
+
+        self.wallet_transaction_socket = AccountSubscriptionPool(rpc_wss_uri, globals.topic_wallet_update_event, wss_max_subscriptions, wss_max_sockets,
+                                                                 dispatch_queue_size=wss_dispatch_queue_size, overflow_policy=wss_account_overflow_policy,
+                                                                 compression=wss_compression, account_encoding=wss_account_encoding) #Custom ping doesn't work for accountSubscribe so it's disabled here
 
         transactions_decoder = TransactionsDecoder()
         transactions_decoder.add_data_decoder(pump_pg_address, pump_decoder)
@@ -78,10 +141,19 @@ class TxDefiToolKit(threading.Thread):
         auto_buy_in = float(os.getenv("AUTO_BUY_IN_SOL", ".001"))
         default_slippage = float(os.getenv('DEFAULT_SLIPPAGE', "50"))
         default_priority_fee = float(os.getenv('DEFAULT_PRIORITY_FEE', ".001"))    
-        auto_trade_settings = SwapOrderSettings(Amount.sol_ui(auto_buy_in), Amount.percent_ui(default_slippage), Amount.sol_ui(default_priority_fee))
+        default_priority_fee_percentile = float(os.getenv('DEFAULT_PRIORITY_FEE_PERCENTILE', "0")) #0 uses DEFAULT_PRIORITY_FEE as is
+        default_priority_fee_policy = None
+
+        if default_priority_fee_percentile > 0:
+            default_priority_fee_policy = PriorityFeePolicy(default_priority_fee_percentile, float(os.getenv('DEFAULT_PRIORITY_FEE_MULTIPLIER', str(PriorityFeePolicy.default_multiplier))),
+                                                            Amount.sol_ui(float(os.getenv('DEFAULT_PRIORITY_FEE_CAP', str(default_priority_fee)))))
+
+        auto_trade_settings = SwapOrderSettings(Amount.sol_ui(auto_buy_in), Amount.percent_ui(default_slippage), Amount.sol_ui(default_priority_fee),
+                                                priority_fee_policy=default_priority_fee_policy)
              
         #Setup Managers and Monitors
-        self.wallet_tracker = WalletTracker(self.wallet_transaction_socket, self.solana_rpc_api)
+        account_flush_interval = float(os.getenv('ACCOUNT_UPDATE_FLUSH_MS', str(LatestValueCoalescer.default_interval*1000)))/1000 #Newest notification per account is applied once per flush; 0 applies every one
+        self.wallet_tracker = WalletTracker(self.wallet_transaction_socket, self.solana_rpc_api, account_flush_interval)
 
         if os.path.exists(custom_strategies_path) and os.path.isdir(custom_strategies_path):
             strategy_factory = StrategyFactory(custom_strategies_path)
@@ -89,11 +161,14 @@ class TxDefiToolKit(threading.Thread):
             strategy_factory = StrategyFactory(globals.library_root + "/Strategies/Examples")
             print("TxDefiToolKit: No strategies to load from " + custom_strategies_path +  ". Check your configuration.")
 
-        tokens_info_retriever = TokenInfoRetriever(self.solana_rpc_api, pump_decoder, transactions_decoder, use_backup_rpc)        
+        tokens_info_retriever = TokenInfoRetriever(self.solana_rpc_api, pump_decoder, transactions_decoder, use_backup_rpc, self.async_solana_rpc_api)        
+        self.transaction_backfiller = TransactionBackfiller(self.solana_rpc_api, transactions_decoder,
+                                                            int(os.getenv('BACKFILL_WORKERS', str(TransactionBackfiller.default_max_workers)))) #History before monitoring started
         
         #Need the events coder for pump logs
-        self.risk_assessor = RiskAssessor(self.solana_rpc_api)
-        self.token_accounts_monitor = TokenAccountsMonitor(self.solana_rpc_api, tokens_info_retriever, pump_logs_decoder, self.risk_assessor)
+        self.risk_assessor = RiskAssessor(self.solana_rpc_api, async_rpc_api=self.async_solana_rpc_api)
+        self.token_accounts_monitor = TokenAccountsMonitor(self.solana_rpc_api, tokens_info_retriever, pump_logs_decoder, self.risk_assessor,
+                                                           wss_max_subscriptions, wss_max_sockets, account_flush_interval, wss_compression, wss_account_encoding)
         self.market_manager = MarketManager(self.solana_rpc_api, self.token_accounts_monitor, self.risk_assessor)
 
         default_payer = SolPubKey(payer_keys_hash, SupportEncryption.NONE, False, Amount.sol_ui(auto_buy_in))
@@ -105,7 +180,16 @@ class TxDefiToolKit(threading.Thread):
         pump_program_sub_request = json.dumps(SolanaRpcApi.get_logs_sub_request([pump_pg_address]))
 
         #Need 3 sockets to differentiate log messages; wss doesn't accept pings
-        pump_logs_socket = SubscribeSocket(rpc_wss_uri, pump_logs_decoder, globals.topic_amm_program_event, [pump_program_sub_request], False)
+        wss_logs_overflow_policy = OverflowPolicy(os.getenv('WSS_LOGS_OVERFLOW_POLICY', OverflowPolicy.BLOCK.value).lower()) #Every log matters here, so nothing is dropped by default
+        logs_decode_workers = int(os.getenv('LOGS_DECODE_WORKERS', '0')) #Worker processes for decoding pump logs; 0 decodes on the socket's dispatcher thread
+
+        if logs_decode_workers > 0:
+            logs_decode_pool = LogsDecodePool(pump_pg_address, globals.idl_path + "/pumpidl.json", logs_decode_workers)
+            pump_logs_socket = LogsSubscribeSocket(rpc_wss_uri, pump_logs_decoder, logs_decode_pool, globals.topic_amm_program_event, [pump_program_sub_request],
+                                                   False, wss_dispatch_queue_size, wss_logs_overflow_policy, compression=wss_compression)
+        else:
+            pump_logs_socket = SubscribeSocket(rpc_wss_uri, pump_logs_decoder, globals.topic_amm_program_event, [pump_program_sub_request], False,
+                                               wss_dispatch_queue_size, wss_logs_overflow_policy, wss_compression)
 
         self.sockets[SupportedPrograms.PUMPFUN] = pump_logs_socket
               
@@ -139,11 +223,11 @@ class TxDefiToolKit(threading.Thread):
             time.sleep(.5)
             socket.start() 
  
-        self.risk_assessor.start()
         self.wallet_tracker.start()
         self.market_manager.start()
         self.trades_manager.start()        
         self.solana_rpc_api.start()   
+        self.async_solana_rpc_api.start()
         self.token_accounts_monitor.start()
         self.cancel_event.wait()
 
@@ -155,6 +239,7 @@ class TxDefiToolKit(threading.Thread):
         self.market_manager.stop()        
         self.trades_manager.stop()          
         self.solana_rpc_api.stop()   
-        self.risk_assessor.stop()
+        self.async_solana_rpc_api.stop()
+        self.rpc_transport.close() #Writes the archive when recording
         self.cancel_event.set() 
         
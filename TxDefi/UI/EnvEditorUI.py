@@ -11,6 +11,7 @@ from TxDefi.UI.Components.ScrollableFrame import ScrollableFrame
 import TxDefi.Utilities.Encryption as encryption_util
 import TxDefi.Utilities.FileUtil as fileutil
 import TxDefi.Data.Globals as globals
+from TxDefi.Data.TradingDTOs import PriorityFeePolicy
 
 class EnvEditorUI(ctk.CTkFrame):
     WALLET_ENCRYPTION_KEY = "WALLET_ENCRYPTION"
@@ -142,7 +143,10 @@ class EnvEditorUI(ctk.CTkFrame):
             "RPC_RATE_LIMIT" : 50,
             "AUTO_BUY_IN_SOL" : .001,
             "DEFAULT_SLIPPAGE" : 50,
-            "DEFAULT_PRIORITY_FEE" : 0.003
+            "DEFAULT_PRIORITY_FEE" : 0.003,
+            "DEFAULT_PRIORITY_FEE_PERCENTILE" : 0,
+            "DEFAULT_PRIORITY_FEE_MULTIPLIER" : PriorityFeePolicy.default_multiplier,
+            "DEFAULT_PRIORITY_FEE_CAP" : 0.005
         } 
    
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import concurrent.futures
+from typing import Coroutine
+
+#Owns one event loop on a daemon thread so synchronous code can hand it coroutines
+class AsyncLoopRunner(threading.Thread):
+    def __init__(self, name: str = None):
+        threading.Thread.__init__(self, daemon=True)
+        self.name = name if name else AsyncLoopRunner.__name__
+        self.loop = asyncio.new_event_loop()
+        self.started_event = threading.Event()
+        self.start_lock = threading.Lock()
+        self.is_started = False
+
+    #Idempotent; submit starts the thread on first use, so an explicit start afterwards is a no-op
+    def start(self):
+        with self.start_lock:
+            if not self.is_started:
+                self.is_started = True
+                threading.Thread.start(self)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self.started_event.set)
+        self.loop.run_forever()
+
+    def get_loop(self)->asyncio.AbstractEventLoop:
+        return self.loop
+
+    def submit(self, coroutine: Coroutine)->concurrent.futures.Future:
+        self.start()
+        self.started_event.wait()
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    #Runs all coroutines concurrently on the loop and blocks the caller until every one has finished
+    def run_all(self, coroutines: list[Coroutine], timeout: float = None)->list:
+        async def gather():
+            return await asyncio.gather(*coroutines, return_exceptions=True)
+
+        results = self.submit(gather()).result(timeout)
+
+        return [None if isinstance(result, BaseException) else result for result in results]
+
+    def stop(self):
+        if self.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,85 @@
+import threading
+import time
+from enum import Enum
+
+class BreakerState(Enum):
+    CLOSED = 0 #Healthy; every request goes through
+    OPEN = 1 #Failing; requests are refused until the reset timeout passes
+    HALF_OPEN = 2 #One probe request is let through to test recovery
+
+#Opens after failure_threshold consecutive failures, then lets a single probe through every reset_timeout seconds until one succeeds
+class CircuitBreaker:
+    default_failure_threshold = 5
+    default_reset_timeout = 5 #seconds
+
+    def __init__(self, name: str, failure_threshold: int = default_failure_threshold, reset_timeout: float = default_reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0
+        self.probe_started_at = 0
+        self.times_opened = 0
+        self.requests_refused = 0
+        self.lock = threading.Lock()
+
+    #Doesn't claim the probe slot; use to rank candidates
+    def is_available(self)->bool:
+        now = time.monotonic()
+
+        with self.lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            elif self.state == BreakerState.OPEN:
+                return now - self.opened_at >= self.reset_timeout
+            else:
+                return now - self.probe_started_at >= self.reset_timeout #Probe never reported back
+
+    #Call right before sending; returns False if the request should not go out
+    def allow_request(self)->bool:
+        now = time.monotonic()
+
+        with self.lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+
+            if (self.state == BreakerState.OPEN and now - self.opened_at >= self.reset_timeout) or \
+               (self.state == BreakerState.HALF_OPEN and now - self.probe_started_at >= self.reset_timeout):
+                self.state = BreakerState.HALF_OPEN
+                self.probe_started_at = now
+
+                return True
+
+            self.requests_refused += 1
+
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+            self.state = BreakerState.CLOSED
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+
+            if self.state == BreakerState.HALF_OPEN or (self.state == BreakerState.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                if self.state == BreakerState.CLOSED:
+                    print(f"CircuitBreaker: {self.name} opened after {self.consecutive_failures} failures")
+
+                self.state = BreakerState.OPEN
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def get_state(self)->BreakerState:
+        return self.state
+
+    #A HALF_OPEN breaker is probing for recovery, not open
+    def is_open(self)->bool:
+        return self.state == BreakerState.OPEN
+
+    def to_dict(self)->dict:
+        with self.lock:
+            return {"state": self.state.name, "consecutive_failures": self.consecutive_failures, "times_opened": self.times_opened,
+                    "requests_refused": self.requests_refused}
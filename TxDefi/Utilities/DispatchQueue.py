@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+
+class OverflowPolicy(Enum):
+    BLOCK = "block" #Producer waits for room; nothing is lost but a slow consumer stalls the producer
+    DROP_OLDEST = "drop_oldest" #Oldest droppable item makes room
+    COALESCE = "coalesce" #A keyed item replaces the queued item with the same key (latest value wins); otherwise drop oldest
+
+#Bounded FIFO between a producer (e.g. a socket reader) and a single consumer thread
+#Items put with droppable=False (e.g. responses to our own requests) are never dropped or coalesced and may briefly exceed max_size
+class DispatchQueue:
+    default_max_size = 10000
+
+    def __init__(self, max_size: int = default_max_size, policy: OverflowPolicy = OverflowPolicy.BLOCK):
+        self.max_size = max(1, max_size)
+        self.policy = policy
+        self.items : deque[list] = deque() #[key, item, droppable]; a coalesced or dropped slot has its item set to None
+        self.keyed_slots : dict[any, list] = {} #key=coalesce key; value=its queued slot
+        self.condition = threading.Condition()
+        self.depth = 0 #Live items; slots emptied by coalescing or dropping don't count
+        self.is_closed = False
+        self.max_depth = 0
+        self.num_enqueued = 0
+        self.num_dispatched = 0
+        self.num_dropped = 0
+        self.num_coalesced = 0
+        self.blocked_time = 0
+
+    def _append(self, item, key, droppable: bool):
+        slot = [key, item, droppable]
+        self.items.append(slot)
+
+        if key is not None and droppable and self.policy == OverflowPolicy.COALESCE:
+            self.keyed_slots[key] = slot
+
+        self.depth += 1
+        self.num_enqueued += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        self.condition.notify()
+
+    #Must hold the condition
+    def _drop_oldest(self)->bool:
+        for slot in self.items:
+            if slot[1] is not None and slot[2]:
+                self._empty_slot(slot)
+                self.num_dropped += 1
+                return True
+
+        return False
+
+    def _empty_slot(self, slot: list):
+        if self.keyed_slots.get(slot[0]) is slot:
+            self.keyed_slots.pop(slot[0])
+
+        slot[1] = None
+        self.depth -= 1
+
+    #Never waits; returns False only if the policy is BLOCK and there's no room
+    def offer(self, item, key = None, droppable = True)->bool:
+        with self.condition:
+            if self.is_closed:
+                return True
+
+            if droppable and self.policy == OverflowPolicy.COALESCE and key is not None:
+                slot = self.keyed_slots.get(key)
+
+                if slot:
+                    slot[1] = item
+                    self.num_coalesced += 1
+                    return True
+
+            if droppable and self.depth >= self.max_size:
+                if self.policy == OverflowPolicy.BLOCK:
+                    return False
+
+                self._drop_oldest() #Nothing droppable left means the queue is all undroppable items; take this one anyway
+
+            self._append(item, key, droppable)
+
+            return True
+
+    #Blocking put for producers that can afford to wait (BLOCK policy); the other policies never wait
+    def put(self, item, key = None, droppable = True):
+        if self.offer(item, key, droppable):
+            return
+
+        start = time.perf_counter()
+
+        with self.condition:
+            while not self.is_closed and self.depth >= self.max_size:
+                self.condition.wait()
+
+            if not self.is_closed:
+                self._append(item, key, droppable)
+
+            self.blocked_time += time.perf_counter()-start
+
+    #Must hold the condition; returns None if nothing live is queued
+    def _pop(self):
+        while len(self.items) > 0:
+            slot = self.items.popleft()
+
+            if slot[1] is not None:
+                if self.keyed_slots.get(slot[0]) is slot:
+                    self.keyed_slots.pop(slot[0])
+
+                self.depth -= 1
+                self.num_dispatched += 1
+                return slot[1]
+
+    #Returns None once closed
+    def get(self):
+        with self.condition:
+            while True:
+                item = self._pop()
+
+                if item is not None:
+                    self.condition.notify_all() #Wake a blocked producer
+                    return item
+
+                if self.is_closed:
+                    return None
+
+                self.condition.wait()
+
+    #Waits for the first item, then takes whatever else is already queued up to max_items; empty once closed
+    def get_batch(self, max_items: int)->list:
+        ret_items = []
+        item = self.get()
+
+        if item is None:
+            return ret_items
+
+        ret_items.append(item)
+
+        with self.condition:
+            while len(ret_items) < max_items:
+                item = self._pop()
+
+                if item is None:
+                    break
+
+                ret_items.append(item)
+
+            self.condition.notify_all()
+
+        return ret_items
+
+    def close(self):
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify_all()
+
+    def get_stats(self)->dict:
+        with self.condition:
+            return {"policy": self.policy.value, "depth": self.depth, "max_size": self.max_size, "max_depth": self.max_depth,
+                    "enqueued": self.num_enqueued, "dispatched": self.num_dispatched, "dropped": self.num_dropped,
+                    "coalesced": self.num_coalesced, "blocked_time": self.blocked_time}
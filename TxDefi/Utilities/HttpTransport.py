@@ -0,0 +1,144 @@
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from TxDefi.Utilities.JsonCodec import JsonCodec, default_codec
+
+try: #HTTP/2 needs httpx with the h2 extra installed; fall back to pooled HTTP/1.1 keep-alive otherwise
+    import httpx
+    import h2
+    is_http2_available = True
+except ImportError:
+    is_http2_available = False
+
+class EndpointPoolStats:
+    def __init__(self, endpoint: str, pool_size: int, is_http2: bool):
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self.is_http2 = is_http2
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.failed_requests = 0
+
+    def get_occupancy(self)->float:
+        return self.in_flight/self.pool_size if self.pool_size > 0 else 0
+
+    def to_dict(self)->dict:
+        return {"endpoint": self.endpoint, "pool_size": self.pool_size, "http2": self.is_http2, "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight, "occupancy": self.get_occupancy(), "total_requests": self.total_requests,
+                "failed_requests": self.failed_requests}
+
+#Keep-alive connection pools shared by every HTTP call made to an endpoint (scheme://host:port)
+class HttpTransport:
+    default_pool_size = 20
+    keep_alive_expiry = 90 #seconds an idle connection is held open
+    connect_retries = 2 #Only failed connects are retried here (the request never left); RpcRetryPolicy owns every other retry
+    retry = Retry(total=None, connect=connect_retries, read=0, status=0, other=0)
+    json_headers = {"Content-Type": "application/json"}
+
+    def __init__(self, pool_size: int = default_pool_size, use_http2 = True, json_codec: JsonCodec = default_codec):
+        self.pool_size = pool_size
+        self.use_http2 = use_http2 and is_http2_available
+        self.json_codec = json_codec
+        self.endpoint_pool_sizes : dict[str, int] = {} #key=endpoint; overrides pool_size
+        self.clients : dict[str, requests.Session] = {} #key=endpoint; an httpx.Client when running HTTP/2
+        self.endpoint_stats : dict[str, EndpointPoolStats] = {} #key=endpoint
+        self.retired_clients = [] #Replaced by set_pool_size; closed with the transport so requests still on them can finish
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_endpoint(uri: str)->str:
+        split_uri = urlsplit(uri)
+
+        return f"{split_uri.scheme}://{split_uri.netloc}"
+
+    def set_pool_size(self, uri: str, pool_size: int):
+        endpoint = self.get_endpoint(uri)
+
+        with self.lock:
+            self.endpoint_pool_sizes[endpoint] = pool_size
+
+            if endpoint in self.clients: #Rebuild the pool on next use
+                self.retired_clients.append(self.clients.pop(endpoint))
+                self.endpoint_stats.pop(endpoint)
+
+    #Returns the client and its stats as one pair so set_pool_size can't swap them out between the two lookups
+    def _get_client(self, endpoint: str)->tuple[any, EndpointPoolStats]:
+        with self.lock:
+            client = self.clients.get(endpoint)
+
+            if not client:
+                pool_size = self.endpoint_pool_sizes.get(endpoint, self.pool_size)
+
+                if self.use_http2:
+                    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=self.keep_alive_expiry)
+                    client = httpx.Client(transport=httpx.HTTPTransport(http2=True, limits=limits, retries=self.connect_retries))
+                else:
+                    client = requests.Session()
+                    client.mount(endpoint, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=self.retry))
+
+                self.endpoint_stats[endpoint] = EndpointPoolStats(endpoint, pool_size, self.use_http2)
+                self.clients[endpoint] = client
+
+            return client, self.endpoint_stats[endpoint]
+
+    def _send(self, method: str, uri: str, body: bytes = None, headers: dict = None, timeout: float = None):
+        endpoint = self.get_endpoint(uri)
+        client, stats = self._get_client(endpoint)
+
+        with self.lock:
+            stats.in_flight += 1
+            stats.total_requests += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+
+        try:
+            if self.use_http2:
+                response = client.request(method, uri, content=body, headers=headers, timeout=timeout)
+            else:
+                response = client.request(method, uri, data=body, headers=headers, timeout=timeout)
+
+            self.tag_response(response, uri, body)
+
+            return response
+        except Exception:
+            with self.lock:
+                stats.failed_requests += 1
+            raise
+        finally:
+            with self.lock:
+                stats.in_flight -= 1
+
+    #Lets callers attribute a response to its endpoint and request size without threading them through every layer
+    @staticmethod
+    def tag_response(response, uri: str, body: bytes):
+        response.endpoint_uri = uri
+        response.bytes_out = len(body) if body else 0
+
+    #Returns the raw response; both backends expose status_code, content and json()
+    def post(self, uri: str, json_body: dict | list, timeout: float = None):
+        return self._send("POST", uri, self.json_codec.dumps_bytes(json_body), self.json_headers, timeout)
+
+    #Coroutine post on the caller's httpx.AsyncClient (it has to live on the caller's loop)
+    async def post_async(self, client, uri: str, json_body: dict | list):
+        body = self.json_codec.dumps_bytes(json_body)
+        response = await client.post(uri, content=body, headers=self.json_headers)
+        self.tag_response(response, uri, body)
+
+        return response
+
+    def get(self, uri: str, headers: dict = None, timeout: float = None):
+        return self._send("GET", uri, None, headers, timeout)
+
+    def get_stats(self)->dict[str, dict]:
+        with self.lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in self.endpoint_stats.items()}
+
+    def close(self):
+        with self.lock:
+            for client in list(self.clients.values()) + self.retired_clients:
+                client.close()
+
+            self.clients.clear()
+            self.retired_clients.clear()
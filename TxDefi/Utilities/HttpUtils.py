@@ -1,24 +1,27 @@
-import requests
 from jsonrpcclient import request, parse, Ok, Error
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.JsonCodec import default_codec
+
+transport = HttpTransport() #Shared keep-alive pools for ad hoc HTTP calls
 
 #Get a valid code 200 HTTP request and return the response json
 def get_request(uri: str, headers : dict = None, timeout: int = None)->dict:
     try:
-        response = requests.get(uri, headers, timeout=timeout)
+        response = transport.get(uri, headers, timeout=timeout)
 
         if response.status_code == 200: #and responseCode < 400:
-            return response.json()
+            return default_codec.loads(response.content)
     except Exception as e:
         print("HttpUtils: get_request failed " + uri + " " + str(e))
     
 def post_request(uri: str, json_request: dict, timeout: int = None)->dict:
     try:
-        response = requests.post(uri, json=json_request)
-        parsed = parse(response.json())
+        response = transport.post(uri, json_request, timeout=timeout)
+        parsed = parse(default_codec.loads(response.content))
 
         if isinstance(parsed, Error): 
             return None
         else:
             return parsed
     except Exception as e:
-        print("HttpUtils: post failed " + str(e))
\ No newline at end of file
+        print("HttpUtils: post failed " + str(e))
@@ -0,0 +1,75 @@
+import json
+import os
+
+try: #orjson is several times faster on rpc responses and socket frames; stdlib json is the fallback
+    import orjson
+    is_orjson_available = True
+except ImportError:
+    is_orjson_available = False
+
+class JsonCodec:
+    name = "stdlib"
+
+    def loads(self, data: str | bytes)->any:
+        return json.loads(data)
+
+    def dumps(self, obj: any, sort_keys = False)->str:
+        return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'))
+
+    def dumps_bytes(self, obj: any, sort_keys = False)->bytes:
+        return self.dumps(obj, sort_keys).encode()
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: str | bytes)->any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data) #e.g. integers wider than 64 bits
+
+    def dumps(self, obj: any, sort_keys = False)->str:
+        return self.dumps_bytes(obj, sort_keys).decode()
+
+    def dumps_bytes(self, obj: any, sort_keys = False)->bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+        except TypeError:
+            return JsonCodec.dumps_bytes(self, obj, sort_keys)
+
+#name is orjson, stdlib or auto (orjson if installed)
+def create_codec(name: str = "auto")->JsonCodec:
+    if name in ("auto", OrjsonCodec.name) and is_orjson_available:
+        return OrjsonCodec()
+
+    if name == OrjsonCodec.name:
+        print("JsonCodec: orjson isn't installed; using stdlib json")
+
+    return JsonCodec()
+
+#Reads JSON_CODEC on first use rather than at import, so a value loaded from .env after the import still applies
+#Once resolved the chosen codec's methods are bound onto the instance and calls skip this class entirely
+class LazyJsonCodec(JsonCodec):
+    def __init__(self):
+        self.codec : JsonCodec = None
+
+    def get_codec(self)->JsonCodec:
+        if self.codec is None:
+            self.codec = create_codec(os.getenv('JSON_CODEC', "auto"))
+            self.name = self.codec.name
+            self.loads = self.codec.loads
+            self.dumps = self.codec.dumps
+            self.dumps_bytes = self.codec.dumps_bytes
+
+        return self.codec
+
+    def loads(self, data: str | bytes)->any:
+        return self.get_codec().loads(data)
+
+    def dumps(self, obj: any, sort_keys = False)->str:
+        return self.get_codec().dumps(obj, sort_keys)
+
+    def dumps_bytes(self, obj: any, sort_keys = False)->bytes:
+        return self.get_codec().dumps_bytes(obj, sort_keys)
+
+default_codec = LazyJsonCodec()
@@ -0,0 +1,80 @@
+#HDR style log-linear histogram: values land in buckets with a fixed relative error (~3%) so memory stays small over any range
+class LatencyHistogram:
+    sub_bucket_bits = 6
+    sub_bucket_count = 1 << sub_bucket_bits
+    sub_bucket_half = sub_bucket_count >> 1
+    default_percentiles = (50, 90, 99, 99.9)
+
+    def __init__(self):
+        self.counts : dict[int, int] = {} #key=bucket index
+        self.total_count = 0
+        self.total_value = 0
+        self.min_value = None
+        self.max_value = 0
+
+    @staticmethod
+    def get_bucket_index(value: int)->int:
+        if value < LatencyHistogram.sub_bucket_count:
+            return value
+
+        shift = value.bit_length() - LatencyHistogram.sub_bucket_bits
+
+        return shift*LatencyHistogram.sub_bucket_half + (value >> shift)
+
+    #Midpoint of the values that map to the bucket
+    @staticmethod
+    def get_bucket_value(index: int)->int:
+        if index < LatencyHistogram.sub_bucket_count:
+            return index
+
+        shift = index//LatencyHistogram.sub_bucket_half - 1
+        lower = (index - shift*LatencyHistogram.sub_bucket_half) << shift
+
+        return lower + (1 << shift)//2
+
+    #value is an integer in whatever unit the caller picks (e.g. microseconds)
+    def record(self, value: int):
+        value = max(0, int(value))
+        index = self.get_bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total_count += 1
+        self.total_value += value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+
+    def get_percentile(self, percentile: float)->int:
+        if self.total_count == 0:
+            return 0
+
+        target = max(1, percentile*self.total_count/100)
+        running_count = 0
+
+        for index in sorted(self.counts.keys()):
+            running_count += self.counts[index]
+
+            if running_count >= target:
+                return min(self.get_bucket_value(index), self.max_value)
+
+        return self.max_value
+
+    def get_mean(self)->float:
+        return self.total_value/self.total_count if self.total_count > 0 else 0
+
+    def merge(self, histogram: "LatencyHistogram"):
+        for index, count in histogram.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+        self.total_count += histogram.total_count
+        self.total_value += histogram.total_value
+        self.max_value = max(self.max_value, histogram.max_value)
+
+        if histogram.min_value is not None:
+            self.min_value = histogram.min_value if self.min_value is None else min(self.min_value, histogram.min_value)
+
+    def to_dict(self, scale: float = 1)->dict:
+        ret_dict = {"count": self.total_count, "min": (self.min_value or 0)*scale, "mean": self.get_mean()*scale, "max": self.max_value*scale}
+
+        for percentile in self.default_percentiles:
+            ret_dict[f"p{percentile:g}"] = self.get_percentile(percentile)*scale
+
+        return ret_dict
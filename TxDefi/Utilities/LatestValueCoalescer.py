@@ -0,0 +1,75 @@
+import threading
+from TxDefi.Utilities.ThreadRunner import ThreadRunner
+
+#Keeps only the newest value per key and hands them to flush_callback(key, value) once per interval on a ThreadRunner
+#Values that carry a slot never replace a newer one (e.g. a late notification from another connection); interval 0 passes every value straight through
+class LatestValueCoalescer:
+    default_interval = .05 #seconds
+
+    def __init__(self, flush_callback, interval: float = default_interval):
+        self.flush_callback = flush_callback
+        self.interval = interval
+        self.pending : dict[any, tuple[int, any]] = {} #key=coalesce key; value=(slot, newest value)
+        self.lock = threading.Lock()
+        self.runner = ThreadRunner(interval) if interval > 0 else None
+        self.num_received = 0
+        self.num_flushed = 0
+        self.num_stale = 0
+
+        if self.runner:
+            self.runner.name = f"{LatestValueCoalescer.__name__}-interval-{interval}"
+            self.runner.add_callback(id(self), self.flush)
+
+    def put(self, key, value, slot: int = None):
+        if not self.runner:
+            self.num_received += 1
+            self.num_flushed += 1
+            self.flush_callback(key, value)
+            return
+
+        with self.lock:
+            self.num_received += 1
+            pending = self.pending.get(key)
+
+            if pending and slot is not None and pending[0] is not None and slot < pending[0]:
+                self.num_stale += 1
+                return
+
+            self.pending[key] = (slot, value)
+
+    def discard(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def flush(self):
+        with self.lock:
+            if len(self.pending) == 0:
+                return
+
+            pending = self.pending
+            self.pending = {}
+
+        for key, (slot, value) in pending.items():
+            try:
+                self.flush_callback(key, value)
+            except Exception as e:
+                print(f"LatestValueCoalescer: Error flushing {key} {e}")
+
+        self.num_flushed += len(pending)
+
+    def start(self):
+        if self.runner:
+            self.runner.start()
+
+    def stop(self):
+        if self.runner:
+            self.runner.stop()
+
+        self.flush() #Nothing received is left behind
+
+    def get_stats(self)->dict:
+        with self.lock:
+            num_pending = len(self.pending)
+
+        return {"interval": self.interval, "received": self.num_received, "flushed": self.num_flushed, "stale": self.num_stale, "pending": num_pending,
+                "coalesced": self.num_received-self.num_flushed-self.num_stale-num_pending}
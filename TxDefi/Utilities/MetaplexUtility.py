@@ -4,6 +4,7 @@ import base58
 from construct import Struct, Int8ul, Int16ul, Int32ul, Bytes, PaddedString, Prefixed, Array
 from TxDefi.Data.MarketDTOs import *
 from TxDefi.Data.TradingDTOs import *
+from TxDefi.DataAccess.Blockchains.Solana.PdaCache import pda_cache
 
 METAPLEX_PROGRAM_ID = Pubkey.from_string("metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s")
 
@@ -44,7 +45,7 @@ def get_metadata_pda(mint: str):
         bytes(METAPLEX_PROGRAM_ID),
         bytes(Pubkey.from_string(mint)),
     ]
-    metadata_pda, _ = Pubkey.find_program_address(seed, METAPLEX_PROGRAM_ID)
+    metadata_pda, _ = pda_cache.find_program_address(seed, METAPLEX_PROGRAM_ID)
 
     return str(metadata_pda)
 
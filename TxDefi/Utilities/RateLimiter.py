@@ -1,26 +1,183 @@
+import asyncio
+import bisect
+import itertools
 import threading
 import time
+from enum import IntEnum
 
+class RatePriority(IntEnum):
+    TRADE = 0 #Order path; always served first
+    DEFAULT = 1
+    BACKGROUND = 2 #Metadata lookups, risk checks and other work that can wait
+
+#Smooth token bucket: refills continuously at rate_limit credits per second and banks up to burst credits while idle
+#Waiters are served in priority order (then arrival order) so trade calls skip ahead of queued lookups
 class RateLimiter(threading.Thread):
-    def __init__(self, rate_limit: float, log_info: bool = False):  
+    default_method_costs = {
+        "getProgramAccounts": 10,
+        "getBlock": 5,
+        "getTokenLargestAccounts": 5,
+        "getTokenAccountsByOwner": 3,
+        "getSignaturesForAddress": 2,
+        "getMultipleAccounts": 2,
+        "getAsset": 2,
+    }
+    default_method_priorities = {
+        "sendTransaction": RatePriority.TRADE,
+        "simulateTransaction": RatePriority.TRADE,
+        "getLatestBlockhash": RatePriority.TRADE,
+        "getSignatureStatuses": RatePriority.TRADE,
+        "getAsset": RatePriority.BACKGROUND,
+        "getTokenLargestAccounts": RatePriority.BACKGROUND,
+    }
+    max_poll_interval = .05 #seconds between retries while queued behind other waiters
+
+    def __init__(self, rate_limit: float, log_info: bool = False, burst: float = None, method_costs: dict[str, float] = None,
+                 method_priorities: dict[str, RatePriority] = None):
         threading.Thread.__init__(self, daemon=True)
         self.rate_limit = rate_limit
-        self.cancel_event = threading.Event() 
-        self.rate_semaphore = threading.Semaphore(rate_limit)       
+        self.burst = burst if burst else rate_limit
+        self.method_costs = dict(self.default_method_costs, **(method_costs or {}))
+        self.method_priorities = dict(self.default_method_priorities, **(method_priorities or {}))
+        self.cancel_event = threading.Event()
+        self.condition = threading.Condition()
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.waiters : list[tuple[int, int]] = [] #Sorted (priority, sequence) tickets
+        self.sequence = itertools.count()
         self.sems_acquired = 0
+        self.total_acquired = 0
+        self.total_wait_time = 0
         self.log_info = log_info
 
-    def acquire_sem(self)->bool:
-        did_acquire = self.rate_semaphore.acquire()
-        if did_acquire:
+    def get_method_cost(self, method_name: str)->float:
+        return self.method_costs.get(method_name, 1)
+
+    def get_method_priority(self, method_name: str)->RatePriority:
+        return self.method_priorities.get(method_name, RatePriority.DEFAULT)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now-self.last_refill)*self.rate_limit)
+        self.last_refill = now
+
+    def _clamp_cost(self, cost: float)->float:
+        return min(cost, self.burst) #A call costing more than the bucket holds would never be served
+
+    #Must hold the condition; returns 0 if the ticket took its tokens otherwise the seconds to wait before trying again
+    def _try_take(self, ticket: tuple[int, int], cost: float)->float:
+        self._refill()
+
+        if self.waiters[0] != ticket:
+            return None
+
+        if self.tokens >= cost:
+            self.waiters.pop(0)
+            self.tokens -= cost
             self.sems_acquired += 1
+            self.total_acquired += 1
+            self.condition.notify_all() #Let the next in line check
+            return 0
+
+        return (cost-self.tokens)/self.rate_limit
+
+    def _add_waiter(self, priority: RatePriority)->tuple[int, int]:
+        ticket = (int(priority), next(self.sequence))
+        bisect.insort(self.waiters, ticket)
+
+        return ticket
+
+    def _remove_waiter(self, ticket: tuple[int, int]):
+        if ticket in self.waiters:
+            self.waiters.remove(ticket)
+            self.condition.notify_all()
+
+    #Blocks until cost credits are available; returns False on timeout
+    def acquire_sem(self, cost: float = 1, priority: RatePriority = RatePriority.DEFAULT, timeout: float = None)->bool:
+        cost = self._clamp_cost(cost)
+        time_start = time.monotonic()
+        deadline = time_start + timeout if timeout is not None else None
+
+        with self.condition:
+            ticket = self._add_waiter(priority)
+
+            try:
+                while True:
+                    wait_time = self._try_take(ticket, cost)
+
+                    if wait_time == 0:
+                        self.total_wait_time += time.monotonic()-time_start
+                        return True
+
+                    if wait_time is None: #Queued behind someone; async waiters don't notify so poll as well
+                        wait_time = self.max_poll_interval
+
+                    if deadline:
+                        remaining = deadline - time.monotonic()
 
-        return did_acquire
-    
-    def _reset_num_execs(self):           
+                        if remaining <= 0:
+                            return False
+
+                        wait_time = min(wait_time, remaining)
+
+                    self.condition.wait(wait_time)
+            finally:
+                self._remove_waiter(ticket)
+
+    #Never blocks; only succeeds if nobody of equal or higher priority is queued
+    def try_acquire(self, cost: float = 1, priority: RatePriority = RatePriority.DEFAULT)->bool:
+        cost = self._clamp_cost(cost)
+
+        with self.condition:
+            if len(self.waiters) > 0 and self.waiters[0][0] <= priority:
+                return False
+
+            ticket = self._add_waiter(priority)
+
+            try:
+                return self._try_take(ticket, cost) == 0
+            finally:
+                self._remove_waiter(ticket)
+
+    #Waits on the event loop instead of blocking a thread
+    async def acquire_async(self, cost: float = 1, priority: RatePriority = RatePriority.DEFAULT)->bool:
+        cost = self._clamp_cost(cost)
+        time_start = time.monotonic()
+
+        with self.condition:
+            ticket = self._add_waiter(priority)
+
+        try:
+            while True:
+                with self.condition:
+                    wait_time = self._try_take(ticket, cost)
+
+                if wait_time == 0:
+                    with self.condition:
+                        self.total_wait_time += time.monotonic()-time_start
+
+                    return True
+
+                await asyncio.sleep(min(wait_time, self.max_poll_interval) if wait_time else self.max_poll_interval)
+        finally:
+            with self.condition:
+                self._remove_waiter(ticket)
+
+    def acquire_method(self, method_name: str, priority: RatePriority = None)->bool:
+        return self.acquire_sem(self.get_method_cost(method_name), priority if priority is not None else self.get_method_priority(method_name))
+
+    async def acquire_method_async(self, method_name: str, priority: RatePriority = None)->bool:
+        return await self.acquire_async(self.get_method_cost(method_name), priority if priority is not None else self.get_method_priority(method_name))
+
+    def get_stats(self)->dict:
+        with self.condition:
+            self._refill()
+
+            return {"rate_limit": self.rate_limit, "burst": self.burst, "tokens": self.tokens, "queued": len(self.waiters),
+                    "total_acquired": self.total_acquired, "total_wait_time": self.total_wait_time}
+
+    def _reset_num_execs(self):
         if self.sems_acquired > 0:
-            self.rate_semaphore.release(self.rate_limit)
-               
             if self.log_info:
                 print(f"Calls per second: {self.sems_acquired} Rate Limit: {self.rate_limit}")
 
@@ -29,8 +186,8 @@ class RateLimiter(threading.Thread):
     def run(self):
         while not self.cancel_event.is_set():
             time.sleep(1)
-        
+
             self._reset_num_execs()
 
     def stop(self):
-        self.cancel_event.set()
\ No newline at end of file
+        self.cancel_event.set()
@@ -0,0 +1,234 @@
+import asyncio
+import gzip
+import random
+import threading
+import time
+from enum import Enum
+from TxDefi.Utilities.HttpTransport import HttpTransport
+from TxDefi.Utilities.JsonCodec import JsonCodec, default_codec
+
+class TransportMode(Enum):
+    LIVE = "live"
+    RECORD = "record" #Pass through to the network and archive every call
+    REPLAY = "replay" #Serve every call from the archive; no network needed
+
+class ReplayResponse:
+    def __init__(self, status_code: int, content: bytes, json_codec: JsonCodec):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+        self.json_codec = json_codec
+
+    def json(self):
+        return self.json_codec.loads(self.content)
+
+#Recorded responses keyed per JSON-RPC item (method + canonical params) so batches replay no matter how they get split up
+#File layout: gzip'd JSON lines; a header line then one [key, status, latency ms, body] line per recorded response
+class RpcArchive:
+    version = 1
+
+    def __init__(self, json_codec: JsonCodec = default_codec):
+        self.json_codec = json_codec
+        self.metadata = {} #Free form; e.g. the workload a benchmark was recorded with
+        self.entries : dict[str, list[tuple[int, float, any]]] = {} #key=request key; value=responses in the order they were recorded
+        self.cursors : dict[str, int] = {} #key=request key; next response to replay
+        self.lock = threading.Lock()
+
+    def get_key(self, method_name: str, params: any)->str:
+        return method_name + self.json_codec.dumps(params, sort_keys=True)
+
+    def add(self, key: str, status_code: int, latency: float, body: any):
+        with self.lock:
+            self.entries.setdefault(key, []).append((status_code, round(latency*1000, 2), body))
+
+    #Responses replay in recorded order; once they run out the last one repeats (e.g. a polled getSlot)
+    def next(self, key: str)->tuple[int, float, any]:
+        with self.lock:
+            responses = self.entries.get(key)
+
+            if responses:
+                index = self.cursors.get(key, 0)
+                self.cursors[key] = index + 1
+                status_code, latency_ms, body = responses[min(index, len(responses)-1)]
+
+                return status_code, latency_ms/1000, body
+
+    def rewind(self):
+        with self.lock:
+            self.cursors.clear()
+
+    def get_num_responses(self)->int:
+        return sum(len(responses) for responses in self.entries.values())
+
+    def save(self, path: str):
+        with self.lock:
+            with gzip.open(path, "wt", encoding="utf-8") as file:
+                file.write(self.json_codec.dumps({"version": self.version, "created": time.time(), "metadata": self.metadata}) + "\n")
+
+                for key, responses in self.entries.items():
+                    for status_code, latency_ms, body in responses:
+                        file.write(self.json_codec.dumps([key, status_code, latency_ms, body]) + "\n")
+
+    @staticmethod
+    def load(path: str, json_codec: JsonCodec = default_codec)->"RpcArchive":
+        ret_archive = RpcArchive(json_codec)
+
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            header = json_codec.loads(file.readline())
+            ret_archive.metadata = header.get("metadata", {})
+
+            for line in file:
+                if line.strip():
+                    key, status_code, latency_ms, body = json_codec.loads(line)
+                    ret_archive.entries.setdefault(key, []).append((status_code, latency_ms, body))
+
+        return ret_archive
+
+#Drop-in HttpTransport that archives live traffic (RECORD) or answers from an archive with simulated latency (REPLAY)
+class RecordReplayTransport(HttpTransport):
+    missing_error_code = -32600 #Classified as permanent so a miss isn't retried
+    get_key_prefix = "GET "
+
+    def __init__(self, mode: TransportMode, archive_path: str, pool_size: int = HttpTransport.default_pool_size, replay_latency: float = None,
+                 replay_jitter: float = 0, seed: int = None, json_codec: JsonCodec = default_codec):
+        HttpTransport.__init__(self, pool_size, json_codec=json_codec)
+        self.mode = mode
+        self.archive_path = archive_path
+        self.replay_latency = replay_latency #seconds; None replays each response's recorded latency
+        self.replay_jitter = replay_jitter #seconds; uniform, added on top
+        self.random = random.Random(seed) #Seeded so replays are repeatable
+        self.archive = RpcArchive.load(archive_path, json_codec) if mode == TransportMode.REPLAY else RpcArchive(json_codec)
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def _get_request_keys(self, json_body: dict | list)->list[tuple[any, str]]:
+        items = json_body if isinstance(json_body, list) else [json_body]
+
+        return [(item.get('id'), self.archive.get_key(item.get('method'), item.get('params'))) for item in items]
+
+    def _get_delay(self, recorded_latency: float)->float:
+        latency = recorded_latency if self.replay_latency is None else self.replay_latency
+
+        with self.lock:
+            return latency + (self.random.uniform(0, self.replay_jitter) if self.replay_jitter > 0 else 0)
+
+    def _record_post(self, json_body: dict | list, response, latency: float):
+        request_keys = self._get_request_keys(json_body)
+
+        try:
+            response_json = self.json_codec.loads(response.content) if response.status_code == 200 else None
+        except ValueError:
+            response_json = None
+
+        if response_json is None: #Whole call failed at the HTTP level
+            for _, key in request_keys:
+                self.archive.add(key, response.status_code, latency, response.content.decode("utf-8", "replace"))
+            return
+
+        items = response_json if isinstance(response_json, list) else [response_json]
+        items_by_id = {item.get('id'): item for item in items if isinstance(item, dict)}
+
+        for request_id, key in request_keys:
+            item = items_by_id.get(request_id, items[0] if len(items) == 1 else None) #A rejected batch comes back as a single error
+
+            if isinstance(item, dict):
+                self.archive.add(key, response.status_code, latency, {name: value for name, value in item.items() if name != 'id'})
+
+    #Returns the response to serve and the recorded latency of the slowest item
+    def _replay_post(self, json_body: dict | list)->tuple[ReplayResponse, float]:
+        items = []
+        latency = 0
+
+        for request_id, key in self._get_request_keys(json_body):
+            recorded = self.archive.next(key)
+
+            if not recorded:
+                self.num_misses += 1
+                items.append({"jsonrpc": "2.0", "id": request_id, "error": {"code": self.missing_error_code, "message": "Request isn't in the replay archive"}})
+                continue
+
+            self.num_hits += 1
+            status_code, item_latency, body = recorded
+            latency = max(latency, item_latency)
+
+            if status_code != 200 or not isinstance(body, dict): #The whole call failed when it was recorded
+                return ReplayResponse(status_code, str(body).encode(), self.json_codec), latency
+
+            items.append(dict(body, id=request_id))
+
+        content = self.json_codec.dumps_bytes(items if isinstance(json_body, list) else items[0])
+
+        return ReplayResponse(200, content, self.json_codec), latency
+
+    def _replay_get(self, uri: str)->tuple[ReplayResponse, float]:
+        recorded = self.archive.next(self.get_key_prefix + uri)
+
+        if not recorded:
+            self.num_misses += 1
+            return ReplayResponse(404, b"", self.json_codec), 0
+
+        self.num_hits += 1
+        status_code, latency, body = recorded
+
+        return ReplayResponse(status_code, body.encode(), self.json_codec), latency
+
+    def post(self, uri: str, json_body: dict | list, timeout: float = None):
+        if self.mode == TransportMode.REPLAY:
+            response, latency = self._replay_post(json_body)
+            time.sleep(self._get_delay(latency))
+            self.tag_response(response, uri, self.json_codec.dumps_bytes(json_body))
+
+            return response
+
+        start = time.perf_counter()
+        response = HttpTransport.post(self, uri, json_body, timeout)
+
+        if self.mode == TransportMode.RECORD:
+            self._record_post(json_body, response, time.perf_counter()-start)
+
+        return response
+
+    async def post_async(self, client, uri: str, json_body: dict | list):
+        if self.mode == TransportMode.REPLAY:
+            response, latency = self._replay_post(json_body)
+            await asyncio.sleep(self._get_delay(latency))
+            self.tag_response(response, uri, self.json_codec.dumps_bytes(json_body))
+
+            return response
+
+        start = time.perf_counter()
+        response = await HttpTransport.post_async(self, client, uri, json_body)
+
+        if self.mode == TransportMode.RECORD:
+            self._record_post(json_body, response, time.perf_counter()-start)
+
+        return response
+
+    def get(self, uri: str, headers: dict = None, timeout: float = None):
+        if self.mode == TransportMode.REPLAY:
+            response, latency = self._replay_get(uri)
+            time.sleep(self._get_delay(latency))
+            self.tag_response(response, uri, None)
+
+            return response
+
+        start = time.perf_counter()
+        response = HttpTransport.get(self, uri, headers, timeout)
+
+        if self.mode == TransportMode.RECORD:
+            self.archive.add(self.get_key_prefix + uri, response.status_code, time.perf_counter()-start, response.content.decode("utf-8", "replace"))
+
+        return response
+
+    def save(self, path: str = None):
+        self.archive.save(path if path else self.archive_path)
+
+    def get_archive_stats(self)->dict:
+        return {"mode": self.mode.value, "archive_path": self.archive_path, "responses": self.archive.get_num_responses(),
+                "keys": len(self.archive.entries), "hits": self.num_hits, "misses": self.num_misses}
+
+    def close(self):
+        if self.mode == TransportMode.RECORD:
+            self.save()
+
+        HttpTransport.close(self)
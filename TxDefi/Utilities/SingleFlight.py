@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from typing import Callable, Coroutine, Hashable
+
+class InFlightCall:
+    def __init__(self):
+        self.done_event = threading.Event()
+        self.result = None
+        self.error: Exception = None
+
+#Concurrent calls with the same key share one execution; the first caller runs it and everyone else waits for its result
+class SingleFlight:
+    def __init__(self):
+        self.calls : dict[Hashable, InFlightCall] = {}
+        self.async_calls : dict[Hashable, asyncio.Future] = {} #Only touched from one event loop
+        self.lock = threading.Lock()
+        self.num_executed = 0
+        self.num_coalesced = 0
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = InFlightCall()
+                self.calls[key] = call
+                self.num_executed += 1
+            else:
+                self.num_coalesced += 1
+
+        if not is_leader:
+            call.done_event.wait()
+
+            if call.error:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+            call.done_event.set()
+
+    async def do_async(self, key: Hashable, coroutine_function: Callable[..., Coroutine], *args, **kwargs):
+        future = self.async_calls.get(key)
+
+        if future:
+            with self.lock:
+                self.num_coalesced += 1
+
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.async_calls[key] = future
+
+        with self.lock:
+            self.num_executed += 1
+
+        try:
+            result = await coroutine_function(*args, **kwargs)
+            future.set_result(result)
+
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() #Mark retrieved so an unawaited failure isn't logged
+            raise
+        finally:
+            self.async_calls.pop(key, None)
+
+    def get_stats(self)->dict:
+        with self.lock:
+            return {"in_flight": len(self.calls) + len(self.async_calls), "executed": self.num_executed, "coalesced": self.num_coalesced}
@@ -10,4 +10,5 @@ async def main():
 
     main_gui.show_modal()
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__": #Log decode workers are spawned and re-import this module
+    asyncio.run(main())
\ No newline at end of file